@@ -0,0 +1 @@
+"""Offline benchmarks with a stand-in RapidAPI server and LLM backend."""
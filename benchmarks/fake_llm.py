@@ -0,0 +1,133 @@
+import json
+import time
+from typing import Iterator
+from typing import List
+
+import litellm
+from litellm import CustomLLM
+from litellm.types.utils import ChatCompletionMessageToolCall
+from litellm.types.utils import Function
+from litellm.types.utils import GenericStreamingChunk
+from litellm.types.utils import Usage
+
+from benchmarks.fixtures import label_text
+from tg_vibe_check.core.metrics import build_report
+from tg_vibe_check.core.prompt import CATEGORY_CODES
+from tg_vibe_check.core.prompt import CLASSIFY_STATIC_PROMPT
+from tg_vibe_check.core.prompt import FAST_STATIC_PROMPT
+from tg_vibe_check.core.prompt import FAST_TOOL_NAME
+from tg_vibe_check.core.tokens import estimate_tokens
+
+FAKE_MODEL = 'fake/vibe'
+
+# Characters per streamed chunk, roughly a handful of tokens like real provider deltas.
+STREAM_CHUNK_CHARS = 16
+
+
+def _text(content) -> str:
+	if isinstance(content, list):
+		return ''.join(part.get('text', '') for part in content)
+	return content
+
+
+def _records(user_prompt: str) -> List[dict]:
+	"""The message records of a compiled prompt, one compact JSON object per line."""
+	return [json.loads(line.rstrip(',')) for line in user_prompt.splitlines() if line.startswith('{')]
+
+
+class FakeLLM(CustomLLM):
+	"""litellm backend that answers vibe check, classify and fast prompts locally with realistic timing.
+
+	Labels come from the synthetic fixture templates, so reports are plausible. The response takes `ttft` seconds
+	to start and then arrives at `tokens_per_second`, after a scratchpad of `scratchpad_tokens` (except for the
+	fast protocol, which is answered with a tool call).
+	"""
+
+	def __init__(self, ttft: float = 0.5, tokens_per_second: float = 500.0, scratchpad_tokens: int = 300):
+		super().__init__()
+		self.ttft = ttft
+		self.tokens_per_second = tokens_per_second
+		self.scratchpad_tokens = scratchpad_tokens
+
+	def _respond(self, messages: list) -> tuple:
+		system = _text(messages[0]['content'])
+		user = _text(messages[-1]['content'])
+		records = _records(user)
+		if system == FAST_STATIC_PROMPT:
+			labels = {str(record['i']): label_text(record['text'] or '') for record in records}
+			quotes = {}
+			for index, categories in labels.items():
+				for category in categories:
+					quotes.setdefault(CATEGORY_CODES[category], [])
+					if len(quotes[CATEGORY_CODES[category]]) < 3:
+						quotes[CATEGORY_CODES[category]].append(int(index))
+			answer = {
+				'labels': {
+					index: ''.join(CATEGORY_CODES[c] for c in categories)
+					for index, categories in labels.items()
+					if categories
+				},
+				'quotes': quotes,
+			}
+			return None, json.dumps(answer, separators=(',', ':')), self._usage(system, user, json.dumps(answer))
+		if system == CLASSIFY_STATIC_PROMPT:
+			answer = {str(record['i']): label_text(record['text'] or '') for record in records}
+		else:
+			texts = [record['text'] or '' for record in records]
+			weights = [record.get('count', 1) for record in records]
+			answer = build_report(texts, [label_text(text) for text in texts], weights)
+
+		scratchpad = 'Counting categories. ' * (self.scratchpad_tokens // 4)
+		content = f'<scratchpad>{scratchpad}</scratchpad>\n<answer>\n{json.dumps(answer)}\n</answer>'
+		return content, None, self._usage(system, user, content)
+
+	@staticmethod
+	def _usage(system: str, user: str, output: str) -> Usage:
+		return Usage(
+			prompt_tokens=estimate_tokens(system) + estimate_tokens(user),
+			completion_tokens=estimate_tokens(output),
+			total_tokens=estimate_tokens(system) + estimate_tokens(user) + estimate_tokens(output),
+		)
+
+	def completion(self, model: str, messages: list, *args, model_response=None, **kwargs):
+		content, arguments, usage = self._respond(messages)
+		time.sleep(self.ttft + usage.completion_tokens / self.tokens_per_second)
+		model_response.choices[0].message.content = content
+		if arguments is not None:
+			model_response.choices[0].message.tool_calls = [
+				ChatCompletionMessageToolCall(function=Function(name=FAST_TOOL_NAME, arguments=arguments))
+			]
+		model_response.model = model
+		model_response.usage = usage
+		return model_response
+
+	def streaming(self, model: str, messages: list, *args, **kwargs) -> Iterator[GenericStreamingChunk]:
+		content, _, usage = self._respond(messages)
+		time.sleep(self.ttft)
+		for start in range(0, len(content), STREAM_CHUNK_CHARS):
+			piece = content[start : start + STREAM_CHUNK_CHARS]
+			time.sleep(estimate_tokens(piece) / self.tokens_per_second)
+			last = start + STREAM_CHUNK_CHARS >= len(content)
+			yield {
+				'text': piece,
+				'tool_use': None,
+				'is_finished': last,
+				'finish_reason': 'stop' if last else '',
+				'usage': {
+					'prompt_tokens': usage.prompt_tokens,
+					'completion_tokens': usage.completion_tokens,
+					'total_tokens': usage.total_tokens,
+				}
+				if last
+				else None,
+				'index': 0,
+			}
+
+
+def register_fake_llm(**kwargs) -> FakeLLM:
+	"""Register a `FakeLLM` as the `fake` litellm provider, so `FAKE_MODEL` can be passed as the model."""
+	handler = FakeLLM(**kwargs)
+	litellm.custom_provider_map = [entry for entry in litellm.custom_provider_map if entry['provider'] != 'fake'] + [
+		{'provider': 'fake', 'custom_handler': handler}
+	]
+	return handler
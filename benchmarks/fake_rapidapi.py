@@ -0,0 +1,115 @@
+import bisect
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Dict
+from typing import List
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+
+class FakeRapidAPI:
+	"""Local stand-in for the RapidAPI `telegram-channel` endpoint, serving fixture messages.
+
+	Answers `GET /channel/message?channel=&limit=&max_id=` like the real API, after sleeping `latency` seconds.
+	Requests beyond `rate` per second (with bursts up to `burst`) get a 429 with Retry-After, as RapidAPI does when
+	over quota, and a random `error_rate` share of requests fails with a 503.
+	Use as a context manager; `base_url` goes into the RAPIDAPI_BASE_URL env variable.
+	"""
+
+	def __init__(
+		self,
+		channels: Dict[str, List[Dict]],
+		rate: float = 50.0,
+		burst: float = 1.0,
+		latency: float = 0.05,
+		error_rate: float = 0.0,
+	):
+		# Oldest first, so a page is a slice ending at the bisection point of `max_id`.
+		self.channels = {name: sorted(messages, key=lambda msg: int(msg['id'])) for name, messages in channels.items()}
+		self._ids = {name: [int(msg['id']) for msg in messages] for name, messages in self.channels.items()}
+		self.rate = rate
+		self.burst = burst
+		self.latency = latency
+		self.error_rate = error_rate
+		self.requests = 0
+		self.throttled = 0
+		self.failed = 0
+		self._tokens = burst
+		self._updated_at = time.monotonic()
+		self._lock = threading.Lock()
+		self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+		self._thread = None
+
+	@property
+	def base_url(self) -> str:
+		host, port = self._server.server_address
+		return f'http://{host}:{port}'
+
+	def _allow(self) -> bool:
+		with self._lock:
+			now = time.monotonic()
+			self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+			self._updated_at = now
+			self.requests += 1
+			if self._tokens < 1:
+				self.throttled += 1
+				return False
+			self._tokens -= 1
+			return True
+
+	def page(self, channel: str, limit: int, max_id: int) -> List[Dict]:
+		"""Up to `limit` messages with id <= `max_id`, newest first."""
+		if channel not in self.channels:
+			return []
+		end = bisect.bisect_right(self._ids[channel], max_id)
+		return self.channels[channel][max(0, end - limit) : end][::-1]
+
+	def _handler(self):
+		fake = self
+
+		class Handler(BaseHTTPRequestHandler):
+			def do_GET(self):
+				url = urlparse(self.path)
+				if url.path != '/channel/message':
+					self.send_error(404)
+					return
+				if not fake._allow():
+					self.send_response(429)
+					self.send_header('Retry-After', f'{1 / fake.rate:.3f}')
+					self.send_header('Content-Length', '0')
+					self.end_headers()
+					return
+				if random.random() < fake.error_rate:
+					with fake._lock:
+						fake.failed += 1
+					self.send_error(503, 'Service Unavailable')
+					return
+
+				time.sleep(fake.latency)
+				query = {key: values[0] for key, values in parse_qs(url.query).items()}
+				page = fake.page(query.get('channel', ''), int(query.get('limit', 50)), int(query.get('max_id', 0)))
+				body = json.dumps(page).encode()
+				self.send_response(200)
+				self.send_header('Content-Type', 'application/json')
+				self.send_header('Content-Length', str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, format, *args):
+				pass
+
+		return Handler
+
+	def __enter__(self) -> 'FakeRapidAPI':
+		self._thread = threading.Thread(target=self._server.serve_forever, name='fake-rapidapi', daemon=True)
+		self._thread.start()
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self._server.shutdown()
+		self._server.server_close()
+		self._thread.join()
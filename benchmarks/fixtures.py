@@ -0,0 +1,158 @@
+import argparse
+import json
+import random
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from pathlib import Path
+from typing import Dict
+from typing import List
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+# Message templates per category of the Master Classification List; `{n}` is filled with a random number.
+TEMPLATES = {
+	'FUD': [
+		'dev wallet just moved {n}k tokens, this is going to zero',
+		'team has been silent for {n} days, something is off',
+	],
+	'HODL': [
+		'not selling a single token, holding for {n} years if needed',
+		'diamond hands, bought more at the dip and staying for the long term',
+	],
+	'COPE': [
+		'this dip is healthy, we will 100x by next week for sure',
+		'price doesnt matter, {n}x is inevitable once the big announcement drops',
+	],
+	'CONFLICT': [
+		'stop spreading lies, you clearly have no idea what you are talking about',
+		'mods are asleep again, this chat is a joke',
+	],
+	'SUPPORT': [
+		'great work team, proud to be part of this community',
+		'welcome aboard, ask anything and we will help you out',
+	],
+	'MOON_BOY': [
+		'wen lambo ser, wen moon, pump it to {n}',
+		'LFG to the moon, {n}x incoming',
+	],
+	'GENUINE_QUESTION': [
+		'how does the staking contract handle unbonding after epoch {n}?',
+		'is there a roadmap for the bridge integration this quarter?',
+	],
+	'COMMUNITY_HELP': [
+		'you can find the staking guide in the pinned docs, step {n} covers unbonding',
+		'the bridge contract address is in the official docs, never use links from DMs',
+	],
+	'TECHNICAL_DISCOURSE': [
+		'the new consensus change cuts finality to {n} blocks, nice tradeoff on validator load',
+		'gas usage of the router dropped after the storage layout refactor',
+	],
+	'RUGPULL_ANXIETY': [
+		'liquidity pool got drained by {n}%, is this a rug?',
+		'is the team doxxed? worried they pull liquidity and disappear',
+	],
+	'BOT_SHILL': [
+		'Join the {n}x presale now at the link in bio, limited spots available!!!',
+	],
+	'PRICE_DESPERATION': [
+		'why is price down again, need it back to ${n} to break even',
+	],
+}
+
+# Appended to templated messages so that, like real chat, few of them are exact duplicates.
+TAIL_WORDS = (
+	'honestly anyway tbh imo fr ngl today tonight again still already though btw also maybe literally really '
+	'chart volume wallet devs mods chain token bridge staking roadmap update docs listing exchange'
+).split()
+FILLER = ['gm', 'gm gm', 'hello everyone', 'lol', 'nice', '🚀🚀🚀', '']
+
+
+def label_text(text: str) -> List[str]:
+	"""Categories of a synthetic message, recovered from the template it was generated from."""
+	return [
+		category
+		for category, templates in TEMPLATES.items()
+		if any(text.startswith(template.split('{')[0]) for template in templates)
+	]
+
+
+def synthetic_channel(count: int, seed: int = 0, filler_share: float = 0.2, shill_share: float = 0.05) -> List[Dict]:
+	"""Generate `count` raw messages of a channel, newest first, in the RapidAPI `telegram-channel` format."""
+	rng = random.Random(seed)
+	categories = [category for category in TEMPLATES if category != 'BOT_SHILL']
+	shill = TEMPLATES['BOT_SHILL'][0].format(n=rng.randint(10, 100))
+	start = datetime(2025, 6, 27, 9, 30, tzinfo=timezone.utc)
+
+	messages = []
+	for i in range(count):
+		roll = rng.random()
+		if roll < filler_share:
+			text = rng.choice(FILLER)
+		elif roll < filler_share + shill_share:
+			text = shill
+		else:
+			text = rng.choice(TEMPLATES[rng.choice(categories)]).format(n=rng.randint(2, 99))
+			text = ' '.join([text, *rng.sample(TAIL_WORDS, rng.randint(0, 4))])
+		messages.append(
+			{
+				'id': str(400000 + count - i),
+				'author': 'Bench Channel',
+				'date': (start - timedelta(seconds=30 * i)).strftime('%Y-%m-%dT%H:%M:%S+0000'),
+				'user_read_status': 'unread',
+				'text': text,
+				'html': f'<p>{text}</p>',
+				'views': '',
+				'forwarded': {},
+				'button': {},
+				'link': {},
+				'photo': {},
+				'video': {},
+				'audio': {},
+				'sticker': {},
+				'attachment': {},
+				'media_poll': {},
+			}
+		)
+	return messages
+
+
+def load_fixture(name: str) -> List[Dict]:
+	"""Load a recorded channel from `fixtures/<name>.json`."""
+	with open(FIXTURES_DIR / f'{name}.json') as f:
+		return json.load(f)
+
+
+def record_fixture(channel: str, pages: int) -> Path:
+	"""Fetch raw pages of a real channel from RapidAPI and save them as a fixture (uses real quota).
+
+	Pages are kept as RapidAPI sent them, with all fields, so fixtures don't depend on what the client keeps.
+	"""
+	from tg_vibe_check.core.batch import MessageBatch
+	from tg_vibe_check.integrations.rapidapi import MAX_MESSAGE_ID
+	from tg_vibe_check.integrations.rapidapi import PAGE_SIZE
+	from tg_vibe_check.integrations.rapidapi import _fetch_page
+	from tg_vibe_check.integrations.rapidapi import rate_limiter
+
+	messages = []
+	max_id = MAX_MESSAGE_ID
+	for _ in range(pages):
+		page = _fetch_page(channel, PAGE_SIZE, max_id, None, rate_limiter)
+		if not page:
+			break
+		messages.extend(page)
+		max_id = MessageBatch.from_messages(page).next_max_id()
+
+	path = FIXTURES_DIR / f'{channel}.json'
+	with open(path, 'w') as f:
+		json.dump(messages, f, indent=2, ensure_ascii=False)
+		f.write('\n')
+	return path
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Record a real channel as a benchmark fixture.')
+	parser.add_argument('channel')
+	parser.add_argument('--pages', type=int, default=4)
+	args = parser.parse_args()
+	print(f'Saved {record_fixture(args.channel, args.pages)}')
@@ -0,0 +1,66 @@
+"""Measure cold-start import time of the package's entry modules, each in a fresh interpreter.
+
+python -m benchmarks.import_time --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict
+from typing import List
+from typing import Optional
+
+DEFAULT_MODULES = [
+	'tg_vibe_check.config',
+	'tg_vibe_check.integrations.rapidapi',
+	'tg_vibe_check.core.llm',
+	'tg_vibe_check.pipeline',
+	'tg_vibe_check.ui.streamlit_app',
+]
+
+# Dependencies whose import alone takes a noticeable share of a second or more.
+HEAVY_MODULES = ['litellm', 'bs4', 'streamlit', 'numpy', 'requests']
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeat: int) -> Dict:
+	"""Median import time of `module` over `repeat` fresh interpreters, and which heavy dependencies it pulled in."""
+	runs = []
+	for _ in range(repeat):
+		output = subprocess.run(
+			[sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+			check=True,
+			capture_output=True,
+			text=True,
+		).stdout
+		runs.append(json.loads(output.strip().splitlines()[-1]))
+	return {
+		'module': module,
+		'median_seconds': round(statistics.median(run['seconds'] for run in runs), 4),
+		'loaded': runs[-1]['loaded'],
+	}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+	parser = argparse.ArgumentParser(description='Cold-start import time of tg_vibe_check modules.')
+	parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+	parser.add_argument('--repeat', type=int, default=5)
+	args = parser.parse_args(argv)
+
+	for module in args.modules:
+		result = measure(module, args.repeat)
+		loaded = ', '.join(result['loaded']) or '-'
+		print(f'{result["module"]:>40}  {result["median_seconds"] * 1000:8.1f} ms  loads: {loaded}')
+
+
+if __name__ == '__main__':
+	main()
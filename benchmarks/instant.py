@@ -0,0 +1,54 @@
+"""Time the lexicon-only vibe check on large synthetic channels, from a MessageBatch and from message dicts.
+
+python -m benchmarks.instant --counts 10000 100000 --budget 0.75  # exits 1 if any case is over budget
+"""
+
+import argparse
+import sys
+import time
+from typing import Callable
+from typing import List
+from typing import Optional
+
+from benchmarks.fixtures import synthetic_channel
+
+DEFAULT_COUNTS = [10000, 100000]
+
+
+def best_time(fn: Callable[[], object], repeat: int) -> float:
+	"""Fastest of `repeat` runs of `fn`, in seconds."""
+	timings = []
+	for _ in range(repeat):
+		started = time.perf_counter()
+		fn()
+		timings.append(time.perf_counter() - started)
+	return min(timings)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	parser = argparse.ArgumentParser(description='Lexicon-only vibe check timings.')
+	parser.add_argument('--counts', type=int, nargs='+', default=DEFAULT_COUNTS, help='synthetic channel sizes')
+	parser.add_argument('--repeat', type=int, default=3, help='runs per case, the fastest is reported')
+	parser.add_argument('--budget', type=float, default=0.75, help='seconds allowed per case')
+	args = parser.parse_args(argv)
+
+	from tg_vibe_check.core.batch import MessageBatch
+	from tg_vibe_check.core.lexicon import analyze_tg_vibe_instant
+
+	over = []
+	for count in args.counts:
+		messages = synthetic_channel(count)
+		cases = {'batch': MessageBatch.from_messages(messages), 'dicts': messages}
+		for name, source in cases.items():
+			seconds = best_time(lambda: analyze_tg_vibe_instant(source), args.repeat)
+			print(f'{count:>8} msgs  {name:>5}  {seconds:.3f}s')
+			if seconds > args.budget:
+				over.append(f'{count} msgs from {name}: {seconds:.3f}s over the {args.budget}s budget')
+
+	for line in over:
+		print(f'OVER BUDGET {line}', file=sys.stderr)
+	return 1 if over else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,140 @@
+"""Run the vibe check pipeline against the fake RapidAPI server and fake LLM, across channel sizes.
+
+python -m benchmarks.run --counts 50 200 1000 5000 50000 --output baseline.json  # e.g. on main
+python -m benchmarks.run --counts 50 200 1000 5000 50000 --baseline baseline.json  # exits 1 on regression
+
+Timings depend on the machine, so record the baseline on the same kind of runner that checks against it.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from benchmarks.fake_llm import FAKE_MODEL
+from benchmarks.fake_llm import register_fake_llm
+from benchmarks.fake_rapidapi import FakeRapidAPI
+from benchmarks.fixtures import load_fixture
+from benchmarks.fixtures import synthetic_channel
+
+DEFAULT_COUNTS = [50, 200, 1000, 5000, 50000]
+
+# Metrics compared against the baseline; all of them are "lower is better".
+COMPARED = ('total', 'prompt_tokens', 'peak_memory_mb')
+
+
+def run_case(channel: str, count: int, api_rate: float, chunked: bool, fast: bool) -> Dict:
+	"""Run `run_vibe_check` on one channel, with its stage timings, token counts and peak memory."""
+	from tg_vibe_check.integrations.rapidapi import PAGE_SIZE
+	from tg_vibe_check.integrations.ratelimit import TokenBucket
+	from tg_vibe_check.pipeline import run_vibe_check
+	from tg_vibe_check.telemetry import telemetry
+
+	# Token counts of the requests actually sent in this mode (every chunk when chunked), as the LLM reported them.
+	before = telemetry.snapshot()['llm'].get(FAKE_MODEL, {})
+	tracemalloc.start()
+	started = time.perf_counter()
+	result = run_vibe_check(
+		channel,
+		math.ceil(count / PAGE_SIZE),
+		FAKE_MODEL,
+		chunked=chunked,
+		fast=fast,
+		limiter=TokenBucket(rate=api_rate, capacity=1),
+	)
+	total = time.perf_counter() - started
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	after = telemetry.snapshot()['llm'][FAKE_MODEL]
+
+	return {
+		'channel': channel,
+		'messages': result['messages'],
+		'messages_out': result['preprocess']['messages_out'],
+		'prompt_tokens': after['input'] - before.get('input', 0),
+		'output_tokens': after['output'] - before.get('output', 0),
+		'timings': {key: round(value, 4) for key, value in result['timings'].items()},
+		'total': round(total, 4),
+		'peak_memory_mb': round(peak / 2**20, 2),
+	}
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+	"""Regressions of `results` against `baseline` beyond the relative `tolerance`, matched by channel."""
+	by_channel = {row['channel']: row for row in baseline}
+	regressions = []
+	for row in results:
+		reference = by_channel.get(row['channel'])
+		if reference is None:
+			continue
+		for metric in COMPARED:
+			if reference[metric] and row[metric] > reference[metric] * (1 + tolerance):
+				regressions.append(
+					f'{row["channel"]}: {metric} {row[metric]} vs baseline {reference[metric]} '
+					f'(+{tolerance:.0%} allowed)'
+				)
+	return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	parser = argparse.ArgumentParser(description='Offline vibe check benchmarks.')
+	parser.add_argument('--counts', type=int, nargs='+', default=DEFAULT_COUNTS, help='synthetic channel sizes')
+	parser.add_argument('--fixtures', nargs='*', default=[], help='recorded fixtures from benchmarks/fixtures')
+	parser.add_argument('--chunked', action='store_true', help='use the map-reduce classifier')
+	parser.add_argument('--fast', action='store_true', help='use the compact structured-output protocol')
+	parser.add_argument('--api-rate', type=float, default=50.0, help='fake RapidAPI requests per second')
+	parser.add_argument('--api-latency', type=float, default=0.05, help='fake RapidAPI seconds per request')
+	parser.add_argument('--api-error-rate', type=float, default=0.0, help='share of fake RapidAPI requests that 503')
+	parser.add_argument('--ttft', type=float, default=0.5, help='fake LLM seconds to first token')
+	parser.add_argument('--tps', type=float, default=500.0, help='fake LLM output tokens per second')
+	parser.add_argument('--output', help='write the results as JSON to this file')
+	parser.add_argument('--baseline', help='JSON results to compare against')
+	parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression')
+	args = parser.parse_args(argv)
+
+	channels = {f'synthetic_{count}': synthetic_channel(count) for count in args.counts}
+	channels.update({name: load_fixture(name) for name in args.fixtures})
+
+	register_fake_llm(ttft=args.ttft, tokens_per_second=args.tps)
+	with FakeRapidAPI(channels, rate=args.api_rate, latency=args.api_latency, error_rate=args.api_error_rate) as api:
+		# Must be set before the RapidAPI client is first imported.
+		os.environ['RAPIDAPI_BASE_URL'] = api.base_url
+		os.environ.setdefault('RAPID_API', 'benchmark')
+
+		# Pay one-off import and client setup costs outside the measurements.
+		run_case(next(iter(channels)), 1, args.api_rate, args.chunked, args.fast)
+
+		results = []
+		for channel, messages in channels.items():
+			row = run_case(channel, len(messages), args.api_rate, args.chunked, args.fast)
+			results.append(row)
+			stages = ' '.join(f'{stage}={seconds:.2f}s' for stage, seconds in row['timings'].items())
+			print(
+				f'{channel:>20} {row["messages"]:>6} msgs  total={row["total"]:.2f}s  {stages}  '
+				f'prompt={row["prompt_tokens"]} tok  output={row["output_tokens"]} tok  '
+				f'peak={row["peak_memory_mb"]:.1f} MB'
+			)
+		print(f'RapidAPI: {api.requests} requests, {api.throttled} throttled, {api.failed} failed')
+
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump(results, f, indent=2)
+			f.write('\n')
+
+	if args.baseline:
+		with open(args.baseline) as f:
+			regressions = compare(results, json.load(f), args.tolerance)
+		for regression in regressions:
+			print(f'REGRESSION {regression}', file=sys.stderr)
+		return 1 if regressions else 0
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
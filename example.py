@@ -1,7 +1,9 @@
+from tg_vibe_check.config import export_secrets_to_env
 from tg_vibe_check.core.llm import analyze_tg_vibe
 from tg_vibe_check.integrations.rapidapi import get_tg_messages
 
 if __name__ == '__main__':
+	export_secrets_to_env()
 	try:
 		# using virtuals channel from t.me/virtuals
 		messages = get_tg_messages('virtuals')
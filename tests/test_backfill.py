@@ -0,0 +1,155 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from pathlib import Path
+from unittest import mock
+
+from tg_vibe_check import backfill
+from tg_vibe_check.core.batch import MessageBatch
+from tg_vibe_check.core.store import MessageStore
+
+PAGE_SIZE = 50
+START = datetime(2025, 6, 27, 9, 30, tzinfo=timezone.utc)
+
+
+def make_channel(count):
+	"""Messages with ids 1..count, newest first, one minute apart."""
+	return [
+		{
+			'id': str(i),
+			'date': (START - timedelta(minutes=count - i)).strftime('%Y-%m-%dT%H:%M:%S+0000'),
+			'text': f'message {i}',
+			'views': '',
+		}
+		for i in range(count, 0, -1)
+	]
+
+
+class FakePages:
+	"""Stands in for `iter_tg_message_pages`, paging an in-memory channel and counting requests."""
+
+	def __init__(self, messages):
+		self.messages = messages
+		self.requests = 0
+
+	def __call__(self, channel, pages, max_id, session=None, limiter=None):
+		while pages > 0:
+			self.requests += 1
+			page = [msg for msg in self.messages if int(msg['id']) <= max_id][:PAGE_SIZE]
+			if not page:
+				return
+			batch = MessageBatch.from_messages(page)
+			yield batch
+			pages -= 1
+			max_id = batch.next_max_id()
+
+
+def ids(pages):
+	return [int(i) for page in pages for i in page.ids.tolist()]
+
+
+class BackfillPagesTest(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.checkpoint = Path(self.tmp.name) / 'checkpoint.json'
+		self.fake = FakePages(make_channel(300))
+		patcher = mock.patch.object(backfill, 'iter_tg_message_pages', self.fake)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+		self.addCleanup(self.tmp.cleanup)
+
+	def pages(self, **kwargs):
+		return list(backfill.backfill_pages('chan', checkpoint=self.checkpoint, limiter=object(), **kwargs))
+
+	def test_interrupted_run_resumes_without_gaps_or_duplicates(self):
+		seen = []
+		with self.assertRaises(KeyboardInterrupt):
+			for i, page in enumerate(backfill.backfill_pages('chan', checkpoint=self.checkpoint, limiter=object())):
+				if i == 2:
+					raise KeyboardInterrupt
+				seen.extend(ids([page]))
+		self.assertEqual(backfill.load_checkpoint(self.checkpoint)['messages'], 100)
+
+		seen.extend(ids(self.pages()))
+		self.assertEqual(seen, list(range(300, 0, -1)))
+		self.assertTrue(backfill.load_checkpoint(self.checkpoint)['exhausted'])
+
+	def test_resume_with_larger_message_target_continues_below_cut_page(self):
+		first = ids(self.pages(max_messages=30))
+		self.assertEqual(first, list(range(300, 270, -1)))
+		self.assertEqual(backfill.load_checkpoint(self.checkpoint)['max_id'], 270)
+
+		second = ids(self.pages(max_messages=100))
+		self.assertEqual(first + second, list(range(300, 200, -1)))
+		self.assertEqual(ids(self.pages(max_messages=100)), [])
+
+	def test_resume_with_earlier_until_continues_below_cut_page(self):
+		first = ids(self.pages(until=START - timedelta(minutes=30)))
+		self.assertEqual(first, list(range(300, 269, -1)))
+
+		second = ids(self.pages(until=START - timedelta(minutes=120)))
+		self.assertEqual(first + second, list(range(300, 179, -1)))
+
+	def test_finished_target_makes_no_requests(self):
+		self.pages(max_messages=80)
+		requests = self.fake.requests
+		self.assertEqual(self.pages(max_messages=80), [])
+		self.assertEqual(self.fake.requests, requests)
+
+	def test_checkpoint_of_another_channel_is_rejected(self):
+		self.pages(max_messages=10)
+		with self.assertRaises(ValueError):
+			list(backfill.backfill_pages('other', checkpoint=self.checkpoint, limiter=object()))
+
+
+class BackfillSinksTest(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.dir = Path(self.tmp.name)
+		patcher = mock.patch.object(backfill, 'iter_tg_message_pages', FakePages(make_channel(300)))
+		patcher.start()
+		self.addCleanup(patcher.stop)
+		self.addCleanup(self.tmp.cleanup)
+
+	def read_ids(self, path):
+		with open(path) as f:
+			return [int(json.loads(line)['id']) for line in f]
+
+	def test_jsonl_cut_off_mid_write_is_repaired_on_resume(self):
+		path = self.dir / 'history.jsonl'
+		backfill.backfill_to_jsonl('chan', path, max_messages=120, limiter=object(), progress=None)
+		self.assertEqual(self.read_ids(path), list(range(300, 180, -1)))
+
+		# A page written after the last checkpoint, the last line torn by the interruption.
+		with open(path, 'a') as f:
+			f.write(json.dumps({'id': '180', 'date': '', 'text': 'x', 'views': ''}) + '\n')
+			f.write('{"id": "179", "da')
+
+		result = backfill.backfill_to_jsonl('chan', path, max_messages=200, limiter=object(), progress=None)
+		self.assertEqual(self.read_ids(path), list(range(300, 100, -1)))
+		self.assertEqual(result['messages'], 200)
+
+	def test_jsonl_without_checkpoint_is_not_appended_to(self):
+		path = self.dir / 'history.jsonl'
+		path.write_text('{"id": "5"}\n')
+		with self.assertRaises(ValueError):
+			backfill.backfill_to_jsonl('chan', path, max_messages=10, limiter=object(), progress=None)
+
+	def test_store_backfill_continues_below_stored_messages(self):
+		store = MessageStore(str(self.dir / 'messages.db'))
+		self.addCleanup(store.close)
+		store.add_messages('chan', make_channel(300)[:50])
+
+		checkpoint = self.dir / 'chan.json'
+		backfill.backfill_to_store('chan', store, checkpoint, max_messages=75, limiter=object(), progress=None)
+		result = backfill.backfill_to_store('chan', store, checkpoint, limiter=object(), progress=None)
+
+		self.assertTrue(result['exhausted'])
+		self.assertEqual(store.count('chan'), 300)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+
+from tg_vibe_check.core.batch import MISSING
+from tg_vibe_check.core.batch import MessageBatch
+from tg_vibe_check.core.batch import parse_date
+from tg_vibe_check.core.batch import parse_views
+
+
+def message(id_, text='gm', date='2025-06-27T09:30:00+0000', views='12', **extra):
+	return {'id': str(id_), 'date': date, 'text': text, 'views': views, **extra}
+
+
+class ParseTest(unittest.TestCase):
+	def test_dates(self):
+		self.assertEqual(parse_date('2025-06-27T09:30:00+0000'), 1751016600)
+		for value in (None, '', 'yesterday'):
+			self.assertEqual(parse_date(value), MISSING, value)
+
+	def test_views(self):
+		self.assertEqual(parse_views('1234'), 1234)
+		self.assertEqual(parse_views('1.2K'), 1200)
+		self.assertEqual(parse_views(' 3m '), 3_000_000)
+		self.assertEqual(parse_views(7), 7)
+		for value in (None, '', 'n/a'):
+			self.assertEqual(parse_views(value), MISSING, value)
+
+
+class MessageBatchTest(unittest.TestCase):
+	def test_messages_round_trip(self):
+		messages = [message(3, 'wen moon', views='1200'), message(2, 'gm', count=4), message(1, '', views='')]
+		self.assertEqual(MessageBatch.from_messages(messages).to_messages(), messages)
+
+	def test_missing_fields_render_empty(self):
+		batch = MessageBatch.from_messages([message(1, None, date='', views=None)])
+		self.assertEqual(batch.dates.tolist(), [MISSING])
+		self.assertEqual(batch.views.tolist(), [MISSING])
+		self.assertEqual(batch.to_messages(), [message(1, '', date='', views='')])
+
+	def test_from_rows_matches_from_messages(self):
+		rows = [(2, '2025-06-27T09:30:00+0000', 'gm', '1.2K'), (1, '', None, '')]
+		batch = MessageBatch.from_rows(rows)
+		self.assertEqual(batch.to_messages(), [message(2, views='1200'), message(1, '', date='', views='')])
+		self.assertEqual(len(MessageBatch.from_rows([])), 0)
+
+	def test_identical_texts_share_one_object(self):
+		batch = MessageBatch.from_messages([message(2, ''.join(['g', 'm'])), message(1, ''.join(['g', 'm']))])
+		self.assertIs(batch.texts[0], batch.texts[1])
+
+	def test_items_and_slices(self):
+		batch = MessageBatch.from_messages([message(i) for i in (5, 4, 3, 2)])
+		self.assertEqual(batch[1], message(4))
+		window = batch[1:3]
+		self.assertEqual(window.ids.tolist(), [4, 3])
+		self.assertTrue(np.shares_memory(window.ids, batch.ids))
+		self.assertEqual(batch[np.array([True, False, False, True])].ids.tolist(), [5, 2])
+
+	def test_concat_and_next_max_id(self):
+		pages = [MessageBatch.from_messages([message(i) for i in ids]) for ids in ((9, 8), (), (7, 5))]
+		batch = MessageBatch.concat(pages)
+		self.assertEqual(batch.ids.tolist(), [9, 8, 7, 5])
+		self.assertEqual(batch.next_max_id(), 4)
+		self.assertIs(MessageBatch.concat(pages[:2]), pages[0])
+		self.assertEqual(len(MessageBatch.concat([])), 0)
+
+	def test_with_counts_shares_columns(self):
+		batch = MessageBatch.from_messages([message(2), message(1)])
+		counted = batch.with_counts(np.array([3, 1], dtype=np.int32))
+		self.assertIs(counted.texts, batch.texts)
+		date = message(1)['date']
+		self.assertEqual(
+			counted.to_prompt_records(), [{'date': date, 'text': 'gm', 'count': 3}, {'date': date, 'text': 'gm'}]
+		)
+
+	def test_batches_pass_through(self):
+		batch = MessageBatch.from_messages([message(1)])
+		self.assertIs(MessageBatch.from_messages(batch), batch)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,131 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tg_vibe_check.core import cache
+from tg_vibe_check.core.cache import ResultCache
+from tg_vibe_check.core.cache import SingleFlightCache
+from tg_vibe_check.core.cache import make_cache_key
+
+
+class CacheKeyTest(unittest.TestCase):
+	def test_order_whitespace_and_views_do_not_matter(self):
+		messages = [
+			{'date': 'd1', 'text': 'wen  moon', 'views': '10'},
+			{'date': 'd2', 'text': 'gm', 'views': '3'},
+		]
+		reordered = [{'date': 'd2', 'text': 'gm'}, {'date': 'd1', 'text': 'wen moon', 'views': '99'}]
+		self.assertEqual(make_cache_key(messages, 'm', 0.0, 'v1'), make_cache_key(reordered, 'm', 0.0, 'v1'))
+
+	def test_model_settings_and_counts_do(self):
+		messages = [{'date': 'd1', 'text': 'gm'}]
+		key = make_cache_key(messages, 'm', 0.0, 'v1')
+		for other in (
+			make_cache_key(messages, 'other', 0.0, 'v1'),
+			make_cache_key(messages, 'm', 0.5, 'v1'),
+			make_cache_key(messages, 'm', 0.0, 'v2'),
+			make_cache_key(messages, 'm', 0.0, 'v1', mode='fast'),
+			make_cache_key([{'date': 'd1', 'text': 'gm', 'count': 2}], 'm', 0.0, 'v1'),
+		):
+			self.assertNotEqual(key, other)
+
+
+class ResultCacheTest(unittest.TestCase):
+	def setUp(self):
+		tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(tmp.cleanup)
+		self.path = Path(tmp.name) / 'results.db'
+		self.now = 1000.0
+		patcher = mock.patch.object(cache.time, 'time', lambda: self.now)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def test_entries_expire_after_ttl(self):
+		results = ResultCache(self.path, ttl=60, max_entries=10)
+		results.set('a', {'vibe': 1})
+		self.now += 59
+		self.assertEqual(results.get('a'), {'vibe': 1})
+		self.now += 2
+		self.assertIsNone(results.get('a'))
+		self.assertEqual(results.stats()['hits'], 1)
+		self.assertEqual(results.stats()['misses'], 1)
+		self.assertEqual(results.stats()['entries'], 0)
+
+	def test_least_recently_used_is_evicted(self):
+		results = ResultCache(self.path, ttl=None, max_entries=2)
+		for key in ('a', 'b'):
+			results.set(key, {'key': key})
+			self.now += 1
+		results.get('a')
+		self.now += 1
+		results.set('c', {'key': 'c'})
+		self.assertIsNone(results.get('b'))
+		self.assertEqual(results.get('a'), {'key': 'a'})
+		self.assertEqual(results.get('c'), {'key': 'c'})
+
+	def test_persists_across_instances(self):
+		ResultCache(self.path).set('a', {'vibe': 1})
+		self.assertEqual(ResultCache(self.path).get('a'), {'vibe': 1})
+
+
+class SingleFlightCacheTest(unittest.TestCase):
+	def test_concurrent_misses_share_one_computation(self):
+		flights = SingleFlightCache()
+		started, release = threading.Event(), threading.Event()
+		calls = []
+
+		def compute():
+			calls.append(1)
+			started.set()
+			release.wait(5)
+			return 'report'
+
+		results = []
+		threads = [
+			threading.Thread(target=lambda: results.append(flights.get_or_compute('k', compute))) for _ in range(2)
+		]
+		threads[0].start()
+		started.wait(5)
+		threads[1].start()
+		while flights.stats()['shared'] == 0:
+			time.sleep(0.001)
+		release.set()
+		for thread in threads:
+			thread.join(5)
+
+		self.assertEqual(results, ['report', 'report'])
+		self.assertEqual(len(calls), 1)
+		self.assertEqual(flights.get_or_compute('k', compute), 'report')
+		self.assertEqual(flights.stats()['hits'], 1)
+
+	def test_errors_are_not_cached(self):
+		flights = SingleFlightCache()
+		with self.assertRaises(ValueError):
+			flights.get_or_compute('k', mock.Mock(side_effect=ValueError))
+		self.assertEqual(flights.get_or_compute('k', lambda: 'ok'), 'ok')
+
+	def test_invalidate_forces_a_recompute(self):
+		flights = SingleFlightCache()
+		flights.get_or_compute('k', lambda: 'old')
+		flights.invalidate('k')
+		flights.invalidate('missing')
+		self.assertEqual(flights.get_or_compute('k', lambda: 'new'), 'new')
+
+	def test_expired_and_overflowing_entries_are_dropped(self):
+		flights = SingleFlightCache(ttl=60, max_entries=2)
+		now = [0.0]
+		with mock.patch.object(cache.time, 'monotonic', lambda: now[0]):
+			flights.get_or_compute('short', lambda: 1, ttl=1)
+			now[0] += 2
+			self.assertEqual(flights.get_or_compute('short', lambda: 2), 2)
+			for key in ('a', 'b'):
+				flights.get_or_compute(key, lambda: key)
+			self.assertEqual(flights.stats()['entries'], 2)
+			self.assertEqual(flights.get_or_compute('short', lambda: 3), 3)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,70 @@
+import json
+import unittest
+from types import SimpleNamespace
+
+from tg_vibe_check.core.fast import decode_fast_answer
+from tg_vibe_check.core.fast import parse_fast_answer
+from tg_vibe_check.core.prompt import FAST_TOOL_NAME
+
+
+def tool_message(arguments, name=FAST_TOOL_NAME):
+	call = SimpleNamespace(function=SimpleNamespace(name=name, arguments=json.dumps(arguments)))
+	return SimpleNamespace(tool_calls=[call], content=None)
+
+
+def text_message(content):
+	return SimpleNamespace(tool_calls=None, content=content)
+
+
+class ParseFastAnswerTest(unittest.TestCase):
+	def test_tool_call_arguments(self):
+		self.assertEqual(parse_fast_answer(tool_message({'labels': {'0': ['F']}})), {'labels': {'0': ['F']}})
+
+	def test_inline_answer_tag_or_bare_json(self):
+		self.assertEqual(parse_fast_answer(text_message('ok <answer>{"labels": {}}</answer>')), {'labels': {}})
+		self.assertEqual(parse_fast_answer(text_message('{"quotes": {}}')), {'quotes': {}})
+
+	def test_other_tool_calls_are_ignored(self):
+		message = tool_message({'labels': {}}, name='something_else')
+		message.content = '<answer>{"labels": {"1": ["H"]}}</answer>'
+		self.assertEqual(parse_fast_answer(message), {'labels': {'1': ['H']}})
+
+	def test_no_json_raises_value_error(self):
+		with self.assertRaises(ValueError):
+			parse_fast_answer(text_message('I cannot help with that.'))
+
+
+class DecodeFastAnswerTest(unittest.TestCase):
+	def test_codes_become_categories(self):
+		labels, quotes = decode_fast_answer({'labels': {'0': ['F', 'R', 'F'], '2': ['Q']}, 'quotes': {'F': [0]}}, 3)
+		self.assertEqual(labels, [['FUD', 'RUGPULL_ANXIETY'], [], ['GENUINE_QUESTION']])
+		self.assertEqual(quotes, {'FUD': [0]})
+
+	def test_bad_indices_codes_and_quotes_are_dropped(self):
+		answer = {
+			'labels': {'0': ['F', 'Z', 7, {'x': 1}], '5': ['H'], '-1': ['H'], 'one': ['H']},
+			'quotes': {'F': [0, 1, 9, 'a'], 'H': [0], 'Z': [0], 'R': 'oops'},
+		}
+		labels, quotes = decode_fast_answer(answer, 2)
+		self.assertEqual(labels, [['FUD'], []])
+		self.assertEqual(quotes, {'FUD': [0], 'HODL': []})
+
+	def test_missing_fields_mean_no_labels(self):
+		self.assertEqual(decode_fast_answer({}, 2), ([[], []], {}))
+		self.assertEqual(decode_fast_answer({'labels': None, 'quotes': []}, 1), ([[]], {}))
+
+	def test_malformed_shapes_raise_value_error(self):
+		for answer in (
+			['F'],
+			'F',
+			{'labels': [['F'], ['H']]},
+			{'labels': {'0': ['F']}, 'quotes': [[0]]},
+			{'labels': {'0': 'F'}},
+			{'labels': {'0': None}},
+		):
+			with self.subTest(answer=answer), self.assertRaises(ValueError):
+				decode_fast_answer(answer, 2)
+
+
+if __name__ == '__main__':
+	unittest.main()
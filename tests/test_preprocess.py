@@ -0,0 +1,86 @@
+import unittest
+
+from tg_vibe_check.core.preprocess import is_trivial
+from tg_vibe_check.core.preprocess import normalize_text
+from tg_vibe_check.core.preprocess import preprocess_messages
+
+
+def messages(*texts):
+	return [
+		{'id': str(len(texts) - i), 'date': '2025-06-27T09:30:00+0000', 'text': text, 'views': ''}
+		for i, text in enumerate(texts)
+	]
+
+
+class NormalizeTest(unittest.TestCase):
+	def test_case_punctuation_numbers_and_links_collide(self):
+		self.assertEqual(
+			normalize_text('Buy NOW!!! 100x at https://scam.example/a?b=1'),
+			normalize_text('buy now... 25x at http://other.example'),
+		)
+
+	def test_trivial_messages(self):
+		for text in ('', '🚀🚀🚀', 'gm gm', 'Hello everyone!', 'lol'):
+			self.assertTrue(is_trivial(normalize_text(text)), text)
+		for text in ('gm, is the bridge down?', 'hello hello hello hello hello'):
+			self.assertFalse(is_trivial(normalize_text(text)), text)
+
+
+class PreprocessTest(unittest.TestCase):
+	def test_stats_count_each_message_once(self):
+		texts = (
+			'gm',
+			'is the staking contract audited yet?',
+			'Is the staking contract audited yet??',
+			'Join the 40x presale now at the link in bio, limited spots available for early holders today!!!',
+			'Join the 40x presale now at the link in bio, limited spots available for early holders tonight!!!',
+			'the roadmap update moved the bridge launch to next quarter',
+			'the roadmap update moved the bridge launch to next quarter',
+			'',
+		)
+		kept, stats = preprocess_messages(messages(*texts))
+
+		self.assertEqual(stats['messages_in'], 8)
+		self.assertEqual(stats['dropped_trivial'], 2)
+		self.assertEqual(stats['collapsed_duplicates'], 2)
+		self.assertEqual(stats['collapsed_near_duplicates'], 1)
+		self.assertEqual(stats['messages_out'], 3)
+		self.assertEqual(
+			stats['messages_in'],
+			stats['messages_out']
+			+ stats['dropped_trivial']
+			+ stats['collapsed_duplicates']
+			+ stats['collapsed_near_duplicates'],
+		)
+		self.assertEqual(stats['tokens_saved'], stats['tokens_before'] - stats['tokens_after'])
+
+	def test_copies_fold_into_newest_occurrence_with_count(self):
+		kept, _ = preprocess_messages(
+			messages(
+				'the roadmap update moved the bridge launch to next quarter',
+				'is the staking contract audited yet?',
+				'Is the staking contract audited yet??',
+			)
+		)
+		self.assertEqual(kept.texts.tolist()[1], 'is the staking contract audited yet?')
+		self.assertEqual(kept.counts.tolist(), [1, 2])
+		self.assertEqual(kept.ids.tolist(), [3, 2])
+
+	def test_distinct_messages_are_kept(self):
+		texts = (
+			'the new consensus change cuts finality to 4 blocks',
+			'how does unbonding work after the epoch change?',
+			'liquidity pool got drained, is this a rug?',
+		)
+		kept, stats = preprocess_messages(messages(*texts))
+		self.assertEqual(kept.texts.tolist(), list(texts))
+		self.assertEqual(stats['collapsed_duplicates'] + stats['collapsed_near_duplicates'], 0)
+
+	def test_empty_input(self):
+		kept, stats = preprocess_messages([])
+		self.assertEqual(len(kept), 0)
+		self.assertEqual(stats['messages_out'], 0)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,107 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tg_vibe_check.integrations import ratelimit
+from tg_vibe_check.integrations.ratelimit import BACKGROUND
+from tg_vibe_check.integrations.ratelimit import INTERACTIVE
+from tg_vibe_check.integrations.ratelimit import SharedTokenBucket
+from tg_vibe_check.integrations.ratelimit import TokenBucket
+
+
+class TokenBucketTest(unittest.TestCase):
+	def setUp(self):
+		self.now = 100.0
+		for name, value in (('monotonic', lambda: self.now), ('sleep', mock.Mock())):
+			patcher = mock.patch.object(ratelimit.time, name, value)
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+	def test_callers_queue_behind_the_debt(self):
+		bucket = TokenBucket(rate=2.0, capacity=1)
+		self.assertEqual([bucket.acquire() for _ in range(3)], [0.0, 0.5, 1.0])
+		self.now += 1.5
+		self.assertEqual(bucket.acquire(), 0.0)
+
+	def test_refill_is_capped_at_capacity(self):
+		bucket = TokenBucket(rate=1.0, capacity=2)
+		self.now += 60
+		self.assertEqual([bucket.acquire() for _ in range(3)], [0.0, 0.0, 1.0])
+
+	def test_async_acquire(self):
+		bucket = TokenBucket(rate=4.0)
+		self.assertEqual(asyncio.run(bucket.acquire_async()), 0.0)
+		with mock.patch.object(ratelimit.asyncio, 'sleep', mock.AsyncMock()) as sleep:
+			self.assertEqual(asyncio.run(bucket.acquire_async()), 0.25)
+		sleep.assert_awaited_once_with(0.25)
+
+	def test_invalid_settings(self):
+		for kwargs in ({'rate': 0}, {'rate': 1, 'capacity': 0.5}):
+			with self.assertRaises(ValueError):
+				TokenBucket(**kwargs)
+			with self.assertRaises(ValueError):
+				SharedTokenBucket('test', **kwargs)
+
+
+class SharedTokenBucketTest(unittest.TestCase):
+	def setUp(self):
+		tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(tmp.cleanup)
+		self.path = Path(tmp.name) / 'quota.db'
+		self.bucket = self.make_bucket()
+
+	def make_bucket(self, **kwargs):
+		# Slow enough not to refill during a test, so only queue order decides who gets the two tokens.
+		kwargs = {'rate': 0.01, 'capacity': 2, **kwargs}
+		bucket = SharedTokenBucket('test', path=str(self.path), poll_interval=0.01, **kwargs)
+		self.addCleanup(bucket.close)
+		return bucket
+
+	def served(self, ticket, caller):
+		# Tokens are available throughout, so a waiter is served as soon as it is at the head of the queue.
+		return self.bucket._poll(ticket, self.bucket._caller(caller), 1.0) == 0
+
+	def enqueue(self, priority, caller):
+		return self.bucket._enqueue(priority, self.bucket._caller(caller))
+
+	def test_interactive_goes_before_background(self):
+		background = self.enqueue(BACKGROUND, 'refresh')
+		interactive = self.enqueue(INTERACTIVE, 'user')
+		self.assertFalse(self.served(background, 'refresh'))
+		self.assertTrue(self.served(interactive, 'user'))
+		self.assertTrue(self.served(background, 'refresh'))
+		self.assertEqual(self.bucket.stats()['queued'], {})
+
+	def test_round_robin_between_callers(self):
+		self.bucket.acquire(caller='pager')
+		again = self.enqueue(INTERACTIVE, 'pager')
+		newcomer = self.enqueue(INTERACTIVE, 'short')
+		self.assertFalse(self.served(again, 'pager'))
+		self.assertTrue(self.served(newcomer, 'short'))
+
+	def test_stale_waiters_are_dropped(self):
+		bucket = self.make_bucket(stale_after=0.05)
+		ghost = bucket._enqueue(INTERACTIVE, bucket._caller('crashed'))
+		time.sleep(0.1)
+		alive = bucket._enqueue(INTERACTIVE, bucket._caller('alive'))
+		self.assertEqual(bucket._poll(alive, bucket._caller('alive'), 1.0), 0)
+		with self.assertRaises(ratelimit._Requeue):
+			bucket._poll(ghost, bucket._caller('crashed'), 1.0)
+
+	def test_processes_share_the_quota(self):
+		other = self.make_bucket()
+		self.bucket.acquire()
+		self.assertAlmostEqual(other.stats()['tokens'], 1.0, places=2)
+
+	def test_async_acquire_records_the_wait(self):
+		with mock.patch.object(ratelimit.telemetry, 'observe') as observe:
+			waited = asyncio.run(self.bucket.acquire_async(priority=BACKGROUND))
+		observe.assert_called_once_with('test.quota_wait.background', waited)
+		self.assertEqual(self.bucket.stats()['queued'], {})
+
+
+if __name__ == '__main__':
+	unittest.main()
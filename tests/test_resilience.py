@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import unittest
+from unittest import mock
+
+import requests
+
+from tg_vibe_check.integrations import resilience
+from tg_vibe_check.integrations.resilience import CircuitBreaker
+from tg_vibe_check.integrations.resilience import CircuitOpenError
+from tg_vibe_check.integrations.resilience import call_with_retries
+from tg_vibe_check.integrations.resilience import call_with_retries_async
+from tg_vibe_check.integrations.resilience import is_transient
+from tg_vibe_check.integrations.resilience import retry_after
+
+
+def setUpModule():
+	logging.disable(logging.WARNING)
+
+
+def tearDownModule():
+	logging.disable(logging.NOTSET)
+
+
+def http_error(status, headers=None):
+	response = requests.Response()
+	response.status_code = status
+	response.headers.update(headers or {})
+	return requests.HTTPError(f'{status} error', response=response)
+
+
+class Flaky:
+	"""Fails with the given errors in turn, then returns 'ok'; counts calls."""
+
+	def __init__(self, *errors):
+		self.errors = list(errors)
+		self.calls = 0
+
+	def __call__(self):
+		self.calls += 1
+		if self.errors:
+			raise self.errors.pop(0)
+		return 'ok'
+
+
+class TransientTest(unittest.TestCase):
+	def test_retryable_errors(self):
+		for error in (
+			http_error(429),
+			http_error(503),
+			http_error(408),
+			requests.ConnectionError('reset'),
+			requests.Timeout('slow'),
+			ConnectionResetError(),
+			TimeoutError(),
+		):
+			self.assertTrue(is_transient(error), repr(error))
+
+	def test_errors_that_would_fail_again(self):
+		for error in (
+			http_error(400),
+			http_error(404),
+			requests.exceptions.JSONDecodeError('Expecting value', 'oops', 0),
+			json.JSONDecodeError('Expecting value', 'oops', 0),
+			FileNotFoundError('quota.db'),
+			PermissionError(),
+			ValueError(),
+			CircuitOpenError('open'),
+		):
+			self.assertFalse(is_transient(error), repr(error))
+
+	def test_retry_after_header(self):
+		self.assertEqual(retry_after(http_error(429, {'Retry-After': '2.5'})), 2.5)
+		self.assertIsNone(retry_after(http_error(429)))
+		self.assertIsNone(retry_after(ValueError()))
+
+
+class CircuitBreakerTest(unittest.TestCase):
+	def setUp(self):
+		self.breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=60.0)
+		self.now = 1000.0
+		patcher = mock.patch.object(resilience.time, 'monotonic', lambda: self.now)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def fail(self, error):
+		with self.assertRaises(type(error)):
+			self.breaker.call(Flaky(error))
+
+	def open(self):
+		self.fail(http_error(503))
+		self.fail(http_error(503))
+		self.assertEqual(self.breaker.state, 'open')
+
+	def test_opens_after_consecutive_transient_failures(self):
+		self.fail(http_error(503))
+		self.assertEqual(self.breaker.state, 'closed')
+		self.fail(http_error(503))
+		self.assertEqual(self.breaker.state, 'open')
+
+		fn = Flaky()
+		with self.assertRaises(CircuitOpenError):
+			self.breaker.call(fn)
+		self.assertEqual(fn.calls, 0)
+
+	def test_non_transient_failure_does_not_reset_the_count(self):
+		self.fail(http_error(503))
+		self.fail(ValueError('bad input'))
+		self.fail(http_error(503))
+		self.assertEqual(self.breaker.state, 'open')
+
+	def test_half_open_trial_success_closes(self):
+		self.open()
+		self.now += 60
+		self.assertEqual(self.breaker.state, 'half-open')
+		self.assertEqual(self.breaker.call(Flaky()), 'ok')
+		self.assertEqual(self.breaker.state, 'closed')
+
+	def test_half_open_trial_failure_opens_again(self):
+		self.open()
+		self.now += 60
+		self.fail(http_error(503))
+		self.assertEqual(self.breaker.state, 'open')
+
+	def test_half_open_non_transient_failure_keeps_it_half_open(self):
+		self.open()
+		self.now += 60
+		self.fail(ValueError('bad input'))
+		self.assertEqual(self.breaker.state, 'half-open')
+		# The trial slot was released, so the next call is let through as a new trial.
+		self.assertEqual(self.breaker.call(Flaky()), 'ok')
+		self.assertEqual(self.breaker.state, 'closed')
+
+	def test_only_one_trial_at_a_time(self):
+		self.open()
+		self.now += 60
+		self.breaker.before_call()
+		with self.assertRaises(CircuitOpenError):
+			self.breaker.before_call()
+
+	def test_async_call_releases_trial_on_non_transient_failure(self):
+		self.open()
+		self.now += 60
+
+		async def fail():
+			raise ValueError('bad input')
+
+		with self.assertRaises(ValueError):
+			asyncio.run(self.breaker.call_async(fail))
+		self.assertEqual(self.breaker.state, 'half-open')
+
+
+class RetryTest(unittest.TestCase):
+	def setUp(self):
+		patcher = mock.patch.object(resilience.time, 'sleep')
+		self.sleep = patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def test_transient_errors_are_retried(self):
+		fn = Flaky(http_error(503), requests.ConnectionError())
+		self.assertEqual(call_with_retries(fn, 'test', attempts=3, base_delay=0.0), 'ok')
+		self.assertEqual(fn.calls, 3)
+
+	def test_gives_up_after_attempts(self):
+		fn = Flaky(*(http_error(503) for _ in range(3)))
+		with self.assertRaises(requests.HTTPError):
+			call_with_retries(fn, 'test', attempts=3, base_delay=0.0)
+		self.assertEqual(fn.calls, 3)
+
+	def test_malformed_body_is_not_retried(self):
+		fn = Flaky(requests.exceptions.JSONDecodeError('Expecting value', 'oops', 0))
+		with self.assertRaises(ValueError):
+			call_with_retries(fn, 'test', base_delay=0.0)
+		self.assertEqual(fn.calls, 1)
+
+	def test_waits_out_retry_after(self):
+		fn = Flaky(http_error(429, {'Retry-After': '3'}))
+		call_with_retries(fn, 'test', base_delay=0.0)
+		self.sleep.assert_called_once_with(3.0)
+
+	def test_deadline_stops_retries(self):
+		fn = Flaky(http_error(429, {'Retry-After': '30'}))
+		with self.assertRaises(requests.HTTPError):
+			call_with_retries(fn, 'test', base_delay=0.0, deadline=10.0)
+		self.sleep.assert_not_called()
+
+	def test_open_breaker_ends_retries(self):
+		breaker = CircuitBreaker('test', failure_threshold=1)
+		fn = Flaky(http_error(503), http_error(503))
+		with self.assertRaises(CircuitOpenError):
+			call_with_retries(fn, 'test', base_delay=0.0, breaker=breaker)
+		self.assertEqual(fn.calls, 1)
+
+	def test_async_retries_each_attempt(self):
+		fn = Flaky(http_error(503), TimeoutError())
+
+		async def attempt():
+			return fn()
+
+		self.assertEqual(asyncio.run(call_with_retries_async(attempt, 'test', base_delay=0.0)), 'ok')
+		self.assertEqual(fn.calls, 3)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,129 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tg_vibe_check.core.batch import MessageBatch
+from tg_vibe_check.core.store import MessageStore
+from tg_vibe_check.integrations import rapidapi
+
+
+def message(id_):
+	return {'id': str(id_), 'date': '2025-06-27T09:30:00+0000', 'text': f'message {id_}', 'views': '10'}
+
+
+class FakeChannel:
+	"""Stands in for `iter_tg_message_pages`; messages are posted with increasing ids."""
+
+	def __init__(self, count=0):
+		self.top = 0
+		self.requests = 0
+		self.post(count)
+
+	def post(self, count):
+		self.top += count
+
+	def __call__(self, channel, pages, page_size=rapidapi.PAGE_SIZE, max_id=rapidapi.MAX_MESSAGE_ID, **kwargs):
+		until_id = kwargs.get('until_id')
+		max_id = min(max_id, self.top)
+		while pages > 0 and max_id > 0:
+			self.requests += 1
+			page = MessageBatch.from_messages([message(i) for i in range(max_id, max(0, max_id - page_size), -1)])
+			yield page
+			pages -= 1
+			max_id = page.next_max_id()
+			if until_id is not None and max_id <= until_id:
+				return
+
+
+class MessageStoreTest(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+		self.store = MessageStore(str(Path(self.tmp.name) / 'messages.db'))
+		self.addCleanup(self.store.close)
+
+	def test_empty_store_has_no_watermarks(self):
+		self.assertIsNone(self.store.high_water_mark('chan'))
+		self.assertIsNone(self.store.low_water_mark('chan'))
+		self.assertEqual(len(self.store.get_messages('chan', 10)), 0)
+
+	def test_watermarks_and_newest_first_window(self):
+		self.store.add_messages('chan', [message(i) for i in (5, 9, 7)])
+		self.store.add_messages('other', [message(100)])
+		self.assertEqual(self.store.high_water_mark('chan'), 9)
+		self.assertEqual(self.store.low_water_mark('chan'), 5)
+		self.assertEqual(self.store.get_messages('chan', 2).ids.tolist(), [9, 7])
+
+	def test_adding_again_refreshes_text_and_views(self):
+		self.store.add_messages('chan', [message(1)])
+		self.store.add_messages('chan', [{**message(1), 'text': 'edited', 'views': '99'}])
+		self.assertEqual(self.store.count('chan'), 1)
+		(msg,) = self.store.get_messages('chan', 10).to_messages()
+		self.assertEqual((msg['text'], msg['views']), ('edited', '99'))
+
+	def test_window_stops_at_newest_gap(self):
+		self.store.add_messages('chan', [message(i) for i in (1, 2, 3, 10, 11)])
+		self.store.add_gap('chan', 10)
+		self.assertEqual(self.store.contiguous_from('chan'), 10)
+		self.assertEqual(self.store.get_messages('chan', 10).ids.tolist(), [11, 10])
+		self.assertEqual(self.store.high_water_mark_below('chan', 10), 3)
+
+		self.store.close_gap('chan', 10)
+		self.assertIsNone(self.store.contiguous_from('chan'))
+		self.assertEqual(self.store.get_messages('chan', 10).ids.tolist(), [11, 10, 3, 2, 1])
+
+
+class IncrementalFetchTest(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+		self.store = MessageStore(str(Path(self.tmp.name) / 'messages.db'))
+		self.addCleanup(self.store.close)
+		self.channel = FakeChannel(1000)
+		patcher = mock.patch.object(rapidapi, 'iter_tg_message_pages', self.channel)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def fetch(self, **kwargs):
+		return rapidapi.get_tg_messages_incremental('chan', self.store, 2, limiter=None, **kwargs).ids.tolist()
+
+	def test_first_fetch_fills_the_window(self):
+		self.assertEqual(self.fetch(), list(range(1000, 900, -1)))
+
+	def test_later_fetch_only_requests_new_messages(self):
+		self.fetch()
+		self.channel.post(30)
+		requests = self.channel.requests
+		self.assertEqual(self.fetch(), list(range(1030, 930, -1)))
+		self.assertEqual(self.channel.requests - requests, 1)
+
+	def test_catch_up_past_the_window_keeps_the_store_contiguous(self):
+		self.fetch()
+		self.channel.post(180)
+		self.assertEqual(self.fetch(), list(range(1180, 1080, -1)))
+		self.assertIsNone(self.store.contiguous_from('chan'))
+		self.assertEqual(self.store.count('chan'), 280)
+
+	def test_catch_up_beyond_the_cap_records_a_gap_and_keeps_older_history(self):
+		self.fetch()
+		self.store.add_messages('chan', [message(i) for i in range(900, 800, -1)])  # e.g. from a backfill
+		self.channel.post(500)
+
+		with self.assertLogs(rapidapi.logger, 'WARNING'):
+			self.assertEqual(self.fetch(max_catchup_pages=2), list(range(1500, 1400, -1)))
+		self.assertEqual(self.store.contiguous_from('chan'), 1401)
+		self.assertEqual(self.store.count('chan'), 300)
+		self.assertEqual(self.store.low_water_mark('chan'), 801)
+
+	def test_short_window_above_a_gap_fills_it(self):
+		self.store.add_messages('chan', [message(i) for i in range(1000, 980, -1)])
+		self.store.add_messages('chan', [message(i) for i in range(950, 900, -1)])
+		self.store.add_gap('chan', 981)
+
+		self.assertEqual(self.fetch(), list(range(1000, 900, -1)))
+		self.assertIsNone(self.store.contiguous_from('chan'))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,5 @@
+import sys
+
+from tg_vibe_check.cli import main
+
+sys.exit(main())
@@ -0,0 +1,302 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+import numpy as np
+import requests
+
+from tg_vibe_check.config import export_secrets_to_env
+from tg_vibe_check.core.batch import MISSING
+from tg_vibe_check.core.batch import MessageBatch
+from tg_vibe_check.core.batch import format_dates
+from tg_vibe_check.core.store import MessageStore
+from tg_vibe_check.core.store import get_data_dir
+from tg_vibe_check.core.store import get_message_store
+from tg_vibe_check.integrations.rapidapi import MAX_MESSAGE_ID
+from tg_vibe_check.integrations.rapidapi import iter_tg_message_pages
+from tg_vibe_check.integrations.rapidapi import rate_limiter
+from tg_vibe_check.integrations.ratelimit import BACKGROUND
+from tg_vibe_check.integrations.ratelimit import INTERACTIVE
+from tg_vibe_check.integrations.ratelimit import Limiter
+from tg_vibe_check.telemetry import configure_json_logging
+
+logger = logging.getLogger(__name__)
+
+# Called after every page with the progress of the backfill (see `backfill_pages`).
+ProgressCallback = Callable[[Dict], None]
+
+
+def default_checkpoint_path(channel: str) -> Path:
+	return get_data_dir() / 'backfill' / f'{channel}.json'
+
+
+def load_checkpoint(path: Optional[Path]) -> Optional[Dict]:
+	"""State saved by an earlier run of `backfill_pages`, or None."""
+	if path is None or not Path(path).is_file():
+		return None
+	with open(path) as f:
+		return json.load(f)
+
+
+def _save_checkpoint(path: Path, state: Dict) -> None:
+	# Written aside and renamed, so an interruption never leaves a torn checkpoint behind.
+	path = Path(path)
+	path.parent.mkdir(parents=True, exist_ok=True)
+	tmp = path.with_name(f'{path.name}.tmp')
+	with open(tmp, 'w') as f:
+		json.dump(state, f)
+	os.replace(tmp, path)
+
+
+def _reached(state: Dict, max_messages: Optional[int]) -> bool:
+	if state['exhausted']:
+		return True
+	return max_messages is not None and state['messages'] >= max_messages
+
+
+def _progress(state: Dict, fetched: int, started: float) -> Dict:
+	elapsed = time.monotonic() - started
+	oldest = state['oldest_date']
+	return {
+		'channel': state['channel'],
+		'pages': state['pages'],
+		'messages': state['messages'],
+		'oldest_date': format_dates(np.array([oldest]))[0] if oldest is not None else None,
+		'exhausted': state['exhausted'],
+		'seconds': elapsed,
+		'messages_per_second': fetched / elapsed if elapsed > 0 else 0.0,
+	}
+
+
+def backfill_pages(
+	channel: str,
+	until: Optional[datetime] = None,
+	max_messages: Optional[int] = None,
+	checkpoint: Optional[Path] = None,
+	max_id: int = MAX_MESSAGE_ID,
+	session: Optional[requests.Session] = None,
+	limiter: Optional[Limiter] = None,
+	progress: Optional[ProgressCallback] = None,
+) -> Iterator[MessageBatch]:
+	"""Walk a channel's history back page by page, newest first, until `until` or `max_messages` messages.
+
+	Only the current page and the prefetched next one are held, so the depth is bounded by the consumer, not by
+	memory. The checkpoint is saved once the consumer asks for the next page, i.e. after it has handled the last
+	one; a run interrupted at any point resumes from it, re-fetching at most the page in hand. `max_messages` counts
+	every message yielded under the checkpoint, across resumes, and a resumed run may ask for more or go further back.
+	Without a checkpoint, paging starts below `max_id`. Requests queue for the shared RapidAPI quota at background
+	priority unless another `limiter` is given. Stopping at `until` costs one request past it, as the next page is
+	already in flight, and a resumed run learns that `until` was reached by fetching the page below the checkpoint.
+	"""
+
+	until = None if until is None else int(until.replace(tzinfo=until.tzinfo or timezone.utc).timestamp())
+	limiter = limiter or rate_limiter.with_priority(BACKGROUND)
+	state = load_checkpoint(checkpoint) or {
+		'channel': channel,
+		'max_id': max_id,
+		'pages': 0,
+		'messages': 0,
+		'oldest_date': None,
+		'exhausted': False,
+	}
+	if state['channel'] != channel:
+		raise ValueError(f'Checkpoint {checkpoint} belongs to {state["channel"]}, not {channel}')
+	if _reached(state, max_messages):
+		return
+
+	started = time.monotonic()
+	fetched = 0
+	for page in iter_tg_message_pages(channel, sys.maxsize, max_id=state['max_id'], session=session, limiter=limiter):
+		full_page = len(page)
+		next_max_id = page.next_max_id()
+
+		past_until = False
+		if until is not None:
+			older = np.flatnonzero((page.dates < until) & (page.dates != MISSING))
+			if len(older):
+				page = page[: older[0]]
+				past_until = True
+		if max_messages is not None:
+			page = page[: max_messages - state['messages']]
+		if len(page):
+			yield page
+
+		# A page cut short by a target only counts as done down to its last yielded message, so a later run with a
+		# deeper target picks up the messages that were cut.
+		if len(page) == full_page:
+			state['max_id'] = next_max_id
+		elif len(page):
+			state['max_id'] = int(page.ids.min()) - 1
+		state['pages'] += 1
+		state['messages'] += len(page)
+		dates = page.dates[page.dates != MISSING]
+		if len(dates):
+			oldest = int(dates.min())
+			state['oldest_date'] = oldest if state['oldest_date'] is None else min(state['oldest_date'], oldest)
+		fetched += len(page)
+		if checkpoint is not None:
+			_save_checkpoint(checkpoint, state)
+		if progress is not None:
+			progress(_progress(state, fetched, started))
+		if past_until or _reached(state, max_messages):
+			return
+
+	# Paging only ends on its own at an empty page: the start of the channel.
+	state['exhausted'] = True
+	if checkpoint is not None:
+		_save_checkpoint(checkpoint, state)
+	if progress is not None:
+		progress(_progress(state, fetched, started))
+
+
+def log_progress(progress: Dict) -> None:
+	logger.info(
+		'Backfilled %d messages of %s in %d pages, back to %s (%.1f messages/s)',
+		progress['messages'],
+		progress['channel'],
+		progress['pages'],
+		progress['oldest_date'] or 'n/a',
+		progress['messages_per_second'],
+	)
+
+
+def backfill_to_store(
+	channel: str,
+	store: MessageStore,
+	checkpoint: Optional[Path] = None,
+	progress: Optional[ProgressCallback] = log_progress,
+	**kwargs,
+) -> Optional[Dict]:
+	"""Backfill into the message store, continuing below the oldest stored message. Returns the final progress.
+
+	Storing is idempotent, so a page written again after an interruption is harmless.
+	"""
+	checkpoint = checkpoint or default_checkpoint_path(channel)
+	low_water_mark = store.low_water_mark(channel)
+	if low_water_mark is not None:
+		kwargs.setdefault('max_id', low_water_mark - 1)
+
+	last = []
+
+	def on_progress(numbers: Dict) -> None:
+		last[:] = [numbers]
+		if progress is not None:
+			progress(numbers)
+
+	for page in backfill_pages(channel, checkpoint=checkpoint, progress=on_progress, **kwargs):
+		store.add_messages(channel, page)
+	return last[0] if last else None
+
+
+def backfill_to_jsonl(
+	channel: str,
+	path: Path,
+	checkpoint: Optional[Path] = None,
+	progress: Optional[ProgressCallback] = log_progress,
+	**kwargs,
+) -> Optional[Dict]:
+	"""Backfill into a JSON lines file with one message per line, newest first. Returns the final progress.
+
+	On resume, lines of a page written after the last checkpoint (or cut off mid-write) are dropped before appending,
+	so the file never holds a message twice.
+	"""
+	path = Path(path)
+	checkpoint = checkpoint or path.with_name(f'{path.name}.checkpoint.json')
+	state = load_checkpoint(checkpoint)
+	if state is not None:
+		_truncate_after(path, state['max_id'])
+	elif path.is_file() and path.stat().st_size:
+		raise ValueError(f'{path} already has messages but no checkpoint at {checkpoint}')
+
+	last = []
+
+	def on_progress(numbers: Dict) -> None:
+		last[:] = [numbers]
+		if progress is not None:
+			progress(numbers)
+
+	with open(path, 'a', encoding='utf-8') as f:
+		for page in backfill_pages(channel, checkpoint=checkpoint, progress=on_progress, **kwargs):
+			f.write(''.join(json.dumps(msg, ensure_ascii=False) + '\n' for msg in page.to_messages()))
+			# On disk before the checkpoint moves past this page.
+			f.flush()
+			os.fsync(f.fileno())
+	return last[0] if last else None
+
+
+def _truncate_after(path: Path, max_id: int) -> None:
+	"""Cut the file at its first line with an id at or below `max_id`, i.e. not yet covered by the checkpoint."""
+	if not path.is_file():
+		return
+	offset = 0
+	with open(path, 'rb') as f:
+		for line in f:
+			try:
+				if not line.endswith(b'\n') or int(json.loads(line)['id']) <= max_id:
+					break
+			except (ValueError, KeyError):
+				break
+			offset += len(line)
+	if offset < path.stat().st_size:
+		logger.info('Dropping %d bytes of %s written after the last checkpoint', path.stat().st_size - offset, path)
+		os.truncate(path, offset)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+	parser = argparse.ArgumentParser(description='Fetch the deep history of a channel, resumably.')
+	parser.add_argument('channel')
+	parser.add_argument('--until', type=datetime.fromisoformat, help='stop at messages older than this date (UTC)')
+	parser.add_argument('--messages', type=int, help='stop after this many messages')
+	parser.add_argument('-o', '--output', help='append JSON lines to this file instead of the message store')
+	parser.add_argument('--checkpoint', help='checkpoint file (default: next to the output, or in the data dir)')
+	parser.add_argument('--restart', action='store_true', help='discard the checkpoint and start over')
+	parser.add_argument('--interactive', action='store_true', help="don't queue behind other RapidAPI requests")
+	parser.add_argument('--json-logs', action='store_true', help='log JSON lines instead of plain text')
+	args = parser.parse_args(argv)
+	if args.until is None and args.messages is None:
+		parser.error('give --until, --messages or both')
+
+	if args.json_logs:
+		configure_json_logging()
+	else:
+		logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+	export_secrets_to_env()
+
+	channel = args.channel.lstrip('@')
+	kwargs = {
+		'until': args.until,
+		'max_messages': args.messages,
+		'limiter': rate_limiter.with_priority(INTERACTIVE if args.interactive else BACKGROUND),
+	}
+	checkpoint = Path(args.checkpoint) if args.checkpoint else None
+	if args.output:
+		checkpoint = checkpoint or Path(args.output).with_name(f'{Path(args.output).name}.checkpoint.json')
+		if args.restart:
+			checkpoint.unlink(missing_ok=True)
+			Path(args.output).unlink(missing_ok=True)
+		result = backfill_to_jsonl(channel, Path(args.output), checkpoint, **kwargs)
+	else:
+		checkpoint = checkpoint or default_checkpoint_path(channel)
+		if args.restart:
+			checkpoint.unlink(missing_ok=True)
+		result = backfill_to_store(channel, get_message_store(), checkpoint, **kwargs)
+
+	if result is None:
+		logger.info('Nothing to do for %s, the checkpoint already covers the target', channel)
+	else:
+		logger.info('Done: %s', json.dumps(result))
+
+
+if __name__ == '__main__':
+	main()
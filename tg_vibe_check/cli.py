@@ -0,0 +1,179 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import List
+from typing import Optional
+from typing import TextIO
+from urllib.parse import urlsplit
+
+from tg_vibe_check.config import export_secrets_to_env
+from tg_vibe_check.core.cache import get_result_cache
+from tg_vibe_check.core.cascade import CHEAP_MODEL
+from tg_vibe_check.core.cascade import cascade_stats
+from tg_vibe_check.core.lexicon import INSTANT_MODEL
+from tg_vibe_check.core.llm import DEFAULT_MODEL
+from tg_vibe_check.core.store import get_message_store
+from tg_vibe_check.core.store import get_report_store
+from tg_vibe_check.integrations.ratelimit import BACKGROUND
+from tg_vibe_check.integrations.ratelimit import INTERACTIVE
+from tg_vibe_check.pipeline import check_modes
+from tg_vibe_check.pipeline import save_result
+from tg_vibe_check.pipeline import scan_channels
+from tg_vibe_check.telemetry import configure_json_logging
+
+EXIT_OK = 0
+EXIT_FAILED = 1  # no channel succeeded
+EXIT_PARTIAL = 3  # some channels failed (2 is taken by argparse usage errors)
+
+EPILOG = f"""
+Channels come from the arguments, from --file, or from stdin (with "-" or when stdin is piped). Each finished channel
+is written as one JSON line. Exit status: {EXIT_OK} when every channel succeeded, {EXIT_PARTIAL} when some failed,
+{EXIT_FAILED} when all failed.
+
+Analysis modes: --instant and --incremental combine with none of --cascade, --chunked and --fast, nor with each
+other, and --chunked excludes --fast; --cascade works with --chunked or --fast.
+"""
+
+
+def read_channels(source: TextIO) -> List[str]:
+	"""Channel names, one per line, skipping blanks and `#` comments."""
+	channels = []
+	for line in source:
+		line = line.split('#', 1)[0].strip()
+		if line:
+			channels.append(line)
+	return channels
+
+
+def normalize_channel(channel: str) -> str:
+	"""Accept `@name` and t.me links (web previews, post links, query strings) as well as bare channel names."""
+	channel = channel.strip()
+	if channel.startswith(('t.me/', 'telegram.me/')):
+		channel = f'https://{channel}'
+	if '://' in channel:
+		segments = [segment for segment in urlsplit(channel).path.split('/') if segment]
+		# t.me/s/<name> is the web preview of a channel, t.me/<name>/<id> one of its posts.
+		if segments[:1] == ['s']:
+			segments = segments[1:]
+		channel = segments[0] if segments else ''
+	return channel.removeprefix('@')
+
+
+def positive_int(value: str) -> int:
+	number = int(value)
+	if number < 1:
+		raise argparse.ArgumentTypeError(f'must be at least 1, not {number}')
+	return number
+
+
+def parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+	parser = argparse.ArgumentParser(
+		prog='tg-vibe-check',
+		description='Run vibe checks on Telegram channels and write the reports as JSON lines.',
+		epilog=EPILOG,
+		formatter_class=argparse.RawDescriptionHelpFormatter,
+	)
+	parser.add_argument('channels', nargs='*', help='channel names, @names or t.me links; "-" reads stdin')
+	parser.add_argument('-f', '--file', action='append', default=[], help='file with one channel per line')
+	parser.add_argument('-j', '--jobs', type=positive_int, default=4, help='channels processed in parallel')
+	parser.add_argument('--llm-concurrency', type=positive_int, help='LLM calls in flight at once (default: --jobs)')
+	parser.add_argument('--batch-size', type=positive_int, default=4, help='history depth in pages of 50 messages')
+	parser.add_argument('--model', default=DEFAULT_MODEL)
+	parser.add_argument('--cascade', action='store_true', help='try --cheap-model first, escalate borderline reports')
+	parser.add_argument('--cheap-model', default=CHEAP_MODEL, help=f'"{INSTANT_MODEL}" for the local lexicon scorer')
+	parser.add_argument('--instant', action='store_true', help='score locally with the lexicons, without any LLM call')
+	parser.add_argument('--fallback', action='store_true', help='use the lexicon report when the LLM call fails')
+	parser.add_argument('--chunked', action='store_true', help='classify in parallel chunks, score locally')
+	parser.add_argument('--fast', action='store_true', help='have the model return compact labels only, score locally')
+	parser.add_argument('--incremental', action='store_true', help='only classify messages not seen before')
+	parser.add_argument('--background', action='store_true', help='queue RapidAPI requests behind interactive ones')
+	parser.add_argument('--hedge', action='store_true', help='resend LLM requests slower than their recent p95')
+	parser.add_argument('--no-cache', action='store_true', help="don't read or write the result cache")
+	parser.add_argument('--no-store', action='store_true', help='fetch the full history instead of the local store')
+	parser.add_argument('--save', action='store_true', help='also store reports for the app to serve')
+	parser.add_argument('-o', '--output', help='append JSON lines to this file instead of stdout')
+	parser.add_argument('-v', '--verbose', action='store_true', help='log progress and stage timings to stderr')
+	parser.add_argument('--json-logs', action='store_true', help='log as JSON lines')
+	args = parser.parse_intermixed_args(argv)
+	try:
+		check_modes(
+			chunked=args.chunked,
+			fast=args.fast,
+			incremental=args.incremental,
+			cascade=args.cascade,
+			instant=args.instant,
+		)
+	except ValueError as e:
+		parser.error(str(e))
+	return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	args = parse_args(argv)
+
+	names = [channel for channel in args.channels if channel != '-']
+	for path in args.file:
+		with open(path) as f:
+			names += read_channels(f)
+	if '-' in args.channels or (not args.channels and not args.file and not sys.stdin.isatty()):
+		names += read_channels(sys.stdin)
+	channels = list(dict.fromkeys(channel for channel in map(normalize_channel, names) if channel))
+	if not channels:
+		print('tg-vibe-check: no channels given', file=sys.stderr)
+		return EXIT_FAILED
+
+	level = logging.INFO if args.verbose else logging.WARNING
+	if args.json_logs:
+		configure_json_logging(level)
+	else:
+		logging.basicConfig(level=level, format='%(asctime)s %(levelname)s %(message)s', stream=sys.stderr)
+	export_secrets_to_env()
+	if args.hedge:
+		os.environ['TG_VIBE_CHECK_HEDGE'] = '1'
+
+	run_kwargs = {
+		'batch_size': args.batch_size,
+		'model': args.model,
+		'chunked': args.chunked,
+		'fast': args.fast,
+		'incremental': args.incremental,
+		'cascade': args.cascade,
+		'cheap_model': args.cheap_model,
+		'instant': args.instant,
+		'fallback': args.fallback,
+		'priority': BACKGROUND if args.background else INTERACTIVE,
+		'cache': None if args.no_cache else get_result_cache(),
+		'store': None if args.no_store else get_message_store(),
+	}
+	output = open(args.output, 'a') if args.output else sys.stdout
+	failed = 0
+	try:
+		results = scan_channels(
+			channels, max_workers=args.jobs, llm_concurrency=args.llm_concurrency or args.jobs, **run_kwargs
+		)
+		for channel, result, error in results:
+			if error is not None:
+				failed += 1
+				line = {'channel': channel, 'ok': False, 'error': f'{type(error).__name__}: {error}'}
+			else:
+				if args.save:
+					save_result(get_report_store(), result)
+				line = {'ok': True, **result}
+			output.write(json.dumps(line, ensure_ascii=False) + '\n')
+			output.flush()
+	finally:
+		if output is not sys.stdout:
+			output.close()
+
+	if args.cascade:
+		print(json.dumps({'cascade': cascade_stats.stats()}), file=sys.stderr)
+
+	if failed == 0:
+		return EXIT_OK
+	return EXIT_FAILED if failed == len(channels) else EXIT_PARTIAL
+
+
+if __name__ == '__main__':
+	sys.exit(main())
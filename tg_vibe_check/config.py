@@ -0,0 +1,76 @@
+import os
+import threading
+import tomllib
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+# A secret provider maps a secret name to its value, or None if it doesn't have it.
+SecretProvider = Callable[[str], Optional[str]]
+
+# Where Streamlit looks for secrets.toml, read here without importing Streamlit.
+SECRETS_FILES = [Path.cwd() / '.streamlit' / 'secrets.toml', Path.home() / '.streamlit' / 'secrets.toml']
+
+
+def env_provider(name: str) -> Optional[str]:
+	return os.getenv(name) or None
+
+
+class TomlFileProvider:
+	"""Provider reading top-level keys of TOML files, parsed on first use; earlier files take precedence."""
+
+	def __init__(self, *paths: Path):
+		self.paths = paths
+		self._values = None
+		self._lock = threading.Lock()
+
+	def values(self) -> Dict:
+		with self._lock:
+			if self._values is None:
+				self._values = {}
+				for path in reversed(self.paths):
+					if path.is_file():
+						with open(path, 'rb') as f:
+							self._values.update(tomllib.load(f))
+			return self._values
+
+	def __call__(self, name: str) -> Optional[str]:
+		value = self.values().get(name)
+		return str(value) if value is not None else None
+
+
+secrets_file_provider = TomlFileProvider(*SECRETS_FILES)
+
+# secrets.toml first, then the environment, as when the keys were read through `st.secrets`.
+_providers: List[SecretProvider] = [secrets_file_provider, env_provider]
+
+
+def register_secret_provider(provider: SecretProvider, first: bool = True) -> None:
+	"""Add a provider, e.g. a vault client or `st.secrets`, consulted before (or after) the built-in ones."""
+	if first:
+		_providers.insert(0, provider)
+	else:
+		_providers.append(provider)
+
+
+def get_secret(name: str, default: Optional[str] = None) -> str:
+	"""Look `name` up in each provider in turn. Raises ValueError if none has it and there is no default."""
+	for provider in _providers:
+		value = provider(name)
+		if value is not None:
+			return value
+	if default is not None:
+		return default
+	raise ValueError(f'{name} not found in secrets.toml or environment variables')
+
+
+def export_secrets_to_env() -> None:
+	"""Copy top-level string values of secrets.toml into the environment without overriding it, as Streamlit does.
+
+	Lets libraries that read keys from the environment (e.g. litellm and ANTHROPIC_API_KEY) find them outside the app.
+	"""
+	for name, value in secrets_file_provider.values().items():
+		if isinstance(value, str):
+			os.environ.setdefault(name, value)
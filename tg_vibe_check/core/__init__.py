@@ -1 +1 @@
-"""Core analysis functionality."""
\ No newline at end of file
+"""Core analysis functionality."""
@@ -0,0 +1,210 @@
+import sys
+import threading
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+
+# Dates are kept as epoch seconds and rendered back in the format RapidAPI sends them in.
+DATE_SUFFIX = '+0000'
+MISSING = -1
+
+
+def parse_date(value: Optional[str]) -> int:
+	"""Epoch seconds of an ISO 8601 date like '2025-06-27T09:31:10+0000', or MISSING."""
+	try:
+		return int(datetime.fromisoformat(value).timestamp())
+	except (TypeError, ValueError):
+		return MISSING
+
+
+def parse_views(value) -> int:
+	"""View count from '1234', '1.2K' or '3M' style values, or MISSING when empty or unparseable."""
+	if isinstance(value, int):
+		return value
+	value = str(value or '').strip().upper()
+	scale = {'K': 1_000, 'M': 1_000_000}.get(value[-1:], 1)
+	try:
+		return round(float(value[:-1] if scale > 1 else value) * scale)
+	except ValueError:
+		return MISSING
+
+
+class TextPool:
+	"""Process-wide store of message texts, so identical texts across pages, windows and channels are one object.
+
+	Unlike `sys.intern`, whose strings are never freed on Python 3.12, the pool is bounded: once it holds
+	`max_entries` texts it starts over, so texts no batch references any more can be freed.
+	"""
+
+	def __init__(self, max_entries: int = 200_000):
+		self.max_entries = max_entries
+		self._texts = {}
+		self._lock = threading.Lock()
+
+	def intern(self, texts: Iterable[Optional[str]]) -> List[str]:
+		with self._lock:
+			if len(self._texts) >= self.max_entries:
+				self._texts = {}
+			setdefault = self._texts.setdefault
+			return [setdefault(text, text) if text else '' for text in texts]
+
+
+text_pool = TextPool()
+
+
+def format_dates(dates: np.ndarray) -> List[str]:
+	"""Render epoch seconds as RapidAPI date strings, '' for MISSING."""
+	rendered = np.datetime_as_string(dates.astype('datetime64[s]'), unit='s').tolist()
+	return [f'{text}{DATE_SUFFIX}' if date != MISSING else '' for text, date in zip(rendered, dates.tolist())]
+
+
+class MessageBatch(Sequence):
+	"""Columnar batch of messages: ids, dates (epoch seconds), views and duplicate counts as integer arrays, and
+	texts from the shared `text_pool`.
+
+	Identical texts (reposts, bot spam, the same message in several fetched windows) share one string object.
+	Slicing returns a batch that views the same arrays without copying. Concatenating pages copies only the fixed
+	width columns, the strings themselves are shared. For code written against the list-of-dicts shape, items are
+	plain message dicts like `get_tg_messages` always returned, built on access.
+	"""
+
+	__slots__ = ('ids', 'dates', 'views', 'texts', 'counts')
+
+	def __init__(
+		self,
+		ids: np.ndarray,
+		dates: np.ndarray,
+		views: np.ndarray,
+		texts: np.ndarray,
+		counts: Optional[np.ndarray] = None,
+	):
+		self.ids = ids
+		self.dates = dates
+		self.views = views
+		self.texts = texts
+		self.counts = counts if counts is not None else np.ones(len(ids), dtype=np.int32)
+
+	@classmethod
+	def empty(cls) -> 'MessageBatch':
+		return cls.from_rows([])
+
+	@classmethod
+	def from_messages(cls, messages: Iterable[Dict]) -> 'MessageBatch':
+		"""Build a batch from message dicts (RapidAPI pages or earlier list-based code); batches pass through."""
+		if isinstance(messages, MessageBatch):
+			return messages
+		messages = list(messages)
+		n = len(messages)
+		return cls(
+			np.fromiter((int(msg['id']) for msg in messages), dtype=np.int64, count=n),
+			np.fromiter((parse_date(msg['date']) for msg in messages), dtype=np.int64, count=n),
+			np.fromiter((parse_views(msg.get('views')) for msg in messages), dtype=np.int64, count=n),
+			_text_column([msg['text'] for msg in messages]),
+			np.fromiter((msg.get('count', 1) for msg in messages), dtype=np.int32, count=n),
+		)
+
+	@classmethod
+	def from_rows(cls, rows: Iterable[Tuple[int, str, str, str]]) -> 'MessageBatch':
+		"""Build a batch from (id, date, text, views) tuples, e.g. SQLite rows."""
+		rows = list(rows)
+		ids, dates, texts, views = zip(*rows) if rows else ((), (), (), ())
+		return cls(
+			np.array(ids, dtype=np.int64),
+			np.fromiter(map(parse_date, dates), dtype=np.int64, count=len(dates)),
+			np.fromiter(map(parse_views, views), dtype=np.int64, count=len(views)),
+			_text_column(texts),
+		)
+
+	@classmethod
+	def concat(cls, batches: Iterable['MessageBatch']) -> 'MessageBatch':
+		batches = [batch for batch in batches if len(batch)]
+		if len(batches) == 1:
+			return batches[0]
+		if not batches:
+			return cls.empty()
+		return cls(*(np.concatenate([getattr(batch, column) for batch in batches]) for column in cls.__slots__))
+
+	def __len__(self) -> int:
+		return len(self.ids)
+
+	def __getitem__(self, index: Union[int, slice, np.ndarray, List[int]]) -> Union[Dict, 'MessageBatch']:
+		if isinstance(index, (int, np.integer)):
+			return self._message(int(index))
+		# Slices give views of the columns; index arrays and masks give copies.
+		return MessageBatch(*(getattr(self, column)[index] for column in self.__slots__))
+
+	def __iter__(self):
+		return iter(self.to_messages())
+
+	def __repr__(self) -> str:
+		return f'MessageBatch({len(self)} messages)'
+
+	def _message(self, i: int) -> Dict:
+		date = int(self.dates[i])
+		message = {
+			'id': str(self.ids[i]),
+			'date': format_dates(np.array([date]))[0],
+			'text': self.texts[i],
+			'views': _format_views(int(self.views[i])),
+		}
+		if self.counts[i] != 1:
+			message['count'] = int(self.counts[i])
+		return message
+
+	def with_counts(self, counts: np.ndarray) -> 'MessageBatch':
+		"""The same messages with new duplicate counts, sharing all other columns."""
+		return MessageBatch(self.ids, self.dates, self.views, self.texts, counts)
+
+	def next_max_id(self) -> int:
+		"""`max_id` for the page below this one."""
+		return int(self.ids.min()) - 1
+
+	def to_messages(self) -> List[Dict]:
+		"""The messages as dicts, in the shape `get_tg_messages` returns (plus `count` for collapsed duplicates)."""
+		return [
+			{
+				'id': str(id_),
+				'date': date,
+				'text': text,
+				'views': _format_views(views),
+				**({'count': count} if count != 1 else {}),
+			}
+			for id_, date, text, views, count in zip(
+				self.ids.tolist(),
+				format_dates(self.dates),
+				self.texts.tolist(),
+				self.views.tolist(),
+				self.counts.tolist(),
+			)
+		]
+
+	def to_prompt_records(self) -> List[Dict]:
+		"""The fields the model sees, like `to_prompt_record` for each message."""
+		return [
+			{'date': date, 'text': text, **({'count': count} if count > 1 else {})}
+			for date, text, count in zip(format_dates(self.dates), self.texts.tolist(), self.counts.tolist())
+		]
+
+	@property
+	def nbytes(self) -> int:
+		"""Memory held by the columns and the distinct strings they reference."""
+		strings = {id(text): text for text in self.texts.tolist()}
+		columns = sum(getattr(self, column).nbytes for column in self.__slots__)
+		return columns + sum(sys.getsizeof(text) for text in strings.values())
+
+
+def _text_column(texts: Sequence) -> np.ndarray:
+	column = np.empty(len(texts), dtype=object)
+	column[:] = text_pool.intern(texts)
+	return column
+
+
+def _format_views(views: int) -> str:
+	return '' if views == MISSING else str(views)
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Optional
+
+from tg_vibe_check.core.store import get_data_dir
+
+
+def make_cache_key(
+	messages: List[Dict[str, str]], model: str, temperature: float, prompt_version: str, **extra: str
+) -> str:
+	"""Content hash of everything that determines an analysis result.
+
+	Messages are reduced to the fields the model sees and sorted, so the same batch fetched in a different order
+	(or with different view counts) maps to the same key.
+	"""
+	normalized = sorted((msg['date'], ' '.join((msg['text'] or '').split()), msg.get('count', 1)) for msg in messages)
+	payload = {
+		'messages': normalized,
+		'model': model,
+		'temperature': temperature,
+		'prompt_version': prompt_version,
+		**extra,
+	}
+	return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+class ResultCache:
+	"""Disk-backed JSON result cache with TTL expiry and size-bounded LRU eviction."""
+
+	def __init__(self, path: Optional[str] = None, ttl: Optional[float] = 3600.0, max_entries: int = 1000):
+		self.path = str(path or get_data_dir() / 'results.db')
+		Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+		self.ttl = ttl
+		self.max_entries = max_entries
+		self.hits = 0
+		self.misses = 0
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(self.path, check_same_thread=False)
+		self._conn.execute('PRAGMA journal_mode=WAL')
+		self._conn.execute(
+			"""
+			CREATE TABLE IF NOT EXISTS results (
+				key TEXT PRIMARY KEY,
+				value TEXT NOT NULL,
+				created_at REAL NOT NULL,
+				accessed_at REAL NOT NULL
+			)
+			"""
+		)
+		self._conn.execute('CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)')
+		self._conn.commit()
+
+	def get(self, key: str) -> Optional[Dict]:
+		"""Get a cached result, or None if it is missing or expired."""
+		now = time.time()
+		with self._lock, self._conn:
+			row = self._conn.execute('SELECT value, created_at FROM results WHERE key = ?', (key,)).fetchone()
+			if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+				self._conn.execute('DELETE FROM results WHERE key = ?', (key,))
+				row = None
+
+			if row is None:
+				self.misses += 1
+				return None
+
+			self._conn.execute('UPDATE results SET accessed_at = ? WHERE key = ?', (now, key))
+			self.hits += 1
+			return json.loads(row[0])
+
+	def set(self, key: str, value: Dict) -> None:
+		"""Store a result, evicting the least recently used entries beyond `max_entries`."""
+		now = time.time()
+		with self._lock, self._conn:
+			self._conn.execute(
+				'INSERT OR REPLACE INTO results (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)',
+				(key, json.dumps(value, ensure_ascii=False), now, now),
+			)
+			self._conn.execute(
+				"""
+				DELETE FROM results WHERE key IN (
+					SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+				)
+				""",
+				(self.max_entries,),
+			)
+
+	def clear(self) -> None:
+		with self._lock, self._conn:
+			self._conn.execute('DELETE FROM results')
+
+	def stats(self) -> Dict[str, float]:
+		"""Hit/miss counters for this process plus the number of entries on disk."""
+		with self._lock:
+			entries = self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+		lookups = self.hits + self.misses
+		return {
+			'hits': self.hits,
+			'misses': self.misses,
+			'hit_rate': self.hits / lookups if lookups else 0.0,
+			'entries': entries,
+		}
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+	"""Get the process-wide analysis result cache at the default location."""
+	global _default_cache
+	with _default_cache_lock:
+		if _default_cache is None:
+			_default_cache = ResultCache()
+		return _default_cache
+
+
+class _Flight:
+	"""One in-progress computation that other callers can wait on."""
+
+	def __init__(self):
+		self.done = threading.Event()
+		self.value = None
+		self.error = None
+
+
+class SingleFlightCache:
+	"""In-memory TTL cache where concurrent misses for the same key share a single computation.
+
+	The first caller for a missing key computes the value; callers arriving while it runs block until it finishes and
+	get the same value (or exception) instead of starting their own. Meant to be shared by all sessions of a server.
+	"""
+
+	def __init__(self, ttl: float = 300.0, max_entries: int = 256):
+		self.ttl = ttl
+		self.max_entries = max_entries
+		self.hits = 0
+		self.misses = 0
+		self.shared = 0
+		self._entries = OrderedDict()  # key -> (expires_at, value), least recently used first
+		self._flights = {}
+		self._lock = threading.Lock()
+
+	def get_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+		"""Return the cached value for `key`, computing it with `compute()` at most once across concurrent callers."""
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None and entry[0] > time.monotonic():
+				self._entries.move_to_end(key)
+				self.hits += 1
+				return entry[1]
+
+			flight = self._flights.get(key)
+			leader = flight is None
+			if leader:
+				flight = self._flights[key] = _Flight()
+				self.misses += 1
+			else:
+				self.shared += 1
+
+		if not leader:
+			flight.done.wait()
+			if flight.error is not None:
+				raise flight.error
+			return flight.value
+
+		try:
+			flight.value = compute()
+		except BaseException as e:
+			flight.error = e
+			raise
+		else:
+			self._store(key, flight.value, self.ttl if ttl is None else ttl)
+			return flight.value
+		finally:
+			with self._lock:
+				del self._flights[key]
+			flight.done.set()
+
+	def _store(self, key: Hashable, value: Any, ttl: float) -> None:
+		now = time.monotonic()
+		with self._lock:
+			self._entries[key] = (now + ttl, value)
+			self._entries.move_to_end(key)
+			for expired in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+				del self._entries[expired]
+			while len(self._entries) > self.max_entries:
+				self._entries.popitem(last=False)
+
+	def invalidate(self, key: Hashable) -> None:
+		"""Drop the cached value for `key`; a computation already in flight is still shared, as it's fresh anyway."""
+		with self._lock:
+			self._entries.pop(key, None)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+
+	def stats(self) -> Dict:
+		"""Counters for this cache, the number of live entries and the keys currently being computed."""
+		now = time.monotonic()
+		with self._lock:
+			entries = sum(1 for expires_at, _ in self._entries.values() if expires_at > now)
+			in_flight = list(self._flights)
+		lookups = self.hits + self.misses + self.shared
+		return {
+			'hits': self.hits,
+			'misses': self.misses,
+			'shared': self.shared,
+			'hit_rate': (self.hits + self.shared) / lookups if lookups else 0.0,
+			'entries': entries,
+			'in_flight': in_flight,
+		}
@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from tg_vibe_check.core.cache import ResultCache
+from tg_vibe_check.core.lexicon import INSTANT_MODEL
+from tg_vibe_check.core.lexicon import analyze_tg_vibe_instant
+from tg_vibe_check.core.llm import DEFAULT_MODEL
+from tg_vibe_check.core.llm import analyze_tg_vibe
+from tg_vibe_check.core.metrics import METRIC_SPECS
+
+logger = logging.getLogger(__name__)
+
+CHEAP_MODEL = 'anthropic/claude-3-5-haiku-20241022'
+
+# Scores within this distance of a good/bad threshold could change grade on a slightly different reading.
+THRESHOLD_MARGIN = 0.05
+
+
+def validate_report(report: Dict) -> List[str]:
+	"""Problems that make a report unusable: missing metrics or scores outside their range."""
+	problems = []
+	for spec in METRIC_SPECS:
+		metric = report.get(spec['section'], {}).get(spec['key'])
+		if not isinstance(metric, dict):
+			problems.append(f'{spec["key"]}: missing')
+			continue
+		score = metric.get('score')
+		if not isinstance(score, (int, float)) or isinstance(score, bool):
+			problems.append(f'{spec["key"]}: score is not a number')
+		elif score < 0 or (not spec.get('is_integer') and score > 1):
+			problems.append(f'{spec["key"]}: score {score} out of range')
+	return problems
+
+
+def borderline_metrics(report: Dict, margin: float = THRESHOLD_MARGIN, exclude: Sequence[str] = ()) -> List[str]:
+	"""Keys of metrics whose score sits near the good/bad thresholds used to grade them on the dashboard."""
+	borderline = []
+	for spec in METRIC_SPECS:
+		if spec['key'] in exclude:
+			continue
+		score = report[spec['section']][spec['key']]['score']
+		if spec.get('is_integer'):
+			# Counts have no "near": only a count right at the bad threshold hinges on a single message.
+			near = score == spec['bad_threshold'] and spec['bad_threshold'] != spec['good_threshold']
+		else:
+			near = any(abs(score - spec[threshold]) <= margin for threshold in ('good_threshold', 'bad_threshold'))
+		if near:
+			borderline.append(spec['key'])
+	return borderline
+
+
+class CascadeStats:
+	"""Thread-safe escalation counters and latency of the cheap and expensive stages."""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self.runs = 0
+		self.escalated = 0
+		self.invalid = 0
+		self.cheap_seconds = 0.0
+		self.expensive_seconds = 0.0
+		self._settled_cheap_seconds = 0.0
+
+	def record(self, escalated: bool, invalid: bool, cheap_seconds: float, expensive_seconds: float) -> None:
+		with self._lock:
+			self.runs += 1
+			self.escalated += escalated
+			self.invalid += invalid
+			self.cheap_seconds += cheap_seconds
+			self.expensive_seconds += expensive_seconds
+			if not escalated:
+				self._settled_cheap_seconds += cheap_seconds
+
+	def stats(self) -> Dict[str, float]:
+		"""Escalation rate and the latency saved by reports the cheap model settled on its own.
+
+		The saving assumes each settled report would have taken the mean latency of the escalated ones.
+		"""
+		with self._lock:
+			settled = self.runs - self.escalated
+			mean_expensive = self.expensive_seconds / self.escalated if self.escalated else 0.0
+			return {
+				'runs': self.runs,
+				'escalated': self.escalated,
+				'invalid': self.invalid,
+				'escalation_rate': self.escalated / self.runs if self.runs else 0.0,
+				'cheap_seconds': self.cheap_seconds,
+				'expensive_seconds': self.expensive_seconds,
+				'latency_saved_seconds': max(0.0, settled * mean_expensive - self._settled_cheap_seconds),
+			}
+
+
+cascade_stats = CascadeStats()
+
+
+def analyze_tg_vibe_cascade(
+	messages: List[Dict[str, str]],
+	cheap_model: str = CHEAP_MODEL,
+	model: str = DEFAULT_MODEL,
+	temperature: float = 0.1,
+	cache: Optional[ResultCache] = None,
+	chunked: bool = False,
+	fast: bool = False,
+	margin: float = THRESHOLD_MARGIN,
+	exclude: Sequence[str] = (),
+	stats: CascadeStats = cascade_stats,
+) -> Tuple[Dict, Dict]:
+	"""Analyze with `cheap_model` first and only escalate to `model` when its report can't be trusted as is.
+
+	Escalation happens when the cheap report fails validation (or the call fails) or when any metric not in
+	`exclude` is borderline, i.e. within `margin` of a grading threshold. Returns the report and a dict describing
+	the decision: the model that produced the report, whether it escalated and why. A `cheap_model` of INSTANT_MODEL
+	uses the local lexicon scorer as the first stage.
+	"""
+
+	started = time.perf_counter()
+	try:
+		if cheap_model == INSTANT_MODEL:
+			report = analyze_tg_vibe_instant(messages)
+		else:
+			report = analyze_tg_vibe(messages, cheap_model, temperature, cache=cache, chunked=chunked, fast=fast)
+		reasons = validate_report(report)
+		invalid = bool(reasons)
+		if not invalid:
+			reasons = [f'{key}: near threshold' for key in borderline_metrics(report, margin, exclude)]
+	except Exception as e:
+		logger.warning('Cheap model %s failed, escalating: %s', cheap_model, e)
+		reasons = [f'cheap model failed: {type(e).__name__}']
+		invalid = True
+	cheap_seconds = time.perf_counter() - started
+
+	started = time.perf_counter()
+	try:
+		if reasons:
+			logger.info('Escalating to %s: %s', model, ', '.join(reasons))
+			report = analyze_tg_vibe(messages, model, temperature, cache=cache, chunked=chunked, fast=fast)
+	finally:
+		# Recorded even when the escalated call fails, so failures stay in the escalation rate and latencies.
+		expensive_seconds = time.perf_counter() - started if reasons else 0.0
+		stats.record(bool(reasons), invalid, cheap_seconds, expensive_seconds)
+	decision = {'model': model if reasons else cheap_model, 'escalated': bool(reasons), 'reasons': reasons}
+	return report, decision
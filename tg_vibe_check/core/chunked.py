@@ -0,0 +1,140 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from typing import List
+
+from tg_vibe_check.core.completion import completion
+from tg_vibe_check.core.metrics import CATEGORIES
+from tg_vibe_check.core.metrics import build_report
+from tg_vibe_check.core.preprocess import to_prompt_record
+from tg_vibe_check.core.prompt import CLASSIFY_PROMPT_VERSION
+from tg_vibe_check.core.prompt import CLASSIFY_STATIC_PROMPT
+from tg_vibe_check.core.prompt_compiler import compile_prompt
+from tg_vibe_check.core.store import LabelStore
+from tg_vibe_check.core.tokens import estimate_tokens
+from tg_vibe_check.telemetry import record_llm_usage
+from tg_vibe_check.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+# JSON framing for the index and date of each message.
+MESSAGE_OVERHEAD_TOKENS = 12
+
+
+def chunk_messages(messages: List[Dict[str, str]], max_chunk_tokens: int) -> List[List[int]]:
+	"""Split message indices into consecutive chunks whose estimated size stays within `max_chunk_tokens`."""
+	chunks = []
+	current = []
+	current_tokens = 0
+	for i, msg in enumerate(messages):
+		tokens = estimate_tokens(msg['text'] or '') + MESSAGE_OVERHEAD_TOKENS
+		if current and current_tokens + tokens > max_chunk_tokens:
+			chunks.append(current)
+			current = []
+			current_tokens = 0
+		current.append(i)
+		current_tokens += tokens
+	if current:
+		chunks.append(current)
+	return chunks
+
+
+def classify_chunk(messages: List[Dict[str, str]], model: str, temperature: float) -> List[List[str]]:
+	"""Classify one chunk against the Master Classification List, returning the labels of each message."""
+	from bs4 import BeautifulSoup
+
+	llm_messages, _ = compile_prompt(
+		[{'i': i, **to_prompt_record(msg)} for i, msg in enumerate(messages)], static_prompt=CLASSIFY_STATIC_PROMPT
+	)
+
+	with span('llm.classify_chunk', model=model, messages=len(messages)):
+		response = completion(
+			model=model,
+			messages=llm_messages,
+			temperature=temperature,
+		)
+	record_llm_usage(model, getattr(response, 'usage', None), 'llm.classify_chunk')
+
+	with span('llm.parse'):
+		soup = BeautifulSoup(response.choices[0].message.content, 'html.parser')
+		answer = json.loads(soup.find('answer').get_text())
+
+	labels = [[] for _ in messages]
+	for index, categories in answer.items():
+		i = int(index)
+		if 0 <= i < len(messages):
+			labels[i] = [category for category in categories if category in CATEGORIES]
+	return labels
+
+
+def classify_messages(
+	messages: List[Dict[str, str]],
+	model: str,
+	temperature: float = 0.1,
+	max_chunk_tokens: int = 4000,
+	max_workers: int = 8,
+) -> List[List[str]]:
+	"""Classify messages chunk by chunk, with the chunks sent to the model in parallel."""
+
+	chunks = chunk_messages(messages, max_chunk_tokens)
+
+	def classify(indices: List[int]) -> List[List[str]]:
+		return classify_chunk([messages[i] for i in indices], model, temperature)
+
+	labels = [[] for _ in messages]
+	with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+		for indices, chunk_labels in zip(chunks, executor.map(classify, chunks)):
+			for i, message_labels in zip(indices, chunk_labels):
+				labels[i] = message_labels
+	return labels
+
+
+def analyze_tg_vibe_chunked(
+	messages: List[Dict[str, str]],
+	model: str,
+	temperature: float = 0.1,
+	max_chunk_tokens: int = 4000,
+	max_workers: int = 8,
+) -> Dict:
+	"""Map-reduce vibe check: classify token-budgeted chunks in parallel, then compute the metrics locally.
+
+	Latency is bounded by the slowest chunk rather than growing with history depth, and the metric arithmetic is
+	deterministic. Qualitative scores are derived from label prevalence (see `metrics.qualitative`).
+	"""
+
+	labels = classify_messages(messages, model, temperature, max_chunk_tokens, max_workers)
+	weights = [msg.get('count', 1) for msg in messages]
+	return build_report([msg['text'] for msg in messages], labels, weights)
+
+
+def analyze_tg_vibe_incremental(
+	channel: str,
+	messages: List[Dict[str, str]],
+	model: str,
+	label_store: LabelStore,
+	temperature: float = 0.1,
+	max_chunk_tokens: int = 4000,
+	max_workers: int = 8,
+) -> Dict:
+	"""Chunked vibe check that only sends messages without stored labels to the model.
+
+	Labels of previously classified messages (same id, text, model and prompt version) come from `label_store`, new
+	ones are classified and stored, and the report is recomputed over the full window. For a channel polled often the
+	LLM input shrinks to the messages posted since the last run.
+	"""
+
+	known = label_store.get_labels(channel, messages, model, CLASSIFY_PROMPT_VERSION)
+	unseen = [msg for msg in messages if msg['id'] not in known]
+	logger.info(
+		'Classifying %d of %d messages of %s, %d labels cached', len(unseen), len(messages), channel, len(known)
+	)
+
+	if unseen:
+		unseen_labels = classify_messages(unseen, model, temperature, max_chunk_tokens, max_workers)
+		label_store.set_labels(channel, unseen, unseen_labels, model, CLASSIFY_PROMPT_VERSION)
+		known.update((msg['id'], message_labels) for msg, message_labels in zip(unseen, unseen_labels))
+
+	labels = [known[msg['id']] for msg in messages]
+	weights = [msg.get('count', 1) for msg in messages]
+	return build_report([msg['text'] for msg in messages], labels, weights)
@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from tg_vibe_check.integrations.resilience import CircuitBreaker
+from tg_vibe_check.integrations.resilience import LatencyTracker
+from tg_vibe_check.integrations.resilience import call_with_retries
+from tg_vibe_check.integrations.resilience import hedged_call
+
+# Deadline of a single LLM request in seconds; a full report over a few hundred messages takes well under this.
+LLM_TIMEOUT = 180.0
+LLM_ATTEMPTS = 3
+
+# A request still running at this percentile of recent latencies gets a hedged twin, but never sooner than the floor.
+HEDGE_PERCENTILE = 0.95
+MIN_HEDGE_DELAY = 2.0
+
+_upstreams = {}
+_upstreams_lock = threading.Lock()
+
+
+def _upstream(model: str) -> Tuple[CircuitBreaker, LatencyTracker]:
+	"""Circuit breaker and latency window of a model, shared by every call to it in this process."""
+	with _upstreams_lock:
+		if model not in _upstreams:
+			_upstreams[model] = (CircuitBreaker(f'llm.{model}'), LatencyTracker())
+		return _upstreams[model]
+
+
+def hedging_enabled() -> bool:
+	"""Hedged LLM requests are opt-in with TG_VIBE_CHECK_HEDGE=1, as they can double the spend on slow calls."""
+	return os.getenv('TG_VIBE_CHECK_HEDGE', '') not in ('', '0')
+
+
+def completion(model: str, messages: List[Dict], temperature: float, **kwargs):
+	"""`litellm.completion` with a deadline, retries of transient errors and a circuit breaker per model.
+
+	Retries back off exponentially with jitter and honor Retry-After. When hedging is enabled, a non-streaming
+	request slower than the model's recent p95 latency is sent a second time and the first response wins.
+	"""
+	# Imported here: litellm alone takes seconds to import, which workers that only fetch shouldn't pay.
+	from litellm import completion as litellm_completion
+
+	breaker, latencies = _upstream(model)
+	hedge = hedging_enabled() and not kwargs.get('stream')
+
+	def request():
+		started = time.perf_counter()
+		# Retries happen here, not in the provider SDKs as well.
+		response = litellm_completion(
+			model=model, messages=messages, temperature=temperature, timeout=LLM_TIMEOUT, max_retries=0, **kwargs
+		)
+		latencies.record(time.perf_counter() - started)
+		return response
+
+	def attempt():
+		p95 = latencies.percentile(HEDGE_PERCENTILE) if hedge else None
+		return hedged_call(request, None if p95 is None else max(p95, MIN_HEDGE_DELAY), 'llm')
+
+	return call_with_retries(attempt, 'llm', attempts=LLM_ATTEMPTS, base_delay=1.0, breaker=breaker)
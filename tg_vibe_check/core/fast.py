@@ -0,0 +1,106 @@
+import json
+import re
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from tg_vibe_check.core.completion import completion
+from tg_vibe_check.core.metrics import build_report
+from tg_vibe_check.core.preprocess import to_prompt_records
+from tg_vibe_check.core.prompt import CATEGORY_CODES
+from tg_vibe_check.core.prompt import FAST_STATIC_PROMPT
+from tg_vibe_check.core.prompt import FAST_TOOL
+from tg_vibe_check.core.prompt import FAST_TOOL_NAME
+from tg_vibe_check.core.prompt_compiler import compile_prompt
+from tg_vibe_check.telemetry import record_llm_usage
+from tg_vibe_check.telemetry import span
+
+_CATEGORIES_BY_CODE = {code: category for category, code in CATEGORY_CODES.items()}
+_ANSWER_RE = re.compile(r'<answer>(.*?)</answer>', re.DOTALL)
+
+
+def parse_fast_answer(message) -> Dict:
+	"""Arguments of the `record_labels` tool call, or the same JSON from the text for models that answer inline."""
+	for tool_call in getattr(message, 'tool_calls', None) or []:
+		if tool_call.function.name == FAST_TOOL_NAME:
+			return json.loads(tool_call.function.arguments)
+
+	content = message.content or ''
+	match = _ANSWER_RE.search(content)
+	try:
+		return json.loads(match.group(1) if match else content)
+	except json.JSONDecodeError:
+		raise ValueError('Model neither called the record_labels tool nor answered with its JSON') from None
+
+
+def decode_fast_answer(answer: Dict, count: int) -> Tuple[List[List[str]], Dict[str, List[int]]]:
+	"""Per-message category lists and per-category quote indices from a compact answer.
+
+	Indices outside the batch and unknown codes are dropped, as are quotes of messages not labeled with the category.
+	An answer not shaped like the tool's schema (e.g. lists where objects belong) raises ValueError.
+	"""
+	if not isinstance(answer, dict):
+		raise ValueError(f'Fast answer must be a JSON object, not {type(answer).__name__}')
+	answer_labels = _object_field(answer, 'labels')
+	answer_quotes = _object_field(answer, 'quotes')
+
+	labels = [[] for _ in range(count)]
+	for index, codes in answer_labels.items():
+		if not isinstance(codes, list):
+			raise ValueError(f'Labels of message {index} must be a list of codes, not {type(codes).__name__}')
+		try:
+			i = int(index)
+		except ValueError:
+			continue
+		if 0 <= i < count:
+			categories = (_CATEGORIES_BY_CODE.get(code) if isinstance(code, str) else None for code in codes)
+			labels[i] = list(dict.fromkeys(category for category in categories if category is not None))
+
+	quotes = {}
+	for code, indices in answer_quotes.items():
+		category = _CATEGORIES_BY_CODE.get(code)
+		if category is not None and isinstance(indices, list):
+			quotes[category] = [i for i in indices if isinstance(i, int) and 0 <= i < count and category in labels[i]]
+	return labels, quotes
+
+
+def _object_field(answer: Dict, name: str) -> Dict:
+	value = answer.get(name) or {}
+	if not isinstance(value, dict):
+		raise ValueError(f'`{name}` of the fast answer must be an object, not {type(value).__name__}')
+	return value
+
+
+def analyze_tg_vibe_fast(
+	messages: List[Dict[str, str]], model: str, temperature: float = 0.1, max_message_tokens: Optional[int] = None
+) -> Dict:
+	"""Vibe check with the compact structured-output protocol.
+
+	The model classifies the messages in one call and returns only category codes and quote picks by message index
+	through a forced tool call, instead of a scratchpad, arithmetic and prose. The metrics are computed locally
+	like in `analyze_tg_vibe_chunked`, with the supporting messages taken from the input by index.
+	"""
+
+	with span('llm.prompt_build', messages=len(messages)):
+		records = [{'i': i, **record} for i, record in enumerate(to_prompt_records(messages))]
+		llm_messages, _ = compile_prompt(
+			records, static_prompt=FAST_STATIC_PROMPT, max_message_tokens=max_message_tokens
+		)
+
+	with span('llm.fast', model=model):
+		response = completion(
+			model,
+			llm_messages,
+			temperature,
+			tools=[FAST_TOOL],
+			tool_choice={'type': 'function', 'function': {'name': FAST_TOOL_NAME}},
+		)
+	record_llm_usage(model, getattr(response, 'usage', None), 'llm.fast')
+
+	with span('llm.parse'):
+		labels, quotes = decode_fast_answer(parse_fast_answer(response.choices[0].message), len(records))
+
+	texts = [record['text'] or '' for record in records]
+	weights = [record.get('count', 1) for record in records]
+	return build_report(texts, labels, weights, quotes)
@@ -0,0 +1,338 @@
+import itertools
+import re
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+
+from tg_vibe_check.core.batch import MessageBatch
+from tg_vibe_check.core.metrics import CATEGORIES
+from tg_vibe_check.core.metrics import MAX_SUPPORTING_MESSAGES
+from tg_vibe_check.core.metrics import report_from_counts
+from tg_vibe_check.core.preprocess import normalize_text
+
+# Pseudo model name for the lexicon scorer, e.g. as the first stage of a cascade.
+INSTANT_MODEL = 'local/lexicon'
+
+# A message gets a category once its summed phrase weights for it reach this.
+LABEL_THRESHOLD = 1.0
+
+# Weighted phrases per category of the Master Classification List. Weight 1.0 is enough on its own, weaker cues
+# need company. Phrases are matched on normalized text (see `normalize_text`), so "100x" also matches "5x".
+LEXICONS = {
+	'FUD': {
+		'scam': 1.0,
+		'going to zero': 1.0,
+		'dead project': 1.0,
+		'dev sold': 1.0,
+		'devs sold': 1.0,
+		'dev wallet': 0.5,
+		'exit liquidity': 1.0,
+		'red flag': 1.0,
+		'something is off': 1.0,
+		'it s over': 1.0,
+		'ngmi': 1.0,
+		'bearish': 1.0,
+		'dumping': 1.0,
+		'dump': 0.5,
+		'silent': 0.5,
+		'worst': 0.5,
+	},
+	'HODL': {
+		'hodl': 1.0,
+		'hodling': 1.0,
+		'diamond hands': 1.0,
+		'not selling': 1.0,
+		'never selling': 1.0,
+		'holding': 1.0,
+		'long term': 1.0,
+		'bought more': 1.0,
+		'buy the dip': 1.0,
+		'buying the dip': 1.0,
+		'accumulating': 1.0,
+		'stacking': 0.5,
+		'diamond': 0.5,
+	},
+	'COPE': {
+		'healthy dip': 1.0,
+		'dip is healthy': 1.0,
+		'inevitable': 1.0,
+		'just wait': 1.0,
+		'still early': 1.0,
+		'we are early': 1.0,
+		'zoom out': 1.0,
+		'fud is bullish': 1.0,
+		'price doesn t matter': 1.0,
+		'100x by': 1.0,
+		'for sure': 0.5,
+		'big announcement': 0.5,
+		'temporary': 0.5,
+		'manipulation': 0.5,
+	},
+	'CONFLICT': {
+		'shut up': 1.0,
+		'stop spreading': 1.0,
+		'mods are asleep': 1.0,
+		'idiot': 1.0,
+		'liar': 1.0,
+		'clown': 1.0,
+		'stupid': 1.0,
+		'lies': 0.5,
+		'no idea': 0.5,
+		'joke': 0.5,
+		'you clearly': 0.5,
+	},
+	'SUPPORT': {
+		'great work': 1.0,
+		'well done': 1.0,
+		'good job': 1.0,
+		'keep building': 1.0,
+		'great team': 1.0,
+		'proud': 1.0,
+		'appreciate': 1.0,
+		'welcome aboard': 1.0,
+		'love this community': 1.0,
+		'thank you team': 1.0,
+		'we will help': 1.0,
+		'welcome': 0.5,
+	},
+	'MOON_BOY': {
+		'wen lambo': 1.0,
+		'wen moon': 1.0,
+		'to the moon': 1.0,
+		'lambo': 1.0,
+		'lfg': 1.0,
+		'pump it': 1.0,
+		'send it': 1.0,
+		'100x incoming': 1.0,
+		'moon': 0.5,
+		'rocket': 0.5,
+		'wagmi': 0.5,
+	},
+	'GENUINE_QUESTION': {
+		'how does': 1.0,
+		'how do': 1.0,
+		'how to': 1.0,
+		'how can': 1.0,
+		'can someone explain': 1.0,
+		'does anyone know': 1.0,
+		'where can i': 1.0,
+		'is there a': 0.5,
+		'what is': 0.5,
+		'when will': 0.5,
+		'qmark': 0.5,
+	},
+	'COMMUNITY_HELP': {
+		'you can find': 1.0,
+		'check the docs': 1.0,
+		'read the docs': 1.0,
+		'official docs': 1.0,
+		'in the docs': 1.0,
+		'pinned': 1.0,
+		'here is how': 1.0,
+		'follow these steps': 1.0,
+		'never use links': 1.0,
+		'guide': 0.5,
+		'step': 0.5,
+	},
+	'TECHNICAL_DISCOURSE': {
+		'consensus': 1.0,
+		'validator': 1.0,
+		'finality': 1.0,
+		'throughput': 1.0,
+		'latency': 1.0,
+		'rollup': 1.0,
+		'zk': 1.0,
+		'smart contract': 1.0,
+		'storage layout': 1.0,
+		'refactor': 1.0,
+		'tradeoff': 1.0,
+		'architecture': 1.0,
+		'gas': 0.5,
+		'contract': 0.5,
+		'protocol': 0.5,
+		'mainnet': 0.5,
+		'testnet': 0.5,
+		'node': 0.5,
+	},
+	'RUGPULL_ANXIETY': {
+		'rug': 1.0,
+		'rugpull': 1.0,
+		'rug pull': 1.0,
+		'rugged': 1.0,
+		'pull liquidity': 1.0,
+		'drained': 1.0,
+		'honeypot': 1.0,
+		'exit scam': 1.0,
+		'doxxed': 1.0,
+		'locked liquidity': 1.0,
+		'team disappeared': 1.0,
+		'disappear': 0.5,
+		'liquidity pool': 0.5,
+	},
+	'BOT_SHILL': {
+		'presale': 1.0,
+		'link in bio': 1.0,
+		'limited spots': 1.0,
+		'join now': 1.0,
+		'dm me': 1.0,
+		'claim now': 1.0,
+		'free tokens': 1.0,
+		'giveaway': 1.0,
+		'guaranteed': 1.0,
+		'next 100x': 1.0,
+		'airdrop': 0.5,
+		'whitelist': 0.5,
+	},
+	'PRICE_DESPERATION': {
+		'break even': 1.0,
+		'price down': 1.0,
+		'why is price': 1.0,
+		'need it back': 1.0,
+		'wen pump': 1.0,
+		'when pump': 1.0,
+		'lost everything': 1.0,
+		'down bad': 1.0,
+		'bags': 0.5,
+		'price': 0.5,
+		'chart': 0.5,
+	},
+}
+
+# Emoji and punctuation that carry signal, mapped to words before normalization strips them.
+_SIGNAL_CHARACTERS = {'🚀': ' rocket ', '🌕': ' moon ', '🌙': ' moon ', '💎': ' diamond ', '?': ' qmark '}
+
+_SEPARATOR = '\x01'  # message boundary token; normalization keeps it and no phrase contains it
+_SEPARATOR_ID = -2
+_URL_RE = re.compile(r'https?://\S+')
+_ZEROS_RE = re.compile(rb'00+')
+
+
+def _normalization_table() -> bytes:
+	"""Byte translation equivalent to `normalize_text` for ASCII: lowercase, digits to 0, non-word bytes to spaces.
+
+	Non-ASCII bytes become spaces too. No lexicon phrase contains them, so words in other scripts can never match.
+	"""
+	table = bytearray(b' ' * 256)
+	for char in b'abcdefghijklmnopqrstuvwxyz_':
+		table[char] = char
+		table[ord(chr(char).upper())] = char
+	table[ord('0') : ord('9') + 1] = b'0' * 10
+	table[ord(_SEPARATOR)] = ord(_SEPARATOR)
+	return bytes(table)
+
+
+_NORMALIZATION_TABLE = _normalization_table()
+
+
+def _compile_lexicons() -> Tuple[Dict[bytes, int], Dict[int, Tuple[np.ndarray, np.ndarray]]]:
+	"""Vocabulary of lexicon words, and per phrase length the sorted phrase codes with their category weights."""
+	vocabulary = {}
+	phrases = {}
+	for category, lexicon in enumerate(LEXICONS[category] for category in CATEGORIES):
+		for phrase, weight in lexicon.items():
+			words = normalize_text(phrase).encode().split()
+			ids = [vocabulary.setdefault(word, len(vocabulary)) for word in words]
+			phrases.setdefault(len(ids), []).append((ids, category, weight))
+
+	tables = {}
+	for length, entries in phrases.items():
+		codes = {}
+		for ids, category, weight in entries:
+			code = 0
+			for word_id in ids:
+				code = code * len(vocabulary) + word_id
+			codes.setdefault(code, np.zeros(len(CATEGORIES)))[category] += weight
+		order = sorted(codes)
+		tables[length] = (np.array(order, dtype=np.int64), np.array([codes[code] for code in order]))
+	return vocabulary, tables
+
+
+_VOCABULARY, _PHRASE_TABLES = _compile_lexicons()
+
+
+def _tokenize(texts: List[str]) -> List[bytes]:
+	"""Normalized words of all texts, with a separator token between messages."""
+	corpus = f' {_SEPARATOR} '.join(texts)
+	if corpus.count(_SEPARATOR) != max(len(texts) - 1, 0):
+		corpus = f' {_SEPARATOR} '.join(text.replace(_SEPARATOR, ' ') for text in texts)
+	for char, word in _SIGNAL_CHARACTERS.items():
+		corpus = corpus.replace(char, word)
+	corpus = _URL_RE.sub(' url ', corpus).encode().translate(_NORMALIZATION_TABLE)
+	return _ZEROS_RE.sub(b'0', corpus).split()
+
+
+def score_messages(texts: Sequence[str]) -> np.ndarray:
+	"""Lexicon score of every message for every category, as a (len(texts) x len(CATEGORIES)) array.
+
+	Distinct texts are normalized and tokenized as one string, words are mapped to lexicon ids in a single pass, and
+	phrases of each length are matched for all positions at once by encoding word windows as integers.
+	"""
+	# Reposts, bot spam and filler repeat verbatim, so each distinct text is tokenized and scored once.
+	distinct = {text: i for i, text in enumerate(dict.fromkeys(texts))}
+	inverse = np.fromiter(map(distinct.__getitem__, texts), dtype=np.int64, count=len(texts))
+	texts = [text or '' for text in distinct]
+	words = _tokenize(texts)
+	lookup = {**_VOCABULARY, _SEPARATOR.encode(): _SEPARATOR_ID}
+	ids = np.fromiter(map(lookup.get, words, itertools.repeat(-1)), dtype=np.int64, count=len(words))
+	message_of = np.cumsum(ids == _SEPARATOR_ID)
+
+	# Only windows made entirely of lexicon words can match, a small fraction of all positions. Windows of each
+	# length are the shorter ones that are followed by another lexicon word, so their codes are extended in place.
+	starts = np.flatnonzero(ids >= 0)
+	code = ids[starts]
+	positions, weights = [], []
+	for length in range(1, max(_PHRASE_TABLES) + 1):
+		if length > 1:
+			extends = starts < len(ids) - length + 1
+			starts, code = starts[extends], code[extends]
+			extends = ids[starts + length - 1] >= 0
+			starts, code = starts[extends], code[extends] * len(_VOCABULARY) + ids[starts[extends] + length - 1]
+		if length in _PHRASE_TABLES:
+			codes, table = _PHRASE_TABLES[length]
+			index = np.minimum(np.searchsorted(codes, code), len(codes) - 1)
+			matched = codes[index] == code
+			positions.append(starts[matched])
+			weights.append(table[index[matched]])
+
+	positions, weights = np.concatenate(positions), np.concatenate(weights)
+	hits, columns = np.nonzero(weights)
+	cells = message_of[positions[hits]] * len(CATEGORIES) + columns
+	scores = np.bincount(cells, weights=weights[hits, columns], minlength=len(texts) * len(CATEGORIES))
+	return scores.reshape(len(texts), len(CATEGORIES))[inverse]
+
+
+def analyze_tg_vibe_instant(messages: Sequence[Dict[str, str]]) -> Dict:
+	"""Full vibe check report from the lexicons alone, in the same schema as the LLM report.
+
+	Messages whose score for a category reaches LABEL_THRESHOLD count towards it, weighted by `count` for collapsed
+	duplicates, and the ratio formulas of PROMPT are applied to the totals. Supporting messages are the strongest
+	matches. No network calls, so it works as a preview while the model runs and as a fallback when it is down.
+	"""
+	if isinstance(messages, MessageBatch):
+		texts = messages.texts.tolist()
+		weights = messages.counts.astype(np.int64)
+	else:
+		texts = [msg['text'] for msg in messages]
+		weights = np.fromiter((msg.get('count', 1) for msg in messages), dtype=np.int64, count=len(messages))
+	scores = score_messages(texts)
+	labeled = scores >= LABEL_THRESHOLD
+
+	counts = dict(zip(CATEGORIES, (weights @ labeled).tolist()))
+	relevant = int(weights[labeled.any(axis=1)].sum())
+
+	def quotes(*categories: str) -> List[str]:
+		picked = []
+		for category in categories:
+			column = CATEGORIES.index(category)
+			candidates = np.flatnonzero(labeled[:, column])
+			for i in candidates[np.argsort(-scores[candidates, column], kind='stable')]:
+				if len(picked) == MAX_SUPPORTING_MESSAGES:
+					return picked
+				if texts[i] not in picked:
+					picked.append(texts[i])
+		return picked
+
+	return report_from_counts(counts, relevant, quotes)
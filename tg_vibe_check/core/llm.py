@@ -1,33 +1,96 @@
 import json
+import logging
 from typing import Dict
 from typing import List
+from typing import Optional
 
-from bs4 import BeautifulSoup
-from litellm import completion
+from tg_vibe_check.core.cache import ResultCache
+from tg_vibe_check.core.cache import make_cache_key
+from tg_vibe_check.core.chunked import analyze_tg_vibe_chunked
+from tg_vibe_check.core.completion import completion
+from tg_vibe_check.core.fast import analyze_tg_vibe_fast
+from tg_vibe_check.core.preprocess import to_prompt_records
+from tg_vibe_check.core.prompt import CLASSIFY_PROMPT_VERSION
+from tg_vibe_check.core.prompt import FAST_PROMPT_VERSION
+from tg_vibe_check.core.prompt import PROMPT_VERSION
+from tg_vibe_check.core.prompt_compiler import compile_prompt
+from tg_vibe_check.telemetry import record_llm_usage
+from tg_vibe_check.telemetry import span
 
-from tg_vibe_check.core.prompt import PROMPT
+logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL = 'anthropic/claude-sonnet-4-20250514'
 
-def analyze_tg_vibe(messages: List[Dict[str, str]], model: str = 'anthropic/claude-sonnet-4-20250514') -> Dict:
-	"""Analyze Telegram messages to generate a crypto community vibe check report."""
 
-	formatted_messages = [{'date': msg['date'], 'text': msg['text']} for msg in messages]
+def _analyze_single_pass(
+	messages: List[Dict[str, str]], model: str, temperature: float, max_message_tokens: Optional[int]
+) -> Dict:
+	"""Send the whole batch in one PROMPT and parse the model's report."""
+	# Imported here so that workers that only fetch don't pay for it.
+	from bs4 import BeautifulSoup
 
-	prompt_with_messages = PROMPT.replace(
-		'{{INSERT JSON ARRAY OF MESSAGES HERE}}', json.dumps(formatted_messages, indent=2)
-	)
+	with span('llm.prompt_build', messages=len(messages)):
+		llm_messages, stats = compile_prompt(to_prompt_records(messages), max_message_tokens=max_message_tokens)
+	logger.info('Vibe check prompt: %s', stats)
 
-	llm_messages = [{'role': 'user', 'content': prompt_with_messages}]
-
-	response = completion(
-		model=model,
-		messages=llm_messages,
-		temperature=0.1,
-	)
+	with span('llm.completion', model=model):
+		response = completion(
+			model=model,
+			messages=llm_messages,
+			temperature=temperature,
+		)
+	record_llm_usage(model, getattr(response, 'usage', None), 'llm.completion')
 
 	response_content = response.choices[0].message.content
 
 	# parse the response inside <answer> tags
-	soup = BeautifulSoup(response_content, 'html.parser')
-	content = soup.find('answer').get_text()
-	return json.loads(content)
+	with span('llm.parse'):
+		soup = BeautifulSoup(response_content, 'html.parser')
+		content = soup.find('answer').get_text()
+		return json.loads(content)
+
+
+def analyze_tg_vibe(
+	messages: List[Dict[str, str]],
+	model: str = DEFAULT_MODEL,
+	temperature: float = 0.1,
+	cache: Optional[ResultCache] = None,
+	chunked: bool = False,
+	max_message_tokens: Optional[int] = None,
+	fast: bool = False,
+) -> Dict:
+	"""Analyze Telegram messages to generate a crypto community vibe check report.
+
+	If a `cache` is given, identical requests (same messages, model, temperature and prompt) are served from it.
+	With `chunked`, messages are classified in parallel chunks and the metrics computed locally, see
+	`analyze_tg_vibe_chunked`. With `fast`, the model only returns compact labels through structured output and
+	the report is computed locally, see `analyze_tg_vibe_fast`. `max_message_tokens` caps the messages part of a
+	single-call prompt by sampling messages evenly across the window.
+	"""
+
+	cache_key = None
+	if cache is not None:
+		mode = 'chunked' if chunked else 'fast' if fast else 'single'
+		prompt_version = {'chunked': CLASSIFY_PROMPT_VERSION, 'fast': FAST_PROMPT_VERSION}.get(mode, PROMPT_VERSION)
+		cache_key = make_cache_key(
+			messages,
+			model,
+			temperature,
+			prompt_version,
+			mode=mode,
+			max_message_tokens=str(max_message_tokens),
+		)
+		cached = cache.get(cache_key)
+		if cached is not None:
+			return cached
+
+	if chunked:
+		result = analyze_tg_vibe_chunked(messages, model, temperature)
+	elif fast:
+		result = analyze_tg_vibe_fast(messages, model, temperature, max_message_tokens)
+	else:
+		result = _analyze_single_pass(messages, model, temperature, max_message_tokens)
+
+	if cache is not None:
+		cache.set(cache_key, result)
+	return result
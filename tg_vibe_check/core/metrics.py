@@ -0,0 +1,253 @@
+import itertools
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+# Master Classification List from PROMPT, grouped by report section.
+SENTIMENT_CATEGORIES = ['FUD', 'HODL', 'COPE', 'CONFLICT', 'SUPPORT']
+ENGAGEMENT_CATEGORIES = ['MOON_BOY', 'GENUINE_QUESTION', 'COMMUNITY_HELP', 'TECHNICAL_DISCOURSE']
+RED_FLAG_CATEGORIES = ['RUGPULL_ANXIETY', 'BOT_SHILL', 'PRICE_DESPERATION']
+CATEGORIES = SENTIMENT_CATEGORIES + ENGAGEMENT_CATEGORIES + RED_FLAG_CATEGORIES
+
+# Share of relevant messages at which a qualitative score (cope, bot/shill, price desperation) saturates at 1.0.
+QUALITATIVE_SATURATION = 0.25
+
+MAX_SUPPORTING_MESSAGES = 3
+
+# Report sections in display order: (report key, dashboard title, details tab title).
+SECTIONS = [
+	('sentiment_psychology_metrics', '💭 Sentiment & Psychology', '💭 Sentiment Details'),
+	('engagement_quality_indicators', '🎯 Engagement Quality', '🎯 Engagement Details'),
+	('red_flag_detection', '🚨 Red Flag Detection', '🚨 Red Flag Details'),
+]
+
+# The nine dashboard metrics with the thresholds used to grade them as good, moderate or bad.
+METRIC_SPECS = [
+	{
+		'section': 'sentiment_psychology_metrics',
+		'key': 'fud_coefficient',
+		'label': 'FUD Coefficient',
+		'help_text': 'Fear, Uncertainty, Doubt level (0=low, 1=high)',
+		'good_threshold': 0.3,
+		'bad_threshold': 0.7,
+		'higher_is_better': False,
+	},
+	{
+		'section': 'sentiment_psychology_metrics',
+		'key': 'cope_level',
+		'label': 'Cope Level',
+		'help_text': 'Unrealistic optimism level (0=realistic, 1=high cope)',
+		'good_threshold': 0.3,
+		'bad_threshold': 0.7,
+		'higher_is_better': False,
+	},
+	{
+		'section': 'sentiment_psychology_metrics',
+		'key': 'community_cohesion',
+		'label': 'Community Cohesion',
+		'help_text': 'Unity and support level (0=divided, 1=unified)',
+		'good_threshold': 0.7,
+		'bad_threshold': 0.3,
+		'higher_is_better': True,
+	},
+	{
+		'section': 'engagement_quality_indicators',
+		'key': 'moon_boy_density',
+		'label': 'Moon Boy Density',
+		'help_text': 'Low-effort hype ratio (0=quality discussion, 1=pure hype)',
+		'good_threshold': 0.3,
+		'bad_threshold': 0.7,
+		'higher_is_better': False,
+	},
+	{
+		'section': 'engagement_quality_indicators',
+		'key': 'helpfulness_ratio',
+		'label': 'Helpfulness Ratio',
+		'help_text': 'Question answering quality (0=poor support, 1=helpful)',
+		'good_threshold': 0.7,
+		'bad_threshold': 0.3,
+		'higher_is_better': True,
+	},
+	{
+		'section': 'engagement_quality_indicators',
+		'key': 'signal_to_noise_ratio',
+		'label': 'Signal-to-Noise Ratio',
+		'help_text': 'Technical discussion quality (0=noise, 1=signal)',
+		'good_threshold': 0.7,
+		'bad_threshold': 0.3,
+		'higher_is_better': True,
+	},
+	{
+		'section': 'red_flag_detection',
+		'key': 'rugpull_anxiety_index',
+		'label': 'Rugpull Anxiety',
+		'help_text': 'Number of rugpull concerns (0=none, higher=more concerns)',
+		'good_threshold': 0,
+		'bad_threshold': 1,
+		'higher_is_better': False,
+		'is_integer': True,
+	},
+	{
+		'section': 'red_flag_detection',
+		'key': 'bot_shill_probability',
+		'label': 'Bot/Shill Probability',
+		'help_text': 'Likelihood of bot activity (0=organic, 1=heavy bots)',
+		'good_threshold': 0.3,
+		'bad_threshold': 0.7,
+		'higher_is_better': False,
+	},
+	{
+		'section': 'red_flag_detection',
+		'key': 'price_desperation_score',
+		'label': 'Price Desperation',
+		'help_text': 'Obsession with price action (0=patient, 1=desperate)',
+		'good_threshold': 0.3,
+		'bad_threshold': 0.7,
+		'higher_is_better': False,
+	},
+]
+
+
+def ratio(numerator: int, denominator: int, default: float = 0.5) -> float:
+	"""Ratio rounded to two decimals, or `default` on a zero denominator.
+
+	0.5 is the general rule of the PROMPT's note on calculations; callers pass the exceptions it lists, e.g. 1.0 for
+	the Helpfulness Ratio.
+	"""
+	if denominator == 0:
+		return default
+	return round(numerator / denominator, 2)
+
+
+def qualitative(count: int, relevant: int) -> float:
+	"""Deterministic stand-in for the qualitative scores: prevalence among relevant messages, saturating at 1.0."""
+	if relevant == 0:
+		return 0.0
+	return round(min(1.0, count / relevant / QUALITATIVE_SATURATION), 2)
+
+
+def count_labels(labels: Sequence[Sequence[str]], weights: Optional[Sequence[int]] = None) -> Dict[str, int]:
+	"""Count messages per category. `weights` gives how many times each message was posted (defaults to 1)."""
+	counts = dict.fromkeys(CATEGORIES, 0)
+	for i, message_labels in enumerate(labels):
+		weight = weights[i] if weights is not None else 1
+		for label in set(message_labels):
+			if label in counts:
+				counts[label] += weight
+	return counts
+
+
+def _metric(score: float, explanation: str, supporting_messages: List[str]) -> Dict:
+	return {'score': score, 'explanation': explanation, 'supporting_messages': supporting_messages}
+
+
+def _quotes(
+	texts: Sequence[str],
+	labels: Sequence[Sequence[str]],
+	*categories: str,
+	preferred: Optional[Dict[str, Sequence[int]]] = None,
+) -> List[str]:
+	"""Pick up to MAX_SUPPORTING_MESSAGES distinct quotes, preferring the earlier categories.
+
+	Within a category the indices in `preferred` (e.g. picked by the model) come first, then messages in order.
+	"""
+	quotes = []
+	for category in categories:
+		candidates = itertools.chain((preferred or {}).get(category, ()), range(len(texts)))
+		for i in candidates:
+			if len(quotes) == MAX_SUPPORTING_MESSAGES:
+				return quotes
+			if category in labels[i] and texts[i] not in quotes:
+				quotes.append(texts[i])
+	return quotes
+
+
+def build_report(
+	texts: Sequence[str],
+	labels: Sequence[Sequence[str]],
+	weights: Optional[Sequence[int]] = None,
+	quotes: Optional[Dict[str, Sequence[int]]] = None,
+) -> Dict:
+	"""Compute the full vibe check report from per-message classifications.
+
+	Produces the same schema as the `<answer>` block of PROMPT, applying its formulas and zero-denominator rules
+	in Python instead of leaving the arithmetic to the model. `quotes` optionally maps categories to the indices of
+	messages to prefer as their supporting messages.
+	"""
+	c = count_labels(labels, weights)
+	relevant = sum(
+		(weights[i] if weights is not None else 1) for i, message_labels in enumerate(labels) if message_labels
+	)
+	return report_from_counts(c, relevant, lambda *categories: _quotes(texts, labels, *categories, preferred=quotes))
+
+
+def report_from_counts(c: Dict[str, int], relevant: int, quotes: Callable[..., List[str]]) -> Dict:
+	"""The report for given per-category counts and number of relevant messages.
+
+	`quotes(*categories)` returns the supporting messages for a metric, preferring the earlier categories.
+	"""
+
+	def counts_of(*categories: str) -> str:
+		return ', '.join(f'{category}: {c[category]}' for category in categories)
+
+	return {
+		'sentiment_psychology_metrics': {
+			'fud_coefficient': _metric(
+				ratio(c['FUD'], c['FUD'] + c['HODL']),
+				f'FUD / (FUD + HODL) with {counts_of("FUD", "HODL")}.',
+				quotes('FUD', 'HODL'),
+			),
+			'cope_level': _metric(
+				qualitative(c['COPE'], relevant),
+				f'{c["COPE"]} of {relevant} relevant messages show unrealistic optimism (COPE).',
+				quotes('COPE'),
+			),
+			'community_cohesion': _metric(
+				ratio(c['SUPPORT'], c['SUPPORT'] + c['CONFLICT']),
+				f'SUPPORT / (SUPPORT + CONFLICT) with {counts_of("SUPPORT", "CONFLICT")}.',
+				quotes('SUPPORT', 'CONFLICT'),
+			),
+		},
+		'engagement_quality_indicators': {
+			'moon_boy_density': _metric(
+				ratio(c['MOON_BOY'], c['MOON_BOY'] + c['GENUINE_QUESTION']),
+				f'MOON_BOY / (MOON_BOY + GENUINE_QUESTION) with {counts_of("MOON_BOY", "GENUINE_QUESTION")}.',
+				quotes('MOON_BOY', 'GENUINE_QUESTION'),
+			),
+			'helpfulness_ratio': _metric(
+				min(1.0, ratio(c['COMMUNITY_HELP'], c['GENUINE_QUESTION'], default=1.0)),
+				f'COMMUNITY_HELP / GENUINE_QUESTION with {counts_of("COMMUNITY_HELP", "GENUINE_QUESTION")}.',
+				quotes('COMMUNITY_HELP', 'GENUINE_QUESTION'),
+			),
+			'signal_to_noise_ratio': _metric(
+				ratio(c['TECHNICAL_DISCOURSE'], c['TECHNICAL_DISCOURSE'] + c['MOON_BOY']),
+				'TECHNICAL_DISCOURSE / (TECHNICAL_DISCOURSE + MOON_BOY) with '
+				f'{counts_of("TECHNICAL_DISCOURSE", "MOON_BOY")}.',
+				quotes('TECHNICAL_DISCOURSE', 'MOON_BOY'),
+			),
+		},
+		'red_flag_detection': {
+			'rugpull_anxiety_index': _metric(
+				c['RUGPULL_ANXIETY'],
+				f'{c["RUGPULL_ANXIETY"]} messages express specific rugpull fears.',
+				quotes('RUGPULL_ANXIETY'),
+			),
+			'bot_shill_probability': _metric(
+				qualitative(c['BOT_SHILL'], relevant),
+				f'{c["BOT_SHILL"]} of {relevant} relevant messages read like bot or shill posts (BOT_SHILL).',
+				quotes('BOT_SHILL'),
+			),
+			'price_desperation_score': _metric(
+				qualitative(c['PRICE_DESPERATION'], relevant),
+				f'{c["PRICE_DESPERATION"]} of {relevant} relevant messages obsess over price (PRICE_DESPERATION).',
+				quotes('PRICE_DESPERATION'),
+			),
+		},
+	}
+
+
+def flatten_scores(report: Dict) -> Dict[str, float]:
+	"""The nine scores of a report keyed by their dashboard label, e.g. for a leaderboard row."""
+	return {spec['label']: report[spec['section']][spec['key']]['score'] for spec in METRIC_SPECS}
@@ -0,0 +1,114 @@
+import re
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+
+from tg_vibe_check.core.batch import MessageBatch
+from tg_vibe_check.core.prompt_compiler import encode_records
+from tg_vibe_check.core.tokens import estimate_tokens
+
+# Messages made up only of these words carry no signal for any metric.
+GREETING_WORDS = frozenset(
+	(
+		'gm gn gmgm hi hii hello hey heya yo sup hola morning evening night good day everyone all guys fam fren frens '
+		'friends team sir ser bro thanks thank you thx ty welcome ok okay k lol lmao haha nice cool wow yes no yep nope'
+	).split()
+)
+MAX_GREETING_WORDS = 4
+
+_WORD_RE = re.compile(r'\w+')
+_URL_RE = re.compile(r'https?://\S+')
+_DIGITS_RE = re.compile(r'\d+')
+
+
+def normalize_text(text: str) -> str:
+	"""Reduce a message to its words so trivially different copies (case, punctuation, emoji, numbers) collide."""
+	text = _URL_RE.sub(' url ', text.lower())
+	text = _DIGITS_RE.sub('0', text)
+	return ' '.join(_WORD_RE.findall(text))
+
+
+def is_trivial(normalized: str) -> bool:
+	"""Empty, media-only, emoji-only or pure greeting/filler messages."""
+	if not normalized:
+		return True
+	words = normalized.split()
+	return len(words) <= MAX_GREETING_WORDS and all(word in GREETING_WORDS for word in words)
+
+
+def to_prompt_record(message: Dict) -> Dict:
+	"""The fields of a message the model sees; `count` is only included for collapsed duplicates."""
+	record = {'date': message['date'], 'text': message['text']}
+	if message.get('count', 1) > 1:
+		record['count'] = message['count']
+	return record
+
+
+def to_prompt_records(messages: Union[MessageBatch, Iterable[Dict]]) -> List[Dict]:
+	"""`to_prompt_record` of every message, straight from the columns for a MessageBatch."""
+	if isinstance(messages, MessageBatch):
+		return messages.to_prompt_records()
+	return [to_prompt_record(msg) for msg in messages]
+
+
+def _prompt_tokens(messages: Union[MessageBatch, List[Dict]]) -> int:
+	return sum(estimate_tokens(line) for line in encode_records(to_prompt_records(messages)))
+
+
+def preprocess_messages(messages: Union[MessageBatch, List[Dict[str, str]]]) -> Tuple[MessageBatch, Dict[str, int]]:
+	"""Drop messages that can't affect the report and collapse duplicates before they reach the LLM.
+
+	Empty, media-only, emoji-only and greeting/filler messages are removed. Messages that are identical after
+	normalization, or near-duplicates of one another by MinHash similarity (a shill template with a different number
+	or tag), are collapsed into the first (newest) occurrence with a `count` of how many times they were posted, so
+	repetition (e.g. bot shilling) stays visible to the model. Returns the kept messages as a MessageBatch and stats.
+	"""
+	# Imported here: the shill detector builds on this module's normalization.
+	from tg_vibe_check.core.shill import near_duplicate_representatives
+
+	messages = MessageBatch.from_messages(messages)
+	kept = []
+	counts = []
+	by_key = {}
+	dropped = 0
+	for i, (text, count) in enumerate(zip(messages.texts.tolist(), messages.counts.tolist())):
+		normalized = normalize_text(text)
+		if is_trivial(normalized):
+			dropped += 1
+			continue
+
+		if normalized in by_key:
+			counts[by_key[normalized]] += count
+			continue
+
+		by_key[normalized] = len(kept)
+		kept.append(i)
+		counts.append(count)
+
+	# Exact copies are gone, so only distinct texts go through MinHash; each folds into its newest near-duplicate.
+	representatives = near_duplicate_representatives(list(by_key))
+	near_duplicates = 0
+	for j, representative in enumerate(representatives):
+		if representative != j:
+			counts[representative] += counts[j]
+			near_duplicates += 1
+	unique = [j for j, representative in enumerate(representatives) if representative == j]
+	kept = messages[np.array(kept, dtype=np.int64)[unique]].with_counts(np.array(counts, dtype=np.int32)[unique])
+
+	tokens_before = _prompt_tokens(messages)
+	tokens_after = _prompt_tokens(kept)
+	stats = {
+		'messages_in': len(messages),
+		'messages_out': len(kept),
+		'dropped_trivial': dropped,
+		'collapsed_duplicates': len(messages) - dropped - len(kept) - near_duplicates,
+		'collapsed_near_duplicates': near_duplicates,
+		'tokens_before': tokens_before,
+		'tokens_after': tokens_after,
+		'tokens_saved': tokens_before - tokens_after,
+	}
+	return kept, stats
@@ -1,4 +1,11 @@
-PROMPT = """
+import hashlib
+import json
+
+MESSAGES_PLACEHOLDER = '{{INSERT JSON ARRAY OF MESSAGES HERE}}'
+
+# Static part of the vibe check prompt. It never changes between calls, so it goes first where providers can cache it
+# as a prompt prefix; the messages to analyze follow in MESSAGES_TEMPLATE.
+STATIC_PROMPT = """
 <role>
 You are an expert AI Crypto Analyst. Your specialty is performing a comprehensive "vibe check" on crypto communities by analyzing conversations in their Telegram channels. You are a single, integrated tool that assesses sentiment, engagement quality, and critical red flags from a raw feed of messages.
 </role>
@@ -7,14 +14,10 @@ You are an expert AI Crypto Analyst. Your specialty is performing a comprehensiv
 The goal is to generate a full diagnostic report on a project's community health, intended for a crypto investor or "whale". This report must be delivered as a single, clean JSON object. You will analyze the provided messages to score the community across three key domains: "Sentiment & Psychology", "Engagement Quality", and "Red Flag Detection". The analysis must be thorough, objective, and based entirely on the provided text.
 </context>
 
-<messages>
-{{INSERT JSON ARRAY OF MESSAGES HERE}}
-</messages>
-
 <instructions>
-Your task is to analyze the chat messages provided in the `<messages>` tag and generate a complete community health report. Follow these steps precisely.
+Your task is to analyze the chat messages provided in the final `<messages>` tag, after the example, and generate a complete community health report. Follow these steps precisely.
 
-1.  **Thinking Process:** First, in a `<scratchpad>` block, perform a detailed, one-pass analysis. Scan through all the messages and list **only the ones that are relevant for scoring**. For each relevant message, write it down and assign it one or more classifications from the master list below. Ignore generic greetings, neutral statements, or irrelevant spam.
+1.  **Thinking Process:** First, in a `<scratchpad>` block, perform a detailed, one-pass analysis. Scan through all the messages and list **only the ones that are relevant for scoring**. For each relevant message, write it down and assign it one or more classifications from the master list below. Ignore generic greetings, neutral statements, or irrelevant spam. A message with a `count` field was posted that many times (exact or near-duplicate copies); count it that many times when tallying its classifications.
 
     **--- Master Classification List ---**
 
@@ -176,4 +179,119 @@ Calculations:
   }
 }
 </answer>
+</response>
+</example>
 """
+
+MESSAGES_TEMPLATE = """
+<messages>
+{{INSERT JSON ARRAY OF MESSAGES HERE}}
+</messages>
+"""
+
+PROMPT = STATIC_PROMPT + MESSAGES_TEMPLATE
+
+# The Master Classification List, shared verbatim with the per-chunk classification prompt.
+CLASSIFICATION_LIST = (
+	PROMPT.split('**--- Master Classification List ---**')[1].split('2.  **Metric Calculation:**')[0].strip('\n')
+)
+
+CLASSIFY_STATIC_PROMPT = (
+	"""
+<role>
+You are an expert AI Crypto Analyst. You classify Telegram messages from crypto communities for a community health report.
+</role>
+
+<instructions>
+Classify every message in the `<messages>` tag. Each message has an index `i`. Assign each relevant message one or more classifications from the master list below. Ignore generic greetings, neutral statements, or irrelevant spam by leaving them out.
+
+**--- Master Classification List ---**
+
+"""
+	+ CLASSIFICATION_LIST
+	+ """
+
+Output a single JSON object inside an <answer> tag that maps the index of each relevant message to its list of classifications, for example:
+<answer>
+{"0": ["MOON_BOY"], "3": ["FUD", "RUGPULL_ANXIETY"]}
+</answer>
+Do not include any other text.
+</instructions>
+"""
+)
+
+CLASSIFY_PROMPT = CLASSIFY_STATIC_PROMPT + MESSAGES_TEMPLATE
+
+# One-letter codes of the categories in the fast protocol, so a message's labels cost a token or two.
+CATEGORY_CODES = {
+	'FUD': 'F',
+	'HODL': 'H',
+	'COPE': 'C',
+	'CONFLICT': 'X',
+	'SUPPORT': 'S',
+	'MOON_BOY': 'M',
+	'GENUINE_QUESTION': 'Q',
+	'COMMUNITY_HELP': 'A',
+	'TECHNICAL_DISCOURSE': 'T',
+	'RUGPULL_ANXIETY': 'R',
+	'BOT_SHILL': 'B',
+	'PRICE_DESPERATION': 'P',
+}
+
+FAST_TOOL_NAME = 'record_labels'
+
+# Structured output of the fast protocol: labels and quote picks by message index, no scratchpad or prose.
+FAST_TOOL = {
+	'type': 'function',
+	'function': {
+		'name': FAST_TOOL_NAME,
+		'description': 'Record the classifications of the relevant messages and the best quotes per classification.',
+		'parameters': {
+			'type': 'object',
+			'properties': {
+				'labels': {
+					'type': 'object',
+					'description': 'Message index -> concatenated classification codes, e.g. {"0": "M", "3": "FR"}',
+					'additionalProperties': {'type': 'string'},
+				},
+				'quotes': {
+					'type': 'object',
+					'description': 'Classification code -> up to 3 indices of the messages that best illustrate it',
+					'additionalProperties': {'type': 'array', 'items': {'type': 'integer'}, 'maxItems': 3},
+				},
+			},
+			'required': ['labels', 'quotes'],
+		},
+	},
+}
+
+FAST_STATIC_PROMPT = (
+	"""
+<role>
+You are an expert AI Crypto Analyst. You classify Telegram messages from crypto communities for a community health report.
+</role>
+
+<instructions>
+Classify every message in the `<messages>` tag. Each message has an index `i`. Assign each relevant message one or more classifications from the master list below. Ignore generic greetings, neutral statements, or irrelevant spam by leaving them out.
+
+**--- Master Classification List ---**
+
+"""
+	+ CLASSIFICATION_LIST
+	+ f"""
+
+Answer only by calling the `{FAST_TOOL_NAME}` tool, without a scratchpad, explanations or restating any message:
+*   `labels`: the index of each relevant message mapped to the codes of its classifications, written together: """
+	+ ', '.join(f'`{code}` = `{category}`' for category, code in CATEGORY_CODES.items())
+	+ """. For example {"0": "M", "3": "FR"}.
+*   `quotes`: each code you used mapped to the indices of up to 3 messages that illustrate it best, for example {"F": [3]}.
+</instructions>
+"""
+)
+
+FAST_PROMPT = FAST_STATIC_PROMPT + MESSAGES_TEMPLATE
+
+# Fingerprints of the prompt texts; cached analyses are invalidated whenever a prompt changes.
+PROMPT_VERSION = hashlib.sha256(PROMPT.encode()).hexdigest()[:16]
+CLASSIFY_PROMPT_VERSION = hashlib.sha256(CLASSIFY_PROMPT.encode()).hexdigest()[:16]
+FAST_PROMPT_VERSION = hashlib.sha256((FAST_PROMPT + json.dumps(FAST_TOOL, sort_keys=True)).encode()).hexdigest()[:16]
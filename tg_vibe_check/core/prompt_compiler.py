@@ -0,0 +1,90 @@
+import json
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from tg_vibe_check.core.prompt import MESSAGES_PLACEHOLDER
+from tg_vibe_check.core.prompt import MESSAGES_TEMPLATE
+from tg_vibe_check.core.prompt import STATIC_PROMPT
+from tg_vibe_check.core.tokens import estimate_tokens
+
+BUDGET_STRATEGIES = ('sample', 'recent')
+
+
+def encode_records(records: List[Dict]) -> List[str]:
+	"""Compact JSON for each record: no indentation or separator padding, and emoji/non-Latin text left unescaped."""
+	return [json.dumps(record, ensure_ascii=False, separators=(',', ':')) for record in records]
+
+
+def _select_within_budget(sizes: List[int], budget: int, strategy: str) -> List[int]:
+	"""Indices of the records to keep so their total size fits `budget`.
+
+	`recent` keeps the leading records (the feed is newest first); `sample` keeps an evenly spaced subset so the
+	whole time window stays represented.
+	"""
+	total = sum(sizes)
+	if total <= budget:
+		return list(range(len(sizes)))
+
+	if strategy == 'recent':
+		candidates = range(len(sizes))
+	else:
+		ratio = budget / total
+		candidates = [i for i in range(len(sizes)) if int((i + 1) * ratio) > int(i * ratio)]
+
+	kept = []
+	used = 0
+	for i in candidates:
+		if used + sizes[i] > budget:
+			continue
+		kept.append(i)
+		used += sizes[i]
+	return kept
+
+
+def compile_prompt(
+	records: List[Dict],
+	static_prompt: str = STATIC_PROMPT,
+	max_message_tokens: Optional[int] = None,
+	strategy: str = 'sample',
+) -> Tuple[List[Dict], Dict[str, int]]:
+	"""Build chat messages for litellm with the static prompt first and marked for provider prompt caching.
+
+	The static role, instructions and example go in a system message tagged with `cache_control`, so providers that
+	support prefix caching (e.g. Anthropic) bill and process it once per cache window. The records follow in the user
+	message in compact JSON, trimmed to `max_message_tokens` with the given strategy. Returns the messages and
+	estimated token counts, available before any call is made.
+	"""
+	if strategy not in BUDGET_STRATEGIES:
+		raise ValueError(f'Unknown budget strategy {strategy!r}, expected one of {BUDGET_STRATEGIES}')
+
+	encoded = encode_records(records)
+	sizes = [estimate_tokens(line) + 1 for line in encoded]
+	kept = (
+		range(len(encoded))
+		if max_message_tokens is None
+		else _select_within_budget(sizes, max_message_tokens, strategy)
+	)
+
+	body = '[\n' + ',\n'.join(encoded[i] for i in kept) + '\n]'
+	user_prompt = MESSAGES_TEMPLATE.replace(MESSAGES_PLACEHOLDER, body)
+
+	llm_messages = [
+		{
+			'role': 'system',
+			'content': [{'type': 'text', 'text': static_prompt, 'cache_control': {'type': 'ephemeral'}}],
+		},
+		{'role': 'user', 'content': user_prompt},
+	]
+
+	static_tokens = estimate_tokens(static_prompt)
+	message_tokens = estimate_tokens(user_prompt)
+	stats = {
+		'static_tokens': static_tokens,
+		'message_tokens': message_tokens,
+		'prompt_tokens': static_tokens + message_tokens,
+		'messages_included': len(kept),
+		'messages_dropped': len(encoded) - len(kept),
+	}
+	return llm_messages, stats
@@ -0,0 +1,194 @@
+import zlib
+from typing import Dict
+from typing import List
+from typing import Sequence
+
+import numpy as np
+
+from tg_vibe_check.core.metrics import qualitative
+from tg_vibe_check.core.preprocess import is_trivial
+from tg_vibe_check.core.preprocess import normalize_text
+
+# 32 MinHash permutations in 8 LSH bands of 4 rows: texts with a shingle Jaccard similarity above ~0.6 end up in a
+# shared bucket with high probability, while dissimilar ones almost never do.
+NUM_PERMUTATIONS = 32
+ROWS_PER_BAND = 4
+
+# Copies needed before repetition counts as coordinated posting.
+MIN_CLUSTER_SIZE = 3
+
+# Estimated Jaccard similarity above which two messages are treated as copies of one another when collapsing them.
+NEAR_DUPLICATE_SIMILARITY = 0.8
+
+_PERMUTATION_BLOCK = 16  # bounds the temporary (block x shingles) matrix
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_LOW_32 = np.uint64(0xFFFFFFFF)
+
+# Multiply-shift hash family: h(x) = ((a * x + b) mod 2**64) >> 32, with a odd. Avoids a slow modulo per element.
+_rng = np.random.default_rng(0x7E5)
+_A = _rng.integers(0, 1 << 63, size=NUM_PERMUTATIONS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _rng.integers(0, 1 << 63, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def _shingle_hashes(texts: Sequence[str]) -> tuple:
+	"""Hash word bigrams of all texts into one flat array, plus the offset of each text's first shingle.
+
+	Each distinct word is hashed once; bigrams are formed by combining neighbouring word hashes in NumPy. A one-word
+	text gets the word itself as its only shingle.
+	"""
+	# Texts are expected to be normalized (single-spaced), so word counts come from counting separators in C.
+	texts = [text or '_' for text in texts]
+	vocabulary = {}
+	word_ids = [vocabulary.setdefault(word, len(vocabulary)) for word in ' '.join(texts).split(' ')]
+	word_hashes = np.fromiter(
+		(zlib.crc32(word.encode()) for word in vocabulary), dtype=np.uint64, count=len(vocabulary)
+	)
+	hashes = word_hashes[np.asarray(word_ids, dtype=np.intp)]
+	lengths = [text.count(' ') + 1 for text in texts]
+
+	lengths = np.asarray(lengths)
+	ends = np.cumsum(lengths)
+
+	# A bigram starts at every word except the last one of each text.
+	starts_bigram = np.ones(len(hashes), dtype=bool)
+	starts_bigram[ends - 1] = False
+	bigrams = ((hashes[:-1] * _MIX) ^ hashes[1:]) & _LOW_32
+	shingles = bigrams[starts_bigram[:-1]]
+	counts = lengths - 1
+
+	single = lengths == 1
+	if single.any():
+		# Splice the lone word of one-word texts in at the right place of the flat shingle array.
+		positions = np.cumsum(counts)[single]
+		shingles = np.insert(shingles, positions, hashes[(ends - 1)[single]])
+		counts = np.where(single, 1, counts)
+
+	offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+	return shingles, offsets
+
+
+def minhash_signatures(texts: Sequence[str]) -> np.ndarray:
+	"""MinHash signatures (len(texts) x NUM_PERMUTATIONS) over word-bigram shingles of the given texts.
+
+	All shingle hashes live in one flat array and every permutation is applied to it at once, with the per-text
+	minimum taken by `np.minimum.reduceat`, so the cost is a handful of array passes regardless of message count.
+	"""
+	shingles, offsets = _shingle_hashes(texts)
+
+	signatures = np.empty((len(texts), NUM_PERMUTATIONS), dtype=np.uint32)
+	for start in range(0, NUM_PERMUTATIONS, _PERMUTATION_BLOCK):
+		a = _A[start : start + _PERMUTATION_BLOCK, None]
+		b = _B[start : start + _PERMUTATION_BLOCK, None]
+		permuted = (a * shingles[None, :] + b) >> np.uint64(32)
+		signatures[:, start : start + _PERMUTATION_BLOCK] = np.minimum.reduceat(permuted, offsets, axis=1).T
+	return signatures
+
+
+def _band_groups(signatures: np.ndarray) -> List[tuple]:
+	"""For each LSH band, the message order sorted by bucket and the start offset of every bucket."""
+	groups = []
+	for start in range(0, NUM_PERMUTATIONS, ROWS_PER_BAND):
+		band = signatures[:, start : start + ROWS_PER_BAND].astype(np.uint64)
+		keys = band[:, 0]
+		for row in range(1, ROWS_PER_BAND):
+			keys = keys * np.uint64(0x100000001B3) ^ band[:, row]
+		order = np.argsort(keys, kind='stable')
+		sorted_keys = keys[order]
+		starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+		if len(starts) < len(keys):
+			groups.append((order, starts))
+	return groups
+
+
+def _components(signatures: np.ndarray, min_size: int) -> List[List[int]]:
+	"""Connected components of texts sharing an LSH bucket, as ascending index lists of size `min_size`+."""
+	n = len(signatures)
+	groups = _band_groups(signatures)
+	labels = np.arange(n)
+	changed = True
+	while changed:
+		changed = False
+		for order, starts in groups:
+			current = labels[order]
+			group_min = np.repeat(np.minimum.reduceat(current, starts), np.diff(np.append(starts, n)))
+			if (group_min < current).any():
+				labels[order] = group_min
+				changed = True
+		# Pointer jumping so long chains collapse in a few rounds.
+		labels = labels[labels]
+
+	roots, inverse, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+	members = np.argsort(inverse, kind='stable')
+	boundaries = np.cumsum(sizes)[:-1]
+	return [cluster.tolist() for cluster in np.split(members, boundaries) if len(cluster) >= min_size]
+
+
+def find_near_duplicate_clusters(texts: Sequence[str], min_size: int = MIN_CLUSTER_SIZE) -> List[List[int]]:
+	"""Cluster near-duplicate texts with MinHash + LSH, returning index lists of size `min_size`+, largest first.
+
+	Messages sharing any LSH bucket are linked and the connected components are found by vectorized min-label
+	propagation, so the whole pass stays roughly linear in the number of messages.
+	"""
+	if len(texts) == 0:
+		return []
+
+	clusters = _components(minhash_signatures(texts), min_size)
+	clusters.sort(key=len, reverse=True)
+	return clusters
+
+
+def near_duplicate_representatives(
+	texts: Sequence[str], min_similarity: float = NEAR_DUPLICATE_SIMILARITY
+) -> List[int]:
+	"""For each text, the index of the first text it is a near-duplicate of (itself if none comes before it).
+
+	LSH components can chain loosely related posts together, so within a component a text only joins an earlier
+	representative whose MinHash signature agrees on at least `min_similarity` of the permutations, an estimate of
+	their shingle Jaccard similarity.
+	"""
+	representatives = list(range(len(texts)))
+	if len(texts) < 2:
+		return representatives
+
+	signatures = minhash_signatures(texts)
+	for cluster in _components(signatures, 2):
+		heads = np.empty(len(cluster), dtype=np.intp)
+		head_signatures = np.empty((len(cluster), NUM_PERMUTATIONS), dtype=signatures.dtype)
+		n_heads = 0
+		for i in cluster:
+			agreement = (head_signatures[:n_heads] == signatures[i]).mean(axis=1)
+			similar = np.flatnonzero(agreement >= min_similarity)
+			if len(similar):
+				representatives[i] = int(heads[similar[0]])
+			else:
+				heads[n_heads] = i
+				head_signatures[n_heads] = signatures[i]
+				n_heads += 1
+	return representatives
+
+
+def detect_bot_shill(messages: Sequence[Dict[str, str]], min_size: int = MIN_CLUSTER_SIZE) -> Dict:
+	"""Deterministic Bot/Shill Probability metric from near-duplicate clusters.
+
+	The score is the share of substantive messages that belong to a repetition cluster (saturating like the other
+	qualitative scores), and the supporting messages are one representative of each of the largest clusters.
+	"""
+	texts = []
+	originals = []
+	for msg in messages:
+		normalized = normalize_text(msg['text'] or '')
+		if not is_trivial(normalized):
+			texts.append(normalized)
+			originals.append(msg['text'])
+
+	clusters = find_near_duplicate_clusters(texts, min_size)
+	clustered = sum(len(cluster) for cluster in clusters)
+
+	return {
+		'score': qualitative(clustered, len(texts)),
+		'explanation': (
+			f'{clustered} of {len(texts)} substantive messages fall into {len(clusters)} clusters of '
+			f'{min_size}+ near-identical posts, a pattern typical of coordinated bot or shill activity.'
+		),
+		'supporting_messages': [originals[cluster[0]] for cluster in clusters[:3]],
+	}
@@ -0,0 +1,324 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from tg_vibe_check.core.batch import MessageBatch
+
+
+def get_data_dir() -> Path:
+	"""Directory for local state (message store, caches). Override with the TG_VIBE_CHECK_HOME env variable."""
+	path = Path(os.getenv('TG_VIBE_CHECK_HOME', Path.home() / '.tg_vibe_check'))
+	path.mkdir(parents=True, exist_ok=True)
+	return path
+
+
+class MessageStore:
+	"""SQLite-backed store of channel messages keyed by (channel, message id)."""
+
+	def __init__(self, path: Optional[str] = None):
+		self.path = str(path or get_data_dir() / 'messages.db')
+		Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(self.path, check_same_thread=False)
+		self._conn.execute('PRAGMA journal_mode=WAL')
+		self._conn.execute(
+			"""
+			CREATE TABLE IF NOT EXISTS messages (
+				channel TEXT NOT NULL,
+				id INTEGER NOT NULL,
+				date TEXT NOT NULL,
+				text TEXT NOT NULL,
+				views TEXT NOT NULL,
+				PRIMARY KEY (channel, id)
+			) WITHOUT ROWID
+			"""
+		)
+		# A gap at `above` means the messages just below that id were never fetched, down to the next stored one.
+		self._conn.execute(
+			"""
+			CREATE TABLE IF NOT EXISTS gaps (
+				channel TEXT NOT NULL,
+				above INTEGER NOT NULL,
+				PRIMARY KEY (channel, above)
+			) WITHOUT ROWID
+			"""
+		)
+		self._conn.commit()
+
+	def add_messages(self, channel: str, messages: Iterable[Dict[str, str]]) -> None:
+		"""Insert messages, refreshing text and views of ones already stored (edits, view counts)."""
+		rows = [(channel, int(msg['id']), msg['date'], msg['text'] or '', str(msg['views'])) for msg in messages]
+		with self._lock, self._conn:
+			self._conn.executemany(
+				"""
+				INSERT INTO messages (channel, id, date, text, views) VALUES (?, ?, ?, ?, ?)
+				ON CONFLICT (channel, id) DO UPDATE SET text = excluded.text, views = excluded.views
+				""",
+				rows,
+			)
+
+	def high_water_mark(self, channel: str) -> Optional[int]:
+		"""Highest stored message id for the channel, or None if nothing is stored yet."""
+		with self._lock:
+			return self._conn.execute('SELECT MAX(id) FROM messages WHERE channel = ?', (channel,)).fetchone()[0]
+
+	def low_water_mark(self, channel: str) -> Optional[int]:
+		"""Lowest stored message id for the channel, or None if nothing is stored yet."""
+		with self._lock:
+			return self._conn.execute('SELECT MIN(id) FROM messages WHERE channel = ?', (channel,)).fetchone()[0]
+
+	def high_water_mark_below(self, channel: str, max_id: int) -> Optional[int]:
+		"""Highest stored message id below `max_id`, or None if there is none."""
+		with self._lock:
+			return self._conn.execute(
+				'SELECT MAX(id) FROM messages WHERE channel = ? AND id < ?', (channel, max_id)
+			).fetchone()[0]
+
+	def add_gap(self, channel: str, above: int) -> None:
+		"""Record that messages just below id `above` are missing, so they aren't served as part of the window."""
+		with self._lock, self._conn:
+			self._conn.execute('INSERT OR IGNORE INTO gaps (channel, above) VALUES (?, ?)', (channel, above))
+
+	def close_gap(self, channel: str, above: int) -> None:
+		with self._lock, self._conn:
+			self._conn.execute('DELETE FROM gaps WHERE channel = ? AND above = ?', (channel, above))
+
+	def contiguous_from(self, channel: str) -> Optional[int]:
+		"""Lowest id of the newest run of stored messages without a gap, or None if no gap was recorded."""
+		with self._lock:
+			return self._conn.execute('SELECT MAX(above) FROM gaps WHERE channel = ?', (channel,)).fetchone()[0]
+
+	def count(self, channel: str) -> int:
+		with self._lock:
+			return self._conn.execute('SELECT COUNT(*) FROM messages WHERE channel = ?', (channel,)).fetchone()[0]
+
+	def get_messages(self, channel: str, limit: int) -> MessageBatch:
+		"""Get the newest `limit` messages, newest first, in the same shape `get_tg_messages` returns.
+
+		Only messages above the newest recorded gap are returned, so the window never skips over missing ones.
+		"""
+		with self._lock:
+			rows = self._conn.execute(
+				"""
+				SELECT id, date, text, views FROM messages
+				WHERE channel = ? AND id >= COALESCE((SELECT MAX(above) FROM gaps WHERE channel = ?), 0)
+				ORDER BY id DESC LIMIT ?
+				""",
+				(channel, channel, limit),
+			).fetchall()
+		return MessageBatch.from_rows(rows)
+
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_message_store() -> MessageStore:
+	"""Get the process-wide message store at the default location."""
+	global _default_store
+	with _default_store_lock:
+		if _default_store is None:
+			_default_store = MessageStore()
+		return _default_store
+
+
+class ReportStore:
+	"""SQLite-backed history of vibe check reports per channel, plus how often each channel is viewed."""
+
+	def __init__(self, path: Optional[str] = None, history: int = 20):
+		self.path = str(path or get_data_dir() / 'reports.db')
+		Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+		self.history = history
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(self.path, check_same_thread=False)
+		self._conn.execute('PRAGMA journal_mode=WAL')
+		self._conn.execute(
+			"""
+			CREATE TABLE IF NOT EXISTS reports (
+				id INTEGER PRIMARY KEY AUTOINCREMENT,
+				channel TEXT NOT NULL,
+				created_at REAL NOT NULL,
+				report TEXT NOT NULL,
+				meta TEXT NOT NULL
+			)
+			"""
+		)
+		self._conn.execute('CREATE INDEX IF NOT EXISTS reports_channel ON reports (channel, created_at)')
+		self._conn.execute(
+			"""
+			CREATE TABLE IF NOT EXISTS views (
+				channel TEXT PRIMARY KEY,
+				views INTEGER NOT NULL,
+				last_viewed_at REAL NOT NULL
+			)
+			"""
+		)
+		self._conn.commit()
+
+	def save_report(self, channel: str, report: Dict, meta: Optional[Dict] = None) -> None:
+		"""Store a new report for the channel, keeping only the latest `history` reports."""
+		with self._lock, self._conn:
+			self._conn.execute(
+				'INSERT INTO reports (channel, created_at, report, meta) VALUES (?, ?, ?, ?)',
+				(channel, time.time(), json.dumps(report, ensure_ascii=False), json.dumps(meta or {})),
+			)
+			self._conn.execute(
+				"""
+				DELETE FROM reports WHERE channel = ? AND id NOT IN (
+					SELECT id FROM reports WHERE channel = ? ORDER BY created_at DESC LIMIT ?
+				)
+				""",
+				(channel, channel, self.history),
+			)
+
+	def latest_report(self, channel: str) -> Optional[Dict]:
+		"""The newest report as {'report', 'created_at', 'meta'}, or None if the channel was never analyzed."""
+		with self._lock:
+			row = self._conn.execute(
+				'SELECT report, created_at, meta FROM reports WHERE channel = ? ORDER BY created_at DESC LIMIT 1',
+				(channel,),
+			).fetchone()
+		if row is None:
+			return None
+		return {'report': json.loads(row[0]), 'created_at': row[1], 'meta': json.loads(row[2])}
+
+	def last_refreshed(self) -> Dict[str, float]:
+		"""Creation time of the newest report of every channel."""
+		with self._lock:
+			rows = self._conn.execute('SELECT channel, MAX(created_at) FROM reports GROUP BY channel').fetchall()
+		return dict(rows)
+
+	def record_view(self, channel: str) -> None:
+		with self._lock, self._conn:
+			self._conn.execute(
+				"""
+				INSERT INTO views (channel, views, last_viewed_at) VALUES (?, 1, ?)
+				ON CONFLICT (channel) DO UPDATE SET views = views + 1, last_viewed_at = excluded.last_viewed_at
+				""",
+				(channel, time.time()),
+			)
+
+	def popularity(self) -> Dict[str, int]:
+		"""View counts per channel."""
+		with self._lock:
+			return dict(self._conn.execute('SELECT channel, views FROM views').fetchall())
+
+
+_default_report_store = None
+
+
+def get_report_store() -> ReportStore:
+	"""Get the process-wide report store at the default location."""
+	global _default_report_store
+	with _default_store_lock:
+		if _default_report_store is None:
+			_default_report_store = ReportStore()
+		return _default_report_store
+
+
+def _text_hash(text: str) -> str:
+	return hashlib.sha1((text or '').encode()).hexdigest()
+
+
+class LabelStore:
+	"""SQLite-backed per-message classification labels, keyed by channel, message id, model and prompt version.
+
+	Each entry remembers a hash of the text it was classified from, so edited messages are treated as unseen.
+	"""
+
+	# Stay well below SQLite's bound-parameter limit when looking up many ids at once.
+	_LOOKUP_BATCH = 500
+
+	def __init__(self, path: Optional[str] = None):
+		self.path = str(path or get_data_dir() / 'labels.db')
+		Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(self.path, check_same_thread=False)
+		self._conn.execute('PRAGMA journal_mode=WAL')
+		self._conn.execute(
+			"""
+			CREATE TABLE IF NOT EXISTS labels (
+				channel TEXT NOT NULL,
+				id INTEGER NOT NULL,
+				model TEXT NOT NULL,
+				prompt_version TEXT NOT NULL,
+				text_hash TEXT NOT NULL,
+				labels TEXT NOT NULL,
+				PRIMARY KEY (channel, id, model, prompt_version)
+			) WITHOUT ROWID
+			"""
+		)
+		self._conn.commit()
+
+	def get_labels(
+		self, channel: str, messages: Sequence[Dict[str, str]], model: str, prompt_version: str
+	) -> Dict[str, List[str]]:
+		"""Stored labels of the given messages by message id, leaving out unseen and edited ones."""
+		hashes = {msg['id']: _text_hash(msg['text']) for msg in messages}
+		ids = [int(id_) for id_ in hashes]
+		found = {}
+		with self._lock:
+			for start in range(0, len(ids), self._LOOKUP_BATCH):
+				batch = ids[start : start + self._LOOKUP_BATCH]
+				rows = self._conn.execute(
+					f"""
+					SELECT id, text_hash, labels FROM labels
+					WHERE channel = ? AND model = ? AND prompt_version = ? AND id IN ({','.join('?' * len(batch))})
+					""",
+					(channel, model, prompt_version, *batch),
+				).fetchall()
+				for id_, text_hash, labels in rows:
+					if hashes[str(id_)] == text_hash:
+						found[str(id_)] = json.loads(labels)
+		return found
+
+	def set_labels(
+		self,
+		channel: str,
+		messages: Sequence[Dict[str, str]],
+		labels: Sequence[List[str]],
+		model: str,
+		prompt_version: str,
+	) -> None:
+		"""Store the labels of each message, replacing any from an older version of its text."""
+		rows = [
+			(channel, int(msg['id']), model, prompt_version, _text_hash(msg['text']), json.dumps(message_labels))
+			for msg, message_labels in zip(messages, labels)
+		]
+		with self._lock, self._conn:
+			self._conn.executemany(
+				"""
+				INSERT OR REPLACE INTO labels (channel, id, model, prompt_version, text_hash, labels)
+				VALUES (?, ?, ?, ?, ?, ?)
+				""",
+				rows,
+			)
+
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+
+_default_label_store = None
+
+
+def get_label_store() -> LabelStore:
+	"""Get the process-wide label store at the default location."""
+	global _default_label_store
+	with _default_store_lock:
+		if _default_label_store is None:
+			_default_label_store = LabelStore()
+		return _default_label_store
@@ -0,0 +1,187 @@
+import json
+import logging
+import time
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from tg_vibe_check.core.cache import ResultCache
+from tg_vibe_check.core.cache import make_cache_key
+from tg_vibe_check.core.completion import completion
+from tg_vibe_check.core.llm import DEFAULT_MODEL
+from tg_vibe_check.core.preprocess import to_prompt_records
+from tg_vibe_check.core.prompt import PROMPT_VERSION
+from tg_vibe_check.core.prompt_compiler import compile_prompt
+from tg_vibe_check.telemetry import record_llm_usage
+from tg_vibe_check.telemetry import record_span
+from tg_vibe_check.telemetry import span
+from tg_vibe_check.telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+ANSWER_OPEN = '<answer>'
+
+# (section key, metric key, metric object), e.g. ('red_flag_detection', 'rugpull_anxiety_index', {'score': 1, ...})
+MetricEvent = Tuple[str, str, Dict]
+
+
+class AnswerStreamParser:
+	"""Incremental parser that pulls metric objects out of a streamed `<answer>` JSON block.
+
+	Text before `<answer>` (the scratchpad) is skipped without being kept around. Inside the answer a small JSON
+	scanner tracks nesting depth and strings, and each metric object, i.e. a value at depth three such as
+	`answer[section][metric]`, is decoded and emitted as soon as its closing brace arrives.
+	"""
+
+	def __init__(self):
+		self.in_answer = False
+		self.done = False
+		self._pending = ''  # tail that may hold a partial `<answer>` tag
+		self._answer = []  # answer characters seen so far
+		self._depth = 0
+		self._in_string = False
+		self._escaped = False
+		self._string_start = 0
+		self._last_string = None
+		self._section = None
+		self._metric = None
+		self._metric_start = None
+
+	def feed(self, text: str) -> List[MetricEvent]:
+		"""Consume the next piece of streamed text and return the metrics completed by it."""
+		if self.done or not text:
+			return []
+
+		if not self.in_answer:
+			self._pending += text
+			start = self._pending.find(ANSWER_OPEN)
+			if start == -1:
+				self._pending = self._pending[-(len(ANSWER_OPEN) - 1) :]
+				return []
+			self.in_answer = True
+			text = self._pending[start + len(ANSWER_OPEN) :]
+			self._pending = ''
+
+		events = []
+		for char in text:
+			self._answer.append(char)
+			position = len(self._answer) - 1
+
+			if self._in_string:
+				if self._escaped:
+					self._escaped = False
+				elif char == '\\':
+					self._escaped = True
+				elif char == '"':
+					self._in_string = False
+					self._last_string = json.loads(''.join(self._answer[self._string_start : position + 1]))
+				continue
+
+			if char == '"':
+				self._in_string = True
+				self._string_start = position
+			elif char == ':':
+				if self._depth == 1:
+					self._section = self._last_string
+				elif self._depth == 2:
+					self._metric = self._last_string
+			elif char == '{':
+				self._depth += 1
+				if self._depth == 3:
+					self._metric_start = position
+			elif char == '}':
+				if self._depth == 3 and self._metric_start is not None:
+					metric = json.loads(''.join(self._answer[self._metric_start : position + 1]))
+					events.append((self._section, self._metric, metric))
+					self._metric_start = None
+				self._depth -= 1
+				if self._depth == 0:
+					self.done = True
+					break
+		return events
+
+	def result(self) -> Dict:
+		"""The complete answer object; only valid once `done` is set."""
+		return json.loads(''.join(self._answer).strip())
+
+
+def stream_tg_vibe(
+	messages: List[Dict[str, str]],
+	model: str = DEFAULT_MODEL,
+	temperature: float = 0.1,
+	cache: Optional[ResultCache] = None,
+	max_message_tokens: Optional[int] = None,
+) -> Iterator[MetricEvent]:
+	"""Streaming variant of `analyze_tg_vibe`: yields each metric as soon as the model has written it.
+
+	Shares its cache entries with the single-pass mode of `analyze_tg_vibe`; on a hit all metrics are yielded at once.
+	"""
+
+	cache_key = None
+	if cache is not None:
+		cache_key = make_cache_key(
+			messages,
+			model,
+			temperature,
+			PROMPT_VERSION,
+			mode='single',
+			max_message_tokens=str(max_message_tokens),
+		)
+		cached = cache.get(cache_key)
+		if cached is not None:
+			for section, metrics in cached.items():
+				for metric, value in metrics.items():
+					yield section, metric, value
+			return
+
+	with span('llm.prompt_build', messages=len(messages)):
+		llm_messages, stats = compile_prompt(to_prompt_records(messages), max_message_tokens=max_message_tokens)
+	logger.info('Vibe check prompt: %s', stats)
+
+	# Only time spent on the model counts towards `llm.stream`, not the consumer handling each yielded metric.
+	waited = 0.0
+	error = None
+	try:
+		started = time.perf_counter()
+		response = completion(
+			model=model,
+			messages=llm_messages,
+			temperature=temperature,
+			stream=True,
+			stream_options={'include_usage': True},
+		)
+		chunks = iter(response)
+		waited = time.perf_counter() - started
+
+		parser = AnswerStreamParser()
+		usage = None
+		first_token = True
+		# Read past the answer too: the usage totals arrive with the last chunk.
+		while True:
+			started = time.perf_counter()
+			chunk = next(chunks, None)
+			waited += time.perf_counter() - started
+			if chunk is None:
+				break
+			usage = getattr(chunk, 'usage', None) or usage
+			if parser.done or not chunk.choices:
+				continue
+			text = chunk.choices[0].delta.content or ''
+			if text and first_token:
+				telemetry.observe('llm.first_token', waited)
+				first_token = False
+			yield from parser.feed(text)
+	except BaseException as e:
+		error = type(e).__name__
+		raise
+	finally:
+		record_span('llm.stream', waited, error, model=model)
+	record_llm_usage(model, usage, 'llm.stream')
+
+	if not parser.done:
+		raise ValueError('Model response ended before a complete <answer> block')
+
+	if cache is not None:
+		cache.set(cache_key, parser.result())
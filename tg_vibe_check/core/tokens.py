@@ -0,0 +1,7 @@
+# Rough token cost: ~4 characters per token for English chat text.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+	"""Cheap token estimate that doesn't need a tokenizer."""
+	return len(text) // CHARS_PER_TOKEN + 1
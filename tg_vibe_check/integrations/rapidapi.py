@@ -1,55 +1,276 @@
+import asyncio
+import logging
+import math
 import os
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Optional
 
 import requests
-import streamlit as st
+from requests.adapters import HTTPAdapter
 
+from tg_vibe_check.config import get_secret
+from tg_vibe_check.core.batch import MessageBatch
+from tg_vibe_check.core.store import MessageStore
+from tg_vibe_check.integrations.ratelimit import Limiter
+from tg_vibe_check.integrations.ratelimit import SharedTokenBucket
+from tg_vibe_check.integrations.resilience import CircuitBreaker
+from tg_vibe_check.integrations.resilience import call_with_retries
+from tg_vibe_check.integrations.resilience import call_with_retries_async
+from tg_vibe_check.telemetry import span
 
-def get_tg_messages(channel: str, limit: int = 50, max_id: int = 999999999) -> List[Dict[str, str]]:
-	"""Get messages from a Telegram channel using RapidAPI."""
+logger = logging.getLogger(__name__)
+
+RAPIDAPI_HOST = 'telegram-channel.p.rapidapi.com'
+# Point at a stand-in server (e.g. the one in benchmarks/) with the RAPIDAPI_BASE_URL env variable.
+RAPIDAPI_BASE_URL = os.getenv('RAPIDAPI_BASE_URL', f'https://{RAPIDAPI_HOST}')
+MESSAGES_URL = f'{RAPIDAPI_BASE_URL}/channel/message'
+MAX_MESSAGE_ID = 999999999
+PAGE_SIZE = 50
+# How far `get_tg_messages_incremental` pages down to reach the stored messages before leaving a gap below.
+MAX_CATCHUP_PAGES = 40
+
+# RapidAPI allows 1 req/s per key; every fetch on this host (all processes) draws from the same bucket, kept in
+# quota.db in the data directory. Pass `rate_limiter.with_priority(BACKGROUND)` for work nobody is waiting on.
+rate_limiter = SharedTokenBucket('rapidapi', rate=1.0, capacity=1)
+
+# Connect and read timeouts of one request, and the time budget for a page including retries, in seconds.
+REQUEST_TIMEOUT = (5.0, 30.0)
+PAGE_DEADLINE = 90.0
+
+# Fails fetches fast while RapidAPI is down instead of letting every page wait out its retries.
+breaker = CircuitBreaker('rapidapi')
+
+_session = None
+_session_lock = threading.Lock()
 
-	try:
-		api_key = st.secrets['RAPID_API']
-	except KeyError:
-		# Fallback to environment variable for local development without secrets.toml
-		api_key = os.getenv('RAPID_API')
-		if not api_key:
-			raise ValueError('RAPID_API not found in st.secrets or environment variables')
 
-	url = 'https://telegram-channel.p.rapidapi.com/channel/message'
+def get_session() -> requests.Session:
+	"""Get the shared HTTP session so connections to RapidAPI are pooled and kept alive between pages."""
+	global _session
+	with _session_lock:
+		if _session is None:
+			_session = requests.Session()
+			_session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=16))
+		return _session
 
+
+def _get_api_key() -> str:
+	return get_secret('RAPID_API')
+
+
+def _request_page(channel: str, limit: int, max_id: int, session: Optional[requests.Session]) -> List[Dict]:
+	"""One request for a raw page of messages, raising on HTTP errors."""
+	session = session or get_session()
 	querystring = {'channel': channel, 'limit': str(limit), 'max_id': str(max_id)}
+	headers = {'x-rapidapi-key': _get_api_key(), 'x-rapidapi-host': RAPIDAPI_HOST}
+	with span('rapidapi.request', channel=channel) as fields:
+		response = session.get(MESSAGES_URL, headers=headers, params=querystring, timeout=REQUEST_TIMEOUT)
+		response.raise_for_status()
+		page = response.json()
+		fields['messages'] = len(page)
+	return page
+
+
+def _fetch_page(
+	channel: str, limit: int, max_id: int, session: Optional[requests.Session], limiter: Optional[Limiter]
+) -> List[Dict]:
+	"""Fetch one raw page of messages, waiting on the rate limiter before each attempt.
+
+	Timeouts, connection errors, 429 and 5xx responses are retried with backoff, honoring Retry-After.
+	"""
+
+	def attempt() -> List[Dict]:
+		if limiter is not None:
+			with span('rapidapi.rate_limit_wait'):
+				limiter.acquire()
+		return _request_page(channel, limit, max_id, session)
+
+	return call_with_retries(attempt, 'rapidapi', deadline=PAGE_DEADLINE, breaker=breaker)
+
+
+async def _fetch_page_async(
+	channel: str, limit: int, max_id: int, session: Optional[requests.Session], limiter: Optional[Limiter]
+) -> List[Dict]:
+	"""Asyncio variant of `_fetch_page`: waits on the rate limiter before each attempt without blocking the event
+	loop, and makes the request in a worker thread."""
+
+	async def attempt() -> List[Dict]:
+		if limiter is not None:
+			with span('rapidapi.rate_limit_wait'):
+				await limiter.acquire_async()
+		return await asyncio.to_thread(_request_page, channel, limit, max_id, session)
+
+	return await call_with_retries_async(attempt, 'rapidapi', deadline=PAGE_DEADLINE, breaker=breaker)
+
+
+def get_tg_messages(
+	channel: str,
+	limit: int = PAGE_SIZE,
+	max_id: int = MAX_MESSAGE_ID,
+	session: Optional[requests.Session] = None,
+	limiter: Optional[Limiter] = rate_limiter,
+) -> MessageBatch:
+	"""Get messages from a Telegram channel using RapidAPI."""
 
-	headers = {'x-rapidapi-key': api_key, 'x-rapidapi-host': 'telegram-channel.p.rapidapi.com'}
+	return MessageBatch.from_messages(_fetch_page(channel, limit, max_id, session, limiter))
 
-	response = requests.get(url, headers=headers, params=querystring)
-	response.raise_for_status()
 
-	messages = response.json()
+def iter_tg_message_pages(
+	channel: str,
+	pages: int,
+	page_size: int = PAGE_SIZE,
+	max_id: int = MAX_MESSAGE_ID,
+	session: Optional[requests.Session] = None,
+	limiter: Optional[Limiter] = rate_limiter,
+	until_id: Optional[int] = None,
+) -> Iterator[MessageBatch]:
+	"""Yield pages of messages, newest first, with the next request already in flight.
 
-	return [
-		{'id': message['id'], 'date': message['date'], 'text': message['text'], 'views': message['views']}
-		for message in messages
-	]
+	As soon as a page arrives its min id is known, so the request for the following page is submitted (subject to
+	the rate limiter) before the current page is handed to the caller. Downstream work on one page therefore
+	overlaps with the network round trip for the next. Paging stops once a page reaches message ids at or below
+	`until_id`.
+	"""
 
+	if pages <= 0:
+		return
 
-def get_tg_messages_bulk(channel: str, batch_size: int = 4) -> List[Dict[str, str]]:
+	with ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'rapidapi-{channel}') as executor:
+		pending = executor.submit(_fetch_page, channel, page_size, max_id, session, limiter)
+		while pending is not None:
+			page = MessageBatch.from_messages(pending.result())
+			pending = None
+			if not page:
+				break
+
+			pages -= 1
+			next_max_id = page.next_max_id()
+			if pages > 0 and (until_id is None or next_max_id > until_id):
+				pending = executor.submit(_fetch_page, channel, page_size, next_max_id, session, limiter)
+
+			yield page
+
+
+def get_tg_messages_bulk(
+	channel: str,
+	batch_size: int = 4,
+	pipelined: bool = True,
+	session: Optional[requests.Session] = None,
+	limiter: Optional[Limiter] = rate_limiter,
+) -> MessageBatch:
 	"""Get multiple batches of messages from a Telegram channel using RapidAPI."""
 
-	all_messages = []
-	current_max_id = 999999999
+	if pipelined:
+		return MessageBatch.concat(iter_tg_message_pages(channel, batch_size, session=session, limiter=limiter))
+
+	pages = []
+	current_max_id = MAX_MESSAGE_ID
+	for _ in range(batch_size):
+		page = MessageBatch.from_messages(_fetch_page(channel, PAGE_SIZE, current_max_id, session, limiter))
+		if not page:
+			break
+
+		pages.append(page)
+		current_max_id = page.next_max_id()
+
+	return MessageBatch.concat(pages)
+
+
+def get_tg_messages_incremental(
+	channel: str,
+	store: MessageStore,
+	batch_size: int = 4,
+	session: Optional[requests.Session] = None,
+	limiter: Optional[Limiter] = rate_limiter,
+	max_catchup_pages: int = MAX_CATCHUP_PAGES,
+) -> MessageBatch:
+	"""Get the newest `batch_size` pages worth of messages, fetching only what the local store doesn't have yet.
+
+	Pages are requested from the top of the channel until they reach the store's high-water mark, even when more than
+	`batch_size` pages were posted since the last poll, so the stored messages stay contiguous; then the window is
+	served from disk. If the window holds fewer messages than requested it is extended below its oldest message.
+	When the new messages don't reach the stored ones within `max_catchup_pages`, the gap left between them is
+	recorded and only the messages above it are served; nothing is deleted. Pass `batch_size` as `max_catchup_pages`
+	when a user is waiting, to bound the fetch.
+	"""
 
-	for i in range(batch_size):
-		if i > 0:
-			time.sleep(1)  # 1 req/s limit
+	limit = batch_size * PAGE_SIZE
+	high_water_mark = store.high_water_mark(channel)
+	pages = batch_size if high_water_mark is None else max(batch_size, max_catchup_pages)
 
-		batch = get_tg_messages(channel, 50, current_max_id)
-		if not batch:
+	pages_fetched = 0
+	next_max_id = None
+	for page in iter_tg_message_pages(channel, pages, session=session, limiter=limiter, until_id=high_water_mark):
+		store.add_messages(channel, page)
+		pages_fetched += 1
+		next_max_id = page.next_max_id()
+
+	if high_water_mark is not None and pages_fetched == pages and next_max_id > high_water_mark:
+		logger.warning(
+			'%s posted more than %d pages since the last fetch, leaving a gap down to id %d',
+			channel,
+			pages,
+			high_water_mark,
+		)
+		store.add_gap(channel, next_max_id + 1)
+
+	window = store.get_messages(channel, limit)
+	missing = limit - len(window)
+	if high_water_mark is not None and missing > 0 and pages_fetched < batch_size:
+		pages = min(batch_size - pages_fetched, math.ceil(missing / PAGE_SIZE))
+		# Below the window is either the start of the stored history or a gap, which this may fill.
+		gap = store.contiguous_from(channel)
+		below = None if gap is None else store.high_water_mark_below(channel, gap)
+		next_max_id = None
+		for page in iter_tg_message_pages(
+			channel, pages, max_id=int(window.ids.min()) - 1, session=session, limiter=limiter, until_id=below
+		):
+			store.add_messages(channel, page)
+			next_max_id = page.next_max_id()
+		if gap is not None and (below is None or (next_max_id is not None and next_max_id <= below)):
+			store.close_gap(channel, gap)
+		window = store.get_messages(channel, limit)
+
+	return window
+
+
+async def get_tg_messages_bulk_async(
+	channel: str,
+	batch_size: int = 4,
+	session: Optional[requests.Session] = None,
+	limiter: Optional[Limiter] = rate_limiter,
+) -> MessageBatch:
+	"""Asyncio variant of `get_tg_messages_bulk`; waits on the rate limiter without blocking the event loop."""
+
+	pages = []
+	current_max_id = MAX_MESSAGE_ID
+
+	for _ in range(batch_size):
+		page = MessageBatch.from_messages(await _fetch_page_async(channel, PAGE_SIZE, current_max_id, session, limiter))
+		if not page:
 			break
 
-		all_messages.extend(batch)
-		current_max_id = int(min(message['id'] for message in batch)) - 1
+		pages.append(page)
+		current_max_id = page.next_max_id()
+
+	return MessageBatch.concat(pages)
+
+
+async def get_tg_messages_many_async(
+	channels: Iterable[str],
+	batch_size: int = 4,
+	session: Optional[requests.Session] = None,
+	limiter: Optional[Limiter] = rate_limiter,
+) -> Dict[str, MessageBatch]:
+	"""Fetch several channels concurrently; all requests share one rate limiter so the quota is never exceeded."""
 
-	return all_messages
+	channels = list(channels)
+	batches = await asyncio.gather(
+		*(get_tg_messages_bulk_async(channel, batch_size, session, limiter) for channel in channels)
+	)
+	return dict(zip(channels, batches))
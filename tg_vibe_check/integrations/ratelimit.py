@@ -0,0 +1,301 @@
+import asyncio
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+from typing import Union
+
+from tg_vibe_check.telemetry import telemetry
+
+
+class TokenBucket:
+	"""Thread-safe token bucket rate limiter.
+
+	Tokens refill continuously at `rate` per second up to `capacity`. Callers block only for the time it actually
+	takes for the next token to become available, so time spent waiting on the network counts towards the quota
+	instead of being slept on top of it.
+	"""
+
+	def __init__(self, rate: float, capacity: float = 1.0):
+		if rate <= 0:
+			raise ValueError('rate must be positive')
+		if capacity < 1:
+			raise ValueError('capacity must be at least 1')
+
+		self.rate = rate
+		self.capacity = capacity
+		self._tokens = capacity
+		self._updated_at = time.monotonic()
+		self._lock = threading.Lock()
+
+	def _reserve(self, tokens: float) -> float:
+		"""Take `tokens` from the bucket and return how long the caller must wait before using them."""
+		with self._lock:
+			now = time.monotonic()
+			self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+			self._updated_at = now
+
+			# Going negative reserves the tokens for this caller; later callers queue up behind the debt.
+			self._tokens -= tokens
+			if self._tokens >= 0:
+				return 0.0
+			return -self._tokens / self.rate
+
+	def acquire(self, tokens: float = 1.0) -> float:
+		"""Block until `tokens` are available. Returns the time spent waiting in seconds."""
+		wait = self._reserve(tokens)
+		if wait > 0:
+			time.sleep(wait)
+		return wait
+
+	async def acquire_async(self, tokens: float = 1.0) -> float:
+		"""Asyncio variant of `acquire` that yields to the event loop instead of blocking the thread."""
+		wait = self._reserve(tokens)
+		if wait > 0:
+			await asyncio.sleep(wait)
+		return wait
+
+
+# Priorities of `SharedTokenBucket` waiters, lower first: a user waiting on a report goes before scheduled refreshes.
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BACKGROUND: 'background'}
+
+
+class SharedTokenBucket:
+	"""Token bucket shared by every process on the host through a SQLite file, with a queue of waiters.
+
+	All Streamlit workers, CLI jobs and schedulers pointing at the same file draw from one quota. Waiters are served
+	by priority (`INTERACTIVE` before `BACKGROUND`), then round-robin between callers, so one long paging job can't
+	starve a short one, then in arrival order. The caller is the calling thread unless named; fetches run on one
+	thread per paging job, so each job is its own caller. Waiters of crashed processes stop heartbeating and are
+	dropped after `stale_after` seconds. Wait times are recorded in telemetry per priority.
+	"""
+
+	def __init__(
+		self,
+		name: str,
+		rate: float,
+		capacity: float = 1.0,
+		path: Optional[str] = None,
+		poll_interval: float = 0.25,
+		stale_after: float = 10.0,
+	):
+		if rate <= 0:
+			raise ValueError('rate must be positive')
+		if capacity < 1:
+			raise ValueError('capacity must be at least 1')
+
+		self.name = name
+		self.rate = rate
+		self.capacity = capacity
+		self.path = path
+		self.poll_interval = poll_interval
+		self.stale_after = stale_after
+		self._conn = None
+		self._lock = threading.Lock()
+
+	def _connect(self) -> sqlite3.Connection:
+		# Opened on first use, so importing modules that define a bucket doesn't touch the data directory.
+		if self._conn is None:
+			from tg_vibe_check.core.store import get_data_dir
+
+			self.path = str(self.path or get_data_dir() / 'quota.db')
+			Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+			conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+			conn.execute('PRAGMA journal_mode=WAL')
+			conn.executescript(
+				"""
+				CREATE TABLE IF NOT EXISTS buckets (
+					name TEXT PRIMARY KEY,
+					tokens REAL NOT NULL,
+					updated_at REAL NOT NULL
+				);
+				CREATE TABLE IF NOT EXISTS waiters (
+					id INTEGER PRIMARY KEY AUTOINCREMENT,
+					bucket TEXT NOT NULL,
+					caller TEXT NOT NULL,
+					priority INTEGER NOT NULL,
+					enqueued_at REAL NOT NULL,
+					heartbeat REAL NOT NULL
+				);
+				CREATE TABLE IF NOT EXISTS callers (
+					bucket TEXT NOT NULL,
+					caller TEXT NOT NULL,
+					served_at REAL NOT NULL,
+					PRIMARY KEY (bucket, caller)
+				) WITHOUT ROWID;
+				"""
+			)
+			self._conn = conn
+		return self._conn
+
+	@contextlib.contextmanager
+	def _transaction(self) -> Iterator[sqlite3.Connection]:
+		"""Exclusive write transaction across processes; BEGIN IMMEDIATE takes the lock up front."""
+		with self._lock:
+			conn = self._connect()
+			conn.execute('BEGIN IMMEDIATE')
+			try:
+				yield conn
+			except BaseException:
+				conn.execute('ROLLBACK')
+				raise
+			conn.execute('COMMIT')
+
+	def _enqueue(self, priority: int, caller: str) -> int:
+		now = time.time()
+		with self._transaction() as conn:
+			return conn.execute(
+				'INSERT INTO waiters (bucket, caller, priority, enqueued_at, heartbeat) VALUES (?, ?, ?, ?, ?)',
+				(self.name, caller, priority, now, now),
+			).lastrowid
+
+	def _dequeue(self, ticket: int) -> None:
+		with self._transaction() as conn:
+			conn.execute('DELETE FROM waiters WHERE id = ?', (ticket,))
+
+	def _poll(self, ticket: int, caller: str, tokens: float) -> float:
+		"""Take the tokens if `ticket` is at the head of the queue and they are available, returning 0; otherwise
+		return how long to sleep before polling again."""
+		with self._transaction() as conn:
+			now = time.time()
+			conn.execute('DELETE FROM waiters WHERE bucket = ? AND heartbeat < ?', (self.name, now - self.stale_after))
+			conn.execute('UPDATE waiters SET heartbeat = ? WHERE id = ?', (now, ticket))
+
+			row = conn.execute('SELECT tokens, updated_at FROM buckets WHERE name = ?', (self.name,)).fetchone()
+			available, updated_at = row if row is not None else (self.capacity, now)
+			available = min(self.capacity, available + max(0.0, now - updated_at) * self.rate)
+
+			# Priority first, then the caller served longest ago (new callers first), then arrival order.
+			head = conn.execute(
+				"""
+				SELECT w.id FROM waiters w
+				LEFT JOIN callers c ON c.bucket = w.bucket AND c.caller = w.caller
+				WHERE w.bucket = ?
+				ORDER BY w.priority, COALESCE(c.served_at, 0), w.id
+				LIMIT 1
+				""",
+				(self.name,),
+			).fetchone()
+			if head is None or head[0] != ticket:
+				# Dropped as stale after a long pause (e.g. a suspended process): queue again at the back.
+				if conn.execute('SELECT 1 FROM waiters WHERE id = ?', (ticket,)).fetchone() is None:
+					raise _Requeue()
+				return min(self.poll_interval, max(0.01, (tokens - available) / self.rate))
+			if available < tokens:
+				return min(self.poll_interval, (tokens - available) / self.rate)
+
+			conn.execute(
+				'INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+				(self.name, available - tokens, now),
+			)
+			conn.execute('DELETE FROM waiters WHERE id = ?', (ticket,))
+			conn.execute(
+				'INSERT OR REPLACE INTO callers (bucket, caller, served_at) VALUES (?, ?, ?)', (self.name, caller, now)
+			)
+			conn.execute('DELETE FROM callers WHERE bucket = ? AND served_at < ?', (self.name, now - 3600))
+			return 0.0
+
+	def _caller(self, caller: Optional[str]) -> str:
+		return f'{os.getpid()}:{caller or threading.get_ident()}'
+
+	def _record(self, priority: int, waited: float) -> None:
+		telemetry.observe(f'{self.name}.quota_wait.{PRIORITY_NAMES.get(priority, priority)}', waited)
+
+	def acquire(self, tokens: float = 1.0, priority: int = INTERACTIVE, caller: Optional[str] = None) -> float:
+		"""Block until this caller's turn comes and `tokens` are available. Returns the time spent waiting."""
+		caller = self._caller(caller)
+		started = time.monotonic()
+		while True:
+			ticket = self._enqueue(priority, caller)
+			try:
+				while (wait := self._poll(ticket, caller, tokens)) > 0:
+					time.sleep(wait)
+				break
+			except _Requeue:
+				continue
+			except BaseException:
+				self._dequeue(ticket)
+				raise
+		waited = time.monotonic() - started
+		self._record(priority, waited)
+		return waited
+
+	async def acquire_async(
+		self, tokens: float = 1.0, priority: int = INTERACTIVE, caller: Optional[str] = None
+	) -> float:
+		"""Asyncio variant of `acquire`; the caller defaults to the current task rather than the thread.
+
+		The SQLite transactions can wait on other processes' locks, so they run in worker threads, never on the loop.
+		"""
+		caller = self._caller(caller or f'task-{id(asyncio.current_task())}')
+		started = time.monotonic()
+		while True:
+			ticket = await asyncio.to_thread(self._enqueue, priority, caller)
+			try:
+				while (wait := await asyncio.to_thread(self._poll, ticket, caller, tokens)) > 0:
+					await asyncio.sleep(wait)
+				break
+			except _Requeue:
+				continue
+			except BaseException:
+				await asyncio.to_thread(self._dequeue, ticket)
+				raise
+		waited = time.monotonic() - started
+		self._record(priority, waited)
+		return waited
+
+	def with_priority(self, priority: int, caller: Optional[str] = None) -> 'PrioritizedLimiter':
+		"""A limiter drawing from this bucket at `priority`, to pass wherever a `TokenBucket` is accepted."""
+		return PrioritizedLimiter(self, priority, caller)
+
+	def stats(self) -> Dict:
+		"""Tokens currently available and queued waiters per priority, across all processes."""
+		with self._lock:
+			conn = self._connect()
+			row = conn.execute('SELECT tokens, updated_at FROM buckets WHERE name = ?', (self.name,)).fetchone()
+			queued = conn.execute(
+				'SELECT priority, COUNT(*) FROM waiters WHERE bucket = ? GROUP BY priority', (self.name,)
+			).fetchall()
+		available = self.capacity
+		if row is not None:
+			available = min(self.capacity, row[0] + max(0.0, time.time() - row[1]) * self.rate)
+		return {
+			'tokens': available,
+			'queued': {PRIORITY_NAMES.get(priority, priority): count for priority, count in queued},
+		}
+
+	def close(self) -> None:
+		with self._lock:
+			if self._conn is not None:
+				self._conn.close()
+				self._conn = None
+
+
+class PrioritizedLimiter:
+	"""`SharedTokenBucket` bound to a priority and optionally a caller name, with the `TokenBucket` interface."""
+
+	def __init__(self, bucket: SharedTokenBucket, priority: int, caller: Optional[str] = None):
+		self.bucket = bucket
+		self.priority = priority
+		self.caller = caller
+
+	def acquire(self, tokens: float = 1.0) -> float:
+		return self.bucket.acquire(tokens, self.priority, self.caller)
+
+	async def acquire_async(self, tokens: float = 1.0) -> float:
+		return await self.bucket.acquire_async(tokens, self.priority, self.caller)
+
+
+class _Requeue(Exception):
+	pass
+
+
+# Anything with `acquire` and `acquire_async`, as taken by the RapidAPI fetch functions.
+Limiter = Union[TokenBucket, SharedTokenBucket, PrioritizedLimiter]
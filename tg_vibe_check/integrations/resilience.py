@@ -0,0 +1,287 @@
+import asyncio
+import logging
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from email.utils import parsedate_to_datetime
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+from typing import TypeVar
+
+from tg_vibe_check.telemetry import span
+from tg_vibe_check.telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class CircuitOpenError(RuntimeError):
+	"""Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+def status_code(error: BaseException) -> Optional[int]:
+	"""HTTP status of a requests or litellm error, if it carries one."""
+	status = getattr(error, 'status_code', None)
+	if status is None:
+		status = getattr(getattr(error, 'response', None), 'status_code', None)
+	return status if isinstance(status, int) else None
+
+
+def _network_errors() -> tuple:
+	# An error can only come from requests if it was imported, so it's looked up instead of imported here.
+	errors = (ConnectionError, TimeoutError)
+	requests = sys.modules.get('requests')
+	if requests is not None:
+		errors += (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+	return errors
+
+
+def is_transient(error: BaseException) -> bool:
+	"""Whether retrying could help: timeouts, connection errors, 408, 429 and 5xx responses.
+
+	Other OSErrors, such as a malformed response body or a missing local file, fail the same way every time.
+	"""
+	if isinstance(error, CircuitOpenError):
+		return False
+	status = status_code(error)
+	if status is not None:
+		return status in (408, 429) or status >= 500
+	return isinstance(error, _network_errors())
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+	"""Seconds the upstream asked to wait in the Retry-After header of an error response, if any."""
+	headers = getattr(getattr(error, 'response', None), 'headers', None) or getattr(
+		error, 'litellm_response_headers', None
+	)
+	value = headers.get('Retry-After') or headers.get('retry-after') if headers else None
+	if not value:
+		return None
+	try:
+		return max(0.0, float(value))
+	except ValueError:
+		pass
+	try:
+		return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+	except (TypeError, ValueError):
+		return None
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+	"""Full-jitter exponential backoff: uniform in [0, min(max_delay, base_delay * 2**attempt)]."""
+	return random.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+class CircuitBreaker:
+	"""Thread-safe circuit breaker that fails fast while an upstream keeps failing.
+
+	After `failure_threshold` consecutive transient failures the circuit opens and calls raise CircuitOpenError
+	without reaching the upstream. Once `reset_timeout` seconds have passed a single trial call is let through
+	(half-open); its success closes the circuit, its failure opens it again.
+	"""
+
+	def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+		self.name = name
+		self.failure_threshold = failure_threshold
+		self.reset_timeout = reset_timeout
+		self._failures = 0
+		self._opened_at = None
+		self._trial_in_flight = False
+		self._lock = threading.Lock()
+
+	@property
+	def state(self) -> str:
+		with self._lock:
+			if self._opened_at is None:
+				return 'closed'
+			return 'half-open' if time.monotonic() - self._opened_at >= self.reset_timeout else 'open'
+
+	def before_call(self) -> None:
+		"""Raise CircuitOpenError unless a call may go through now."""
+		with self._lock:
+			if self._opened_at is None:
+				return
+			remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+			if remaining > 0 or self._trial_in_flight:
+				raise CircuitOpenError(f'{self.name} circuit is open, retry in {max(remaining, 0):.0f}s')
+			self._trial_in_flight = True
+
+	def record_success(self) -> None:
+		with self._lock:
+			if self._opened_at is not None:
+				logger.info('%s circuit closed', self.name)
+			self._failures = 0
+			self._opened_at = None
+			self._trial_in_flight = False
+
+	def release_trial(self) -> None:
+		"""End a call whose failure says nothing about the upstream's health, leaving the circuit as it was."""
+		with self._lock:
+			self._trial_in_flight = False
+
+	def record_failure(self) -> None:
+		with self._lock:
+			self._failures += 1
+			if self._trial_in_flight or (self._opened_at is None and self._failures >= self.failure_threshold):
+				logger.warning('%s circuit opened after %d failures', self.name, self._failures)
+				telemetry.observe(f'{self.name}.circuit_open', 0.0)
+				self._opened_at = time.monotonic()
+			self._trial_in_flight = False
+
+	def call(self, fn: Callable[[], T]) -> T:
+		"""Call `fn` through the breaker. Transient failures count towards opening it, only successes close it."""
+		self.before_call()
+		try:
+			result = fn()
+		except Exception as e:
+			if is_transient(e):
+				self.record_failure()
+			else:
+				self.release_trial()
+			raise
+		self.record_success()
+		return result
+
+	async def call_async(self, fn: Callable[[], Awaitable[T]]) -> T:
+		"""Asyncio variant of `call` for a coroutine function."""
+		self.before_call()
+		try:
+			result = await fn()
+		except Exception as e:
+			if is_transient(e):
+				self.record_failure()
+			else:
+				self.release_trial()
+			raise
+		self.record_success()
+		return result
+
+
+def call_with_retries(
+	fn: Callable[[], T],
+	name: str,
+	attempts: int = 4,
+	base_delay: float = 0.5,
+	max_delay: float = 20.0,
+	deadline: Optional[float] = None,
+	breaker: Optional[CircuitBreaker] = None,
+) -> T:
+	"""Call `fn`, retrying transient failures with jittered exponential backoff.
+
+	A Retry-After from the upstream is waited out in full. `deadline` bounds the total time in seconds: no retry is
+	started that couldn't begin before it. With a `breaker`, every attempt goes through it, so an open circuit ends
+	the retries at once.
+	"""
+	started = time.monotonic()
+	for attempt in range(attempts):
+		try:
+			return breaker.call(fn) if breaker is not None else fn()
+		except Exception as e:
+			delay = _retry_delay(e, name, attempt, attempts, started, base_delay, max_delay, deadline)
+			if delay is None:
+				raise
+			with span(f'{name}.retry_wait', attempt=attempt + 1):
+				time.sleep(delay)
+	raise AssertionError('unreachable')
+
+
+async def call_with_retries_async(
+	fn: Callable[[], Awaitable[T]],
+	name: str,
+	attempts: int = 4,
+	base_delay: float = 0.5,
+	max_delay: float = 20.0,
+	deadline: Optional[float] = None,
+	breaker: Optional[CircuitBreaker] = None,
+) -> T:
+	"""Asyncio variant of `call_with_retries` for a coroutine function; backoff waits don't block the event loop."""
+	started = time.monotonic()
+	for attempt in range(attempts):
+		try:
+			return await (breaker.call_async(fn) if breaker is not None else fn())
+		except Exception as e:
+			delay = _retry_delay(e, name, attempt, attempts, started, base_delay, max_delay, deadline)
+			if delay is None:
+				raise
+			with span(f'{name}.retry_wait', attempt=attempt + 1):
+				await asyncio.sleep(delay)
+	raise AssertionError('unreachable')
+
+
+def _retry_delay(
+	error: Exception,
+	name: str,
+	attempt: int,
+	attempts: int,
+	started: float,
+	base_delay: float,
+	max_delay: float,
+	deadline: Optional[float],
+) -> Optional[float]:
+	"""Seconds to wait before retrying after `error`, or None if it shouldn't be retried."""
+	if attempt == attempts - 1 or not is_transient(error):
+		return None
+	delay = max(backoff_delay(attempt, base_delay, max_delay), retry_after(error) or 0.0)
+	if deadline is not None and time.monotonic() - started + delay >= deadline:
+		return None
+	logger.warning('%s failed (%s), retry %d/%d in %.1fs', name, error, attempt + 1, attempts - 1, delay)
+	return delay
+
+
+class LatencyTracker:
+	"""Recent latencies of a call, for deriving a hedging delay from their high percentile."""
+
+	def __init__(self, window: int = 200, min_samples: int = 20):
+		self.min_samples = min_samples
+		self._samples = deque(maxlen=window)
+		self._lock = threading.Lock()
+
+	def record(self, seconds: float) -> None:
+		with self._lock:
+			self._samples.append(seconds)
+
+	def percentile(self, q: float) -> Optional[float]:
+		"""The `q` quantile (0-1) of the window, or None until `min_samples` latencies were recorded."""
+		with self._lock:
+			if len(self._samples) < self.min_samples:
+				return None
+			ordered = sorted(self._samples)
+		return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# Hedged requests that lose the race keep running to completion here; they can't be cancelled mid-request.
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='hedge')
+
+
+def hedged_call(fn: Callable[[], T], delay: Optional[float], name: str) -> T:
+	"""Call `fn`, and call it a second time if it hasn't finished after `delay` seconds; the first success wins.
+
+	Without a `delay` (e.g. too few latencies recorded yet) `fn` is just called. The slower request is not
+	cancelled, so hedging trades some extra upstream load for a shorter tail.
+	"""
+	if delay is None:
+		return fn()
+
+	primary = _hedge_executor.submit(fn)
+	done, _ = wait([primary], timeout=delay)
+	if done:
+		return primary.result()
+
+	logger.info('%s slower than %.1fs, sending a hedged request', name, delay)
+	telemetry.observe(f'{name}.hedged', delay)
+	pending = {primary, _hedge_executor.submit(fn)}
+	error = None
+	while pending:
+		done, pending = wait(pending, return_when=FIRST_COMPLETED)
+		for future in done:
+			if future.exception() is None:
+				return future.result()
+			error = future.exception()
+	raise error
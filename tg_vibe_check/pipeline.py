@@ -0,0 +1,197 @@
+import contextlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from tg_vibe_check.core.cache import ResultCache
+from tg_vibe_check.core.cascade import CHEAP_MODEL
+from tg_vibe_check.core.cascade import analyze_tg_vibe_cascade
+from tg_vibe_check.core.chunked import analyze_tg_vibe_incremental
+from tg_vibe_check.core.lexicon import analyze_tg_vibe_instant
+from tg_vibe_check.core.llm import DEFAULT_MODEL
+from tg_vibe_check.core.llm import analyze_tg_vibe
+from tg_vibe_check.core.preprocess import preprocess_messages
+from tg_vibe_check.core.shill import detect_bot_shill
+from tg_vibe_check.core.store import MessageStore
+from tg_vibe_check.core.store import ReportStore
+from tg_vibe_check.core.store import get_label_store
+from tg_vibe_check.integrations.rapidapi import MAX_CATCHUP_PAGES
+from tg_vibe_check.integrations.rapidapi import get_tg_messages_bulk
+from tg_vibe_check.integrations.rapidapi import get_tg_messages_incremental
+from tg_vibe_check.integrations.rapidapi import rate_limiter
+from tg_vibe_check.integrations.ratelimit import INTERACTIVE
+from tg_vibe_check.integrations.ratelimit import Limiter
+
+logger = logging.getLogger(__name__)
+
+# Analysis modes of `run_vibe_check` that exclude each other: instant makes no LLM call, incremental classifies
+# message by message with its own label store, and chunked and fast are different prompts.
+INCOMPATIBLE_MODES = [
+	('instant', 'incremental'),
+	('instant', 'cascade'),
+	('instant', 'chunked'),
+	('instant', 'fast'),
+	('incremental', 'cascade'),
+	('incremental', 'chunked'),
+	('incremental', 'fast'),
+	('chunked', 'fast'),
+]
+
+
+def check_modes(**modes: bool) -> None:
+	"""Raise ValueError if two analysis modes that exclude each other are both set."""
+	for first, second in INCOMPATIBLE_MODES:
+		if modes.get(first) and modes.get(second):
+			raise ValueError(f"The {first} and {second} modes can't be combined")
+
+
+def run_vibe_check(
+	channel: str,
+	batch_size: int = 4,
+	model: str = DEFAULT_MODEL,
+	cache: Optional[ResultCache] = None,
+	store: Optional[MessageStore] = None,
+	chunked: bool = False,
+	fast: bool = False,
+	incremental: bool = False,
+	cascade: bool = False,
+	cheap_model: str = CHEAP_MODEL,
+	instant: bool = False,
+	fallback: bool = False,
+	llm_slots: Optional[threading.Semaphore] = None,
+	priority: int = INTERACTIVE,
+	limiter: Optional[Limiter] = None,
+) -> Dict:
+	"""Fetch, filter and analyze one channel end to end.
+
+	Returns the report together with message counts and per-stage wall-clock timings in seconds. `llm_slots` bounds
+	how many analyses run at once when several channels share one process. With `fast`, the model returns compact
+	structured labels and the report is computed locally. With `incremental`, per-message labels are kept between
+	runs and only messages not classified before go to the model. With `cascade`, `cheap_model` analyzes first and
+	`model` is only used when that report is borderline or invalid. With `instant`, the report comes from the local
+	lexicon scorer without any LLM call, and with `fallback` it does so when the LLM call fails. Modes that exclude
+	each other (see INCOMPATIBLE_MODES) raise ValueError; `cascade` combines with `chunked` or `fast`. `cache` isn't
+	used with `incremental`, whose label store plays that role. RapidAPI requests queue for the host-wide quota at
+	`priority`, unless another `limiter` is given.
+	"""
+	check_modes(chunked=chunked, fast=fast, incremental=incremental, cascade=cascade, instant=instant)
+
+	timings = {}
+
+	started = time.perf_counter()
+	limiter = limiter or rate_limiter.with_priority(priority)
+	if store is not None:
+		# Someone waiting on the report gets the newest window fast rather than a long catch-up.
+		catchup = batch_size if priority == INTERACTIVE else MAX_CATCHUP_PAGES
+		raw_messages = get_tg_messages_incremental(
+			channel, store, batch_size, limiter=limiter, max_catchup_pages=catchup
+		)
+	else:
+		raw_messages = get_tg_messages_bulk(channel, batch_size, limiter=limiter)
+	timings['fetch'] = time.perf_counter() - started
+
+	started = time.perf_counter()
+	# Near-duplicate clustering needs the raw feed, before duplicates are collapsed.
+	bot_shill = detect_bot_shill(raw_messages)
+	messages, stats = preprocess_messages(raw_messages)
+	timings['preprocess'] = time.perf_counter() - started
+
+	decision = None
+	failure = None
+	if instant:
+		started = time.perf_counter()
+		report = analyze_tg_vibe_instant(messages)
+		timings['analyze'] = time.perf_counter() - started
+	else:
+		with llm_slots if llm_slots is not None else contextlib.nullcontext():
+			started = time.perf_counter()
+			try:
+				report, decision = _analyze(
+					channel, messages, model, cache, chunked, fast, incremental, cascade, cheap_model
+				)
+			except Exception as e:
+				if not fallback:
+					raise
+				logger.warning('Analysis of %s failed, falling back to the lexicon report: %s', channel, e)
+				failure = f'{type(e).__name__}: {e}'
+				report = analyze_tg_vibe_instant(messages)
+			timings['analyze'] = time.perf_counter() - started
+	report['red_flag_detection']['bot_shill_probability'] = bot_shill
+
+	return {
+		'channel': channel,
+		'report': report,
+		'messages': len(raw_messages),
+		'preprocess': stats,
+		'timings': timings,
+		'cascade': decision,
+		'instant': instant or failure is not None,
+		'fallback': failure,
+	}
+
+
+def _analyze(
+	channel: str,
+	messages: List[Dict],
+	model: str,
+	cache: Optional[ResultCache],
+	chunked: bool,
+	fast: bool,
+	incremental: bool,
+	cascade: bool,
+	cheap_model: str,
+) -> Tuple[Dict, Optional[Dict]]:
+	"""LLM report for `run_vibe_check`, and the cascade decision when one was made."""
+	if incremental:
+		return analyze_tg_vibe_incremental(channel, messages, model, get_label_store()), None
+	if cascade:
+		# The bot/shill score is replaced by the local signal, so it shouldn't trigger escalation.
+		return analyze_tg_vibe_cascade(
+			messages,
+			cheap_model,
+			model,
+			cache=cache,
+			chunked=chunked,
+			fast=fast,
+			exclude=('bot_shill_probability',),
+		)
+	return analyze_tg_vibe(messages, model, cache=cache, chunked=chunked, fast=fast), None
+
+
+def save_result(reports: ReportStore, result: Dict) -> None:
+	"""Store a `run_vibe_check` result as the channel's latest report."""
+	meta = {key: result[key] for key in ('messages', 'preprocess', 'timings')}
+	reports.save_report(result['channel'], result['report'], meta)
+
+
+def scan_channels(
+	channels: Iterable[str],
+	max_workers: int = 8,
+	llm_concurrency: int = 4,
+	**kwargs,
+) -> Iterator[Tuple[str, Optional[Dict], Optional[Exception]]]:
+	"""Run `run_vibe_check` for many channels concurrently, yielding (channel, result, error) as each finishes.
+
+	Fetches from all workers draw from the host-wide RapidAPI quota, and at most `llm_concurrency` analyses are
+	in flight at once, so wall-clock time approaches that of the slowest channel rather than the sum.
+	"""
+
+	llm_slots = threading.Semaphore(llm_concurrency)
+	with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='vibe-scan') as executor:
+		futures = {
+			executor.submit(run_vibe_check, channel, llm_slots=llm_slots, **kwargs): channel for channel in channels
+		}
+		for future in as_completed(futures):
+			channel = futures[future]
+			try:
+				yield channel, future.result(), None
+			except Exception as e:
+				yield channel, None, e
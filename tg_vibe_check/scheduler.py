@@ -0,0 +1,178 @@
+import argparse
+import json
+import logging
+import math
+import random
+import threading
+import time
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from tg_vibe_check.config import export_secrets_to_env
+from tg_vibe_check.core.cache import get_result_cache
+from tg_vibe_check.core.cascade import cascade_stats
+from tg_vibe_check.core.store import ReportStore
+from tg_vibe_check.core.store import get_message_store
+from tg_vibe_check.core.store import get_report_store
+from tg_vibe_check.integrations.ratelimit import BACKGROUND
+from tg_vibe_check.pipeline import check_modes
+from tg_vibe_check.pipeline import save_result
+from tg_vibe_check.pipeline import scan_channels
+from tg_vibe_check.telemetry import configure_json_logging
+from tg_vibe_check.telemetry import start_metrics_server
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 3600.0
+
+
+class RefreshScheduler:
+	"""Periodically refreshes vibe reports for a fixed set of channels and stores them in a `ReportStore`.
+
+	Each channel has its own refresh interval, stretched or shortened by a random `jitter` fraction so channels added
+	together don't all come due at once. When more channels are due than `max_per_run`, the most overdue ones go
+	first, weighted up by how often the channel is viewed in the app.
+	"""
+
+	def __init__(
+		self,
+		intervals: Dict[str, float],
+		reports: Optional[ReportStore] = None,
+		jitter: float = 0.1,
+		max_per_run: Optional[int] = None,
+		max_workers: int = 4,
+		llm_concurrency: int = 2,
+		**run_kwargs,
+	):
+		self.intervals = intervals
+		self.reports = reports or get_report_store()
+		self.jitter = jitter
+		self.max_per_run = max_per_run
+		self.max_workers = max_workers
+		self.llm_concurrency = llm_concurrency
+		self.run_kwargs = run_kwargs
+		self._jitter_factors = {}
+
+	def _interval(self, channel: str) -> float:
+		factor = self._jitter_factors.get(channel)
+		if factor is None:
+			factor = self._jitter_factors[channel] = 1 + random.uniform(-self.jitter, self.jitter)
+		return self.intervals[channel] * factor
+
+	def due(self, now: Optional[float] = None) -> List[Tuple[str, float]]:
+		"""Channels whose report is older than their interval, as (channel, priority), highest priority first."""
+		now = now or time.time()
+		refreshed = self.reports.last_refreshed()
+		views = self.reports.popularity()
+
+		due = []
+		for channel in self.intervals:
+			interval = self._interval(channel)
+			# Never refreshed channels count as stale since the epoch, so popularity still orders them.
+			age = now - refreshed.get(channel, 0.0)
+			if age < interval:
+				continue
+			priority = age / interval * (1 + math.log1p(views.get(channel, 0)))
+			due.append((channel, priority))
+		due.sort(key=lambda item: item[1], reverse=True)
+		return due[: self.max_per_run]
+
+	def run_once(self) -> Dict[str, Optional[Exception]]:
+		"""Refresh every due channel concurrently, returning the error (or None) per refreshed channel."""
+		channels = [channel for channel, _ in self.due()]
+		if not channels:
+			return {}
+
+		logger.info('Refreshing %s', ', '.join(channels))
+		# Refreshes nobody is waiting on queue behind interactive checks for the shared RapidAPI quota.
+		kwargs = {'store': get_message_store(), 'cache': get_result_cache(), 'priority': BACKGROUND, **self.run_kwargs}
+		outcome = {}
+		for channel, result, error in scan_channels(
+			channels, max_workers=self.max_workers, llm_concurrency=self.llm_concurrency, **kwargs
+		):
+			# Draw a fresh jitter for the next round either way; failed channels are retried once due again.
+			self._jitter_factors.pop(channel, None)
+			if error is not None:
+				logger.error('Refreshing %s failed: %s', channel, error)
+			else:
+				save_result(self.reports, result)
+				logger.info('Refreshed %s in %.1fs', channel, sum(result['timings'].values()))
+			outcome[channel] = error
+		if self.run_kwargs.get('cascade'):
+			logger.info('Cascade: %s', cascade_stats.stats())
+		return outcome
+
+	def run_forever(self, poll_interval: float = 30.0, stop: Optional[threading.Event] = None) -> None:
+		"""Call `run_once` every `poll_interval` seconds until `stop` is set."""
+		stop = stop or threading.Event()
+		while not stop.is_set():
+			self.run_once()
+			stop.wait(poll_interval)
+
+
+def parse_intervals(specs: List[str], default_interval: float) -> Dict[str, float]:
+	"""Parse `channel` or `channel=minutes` arguments into a channel -> interval in seconds map."""
+	intervals = {}
+	for spec in specs:
+		channel, _, minutes = spec.partition('=')
+		intervals[channel.lstrip('@')] = float(minutes) * 60 if minutes else default_interval
+	return intervals
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+	parser = argparse.ArgumentParser(description='Precompute vibe reports for tracked channels on a schedule.')
+	parser.add_argument('channels', nargs='*', help='channel or channel=minutes')
+	parser.add_argument('--config', help='JSON file mapping channel to refresh interval in minutes')
+	parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL / 60, help='default interval in minutes')
+	parser.add_argument('--jitter', type=float, default=0.1, help='random fraction added to or taken off intervals')
+	parser.add_argument('--max-per-run', type=int, help='refresh at most this many channels per round')
+	parser.add_argument('--poll', type=float, default=30.0, help='seconds between checks for due channels')
+	parser.add_argument(
+		'--incremental',
+		action='store_true',
+		help='keep per-message labels and only classify new messages (not with --cascade or --fast)',
+	)
+	parser.add_argument('--cascade', action='store_true', help='try a cheap model first, escalate borderline reports')
+	parser.add_argument('--fast', action='store_true', help='have the model return compact labels only')
+	parser.add_argument('--metrics-port', type=int, help='serve Prometheus metrics on this port')
+	parser.add_argument('--json-logs', action='store_true', help='log JSON lines instead of plain text')
+	parser.add_argument('--once', action='store_true', help='refresh due channels once and exit')
+	args = parser.parse_args(argv)
+	try:
+		check_modes(incremental=args.incremental, cascade=args.cascade, fast=args.fast)
+	except ValueError as e:
+		parser.error(str(e))
+
+	intervals = {}
+	if args.config:
+		with open(args.config) as f:
+			intervals = {channel.lstrip('@'): float(minutes) * 60 for channel, minutes in json.load(f).items()}
+	intervals.update(parse_intervals(args.channels, args.interval * 60))
+	if not intervals:
+		parser.error('no channels given')
+
+	if args.json_logs:
+		configure_json_logging()
+	else:
+		logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+	if args.metrics_port:
+		start_metrics_server(args.metrics_port)
+	export_secrets_to_env()
+	scheduler = RefreshScheduler(
+		intervals,
+		jitter=args.jitter,
+		max_per_run=args.max_per_run,
+		incremental=args.incremental,
+		cascade=args.cascade,
+		fast=args.fast,
+	)
+	if args.once:
+		scheduler.run_once()
+	else:
+		scheduler.run_forever(args.poll)
+
+
+if __name__ == '__main__':
+	main()
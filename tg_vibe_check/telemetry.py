@@ -0,0 +1,217 @@
+import contextlib
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the stage duration histogram buckets, from a cache hit to a slow LLM call.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+TOKEN_TYPES = ('input', 'output', 'cached')
+
+
+class Telemetry:
+	"""Process-wide, thread-safe registry of stage durations and LLM token/cost counters."""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._durations = {}  # stage -> {'buckets': [...], 'sum': float, 'count': int}
+		self._llm = {}  # model -> {'calls', 'input', 'output', 'cached', 'cost_usd'}
+
+	def observe(self, stage: str, seconds: float) -> None:
+		"""Record one duration of `stage`."""
+		with self._lock:
+			histogram = self._durations.setdefault(
+				stage, {'buckets': [0] * len(DURATION_BUCKETS), 'sum': 0.0, 'count': 0}
+			)
+			for i, bound in enumerate(DURATION_BUCKETS):
+				if seconds <= bound:
+					histogram['buckets'][i] += 1
+			histogram['sum'] += seconds
+			histogram['count'] += 1
+
+	def add_llm_call(self, model: str, tokens: Dict[str, int], cost_usd: float) -> None:
+		with self._lock:
+			totals = self._llm.setdefault(model, {'calls': 0, **dict.fromkeys(TOKEN_TYPES, 0), 'cost_usd': 0.0})
+			totals['calls'] += 1
+			for token_type in TOKEN_TYPES:
+				totals[token_type] += tokens.get(token_type, 0)
+			totals['cost_usd'] += cost_usd
+
+	def snapshot(self) -> Dict:
+		"""Current numbers as plain data: per-stage count, total and mean seconds, and LLM totals per model."""
+		with self._lock:
+			stages = {
+				stage: {
+					'count': histogram['count'],
+					'total_seconds': histogram['sum'],
+					'mean_seconds': histogram['sum'] / histogram['count'],
+				}
+				for stage, histogram in self._durations.items()
+			}
+			llm = {model: dict(totals) for model, totals in self._llm.items()}
+		return {'stages': stages, 'llm': llm}
+
+	def prometheus_text(self) -> str:
+		"""Render all metrics in the Prometheus text exposition format."""
+		lines = [
+			'# HELP tg_vibe_check_stage_seconds Time spent in each pipeline stage.',
+			'# TYPE tg_vibe_check_stage_seconds histogram',
+		]
+		with self._lock:
+			for stage, histogram in sorted(self._durations.items()):
+				for bound, count in zip(DURATION_BUCKETS, histogram['buckets']):
+					lines.append(f'tg_vibe_check_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+				lines.append(f'tg_vibe_check_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram["count"]}')
+				lines.append(f'tg_vibe_check_stage_seconds_sum{{stage="{stage}"}} {histogram["sum"]}')
+				lines.append(f'tg_vibe_check_stage_seconds_count{{stage="{stage}"}} {histogram["count"]}')
+
+			lines += [
+				'# HELP tg_vibe_check_llm_calls_total LLM completions made.',
+				'# TYPE tg_vibe_check_llm_calls_total counter',
+			]
+			lines += [
+				f'tg_vibe_check_llm_calls_total{{model="{m}"}} {t["calls"]}' for m, t in sorted(self._llm.items())
+			]
+			lines += [
+				'# HELP tg_vibe_check_llm_tokens_total LLM tokens by type; cached input tokens are part of input.',
+				'# TYPE tg_vibe_check_llm_tokens_total counter',
+			]
+			for model, totals in sorted(self._llm.items()):
+				for token_type in TOKEN_TYPES:
+					lines.append(
+						f'tg_vibe_check_llm_tokens_total{{model="{model}",type="{token_type}"}} {totals[token_type]}'
+					)
+			lines += [
+				'# HELP tg_vibe_check_llm_cost_usd_total Estimated LLM spend in US dollars.',
+				'# TYPE tg_vibe_check_llm_cost_usd_total counter',
+			]
+			lines += [
+				f'tg_vibe_check_llm_cost_usd_total{{model="{m}"}} {t["cost_usd"]}' for m, t in sorted(self._llm.items())
+			]
+		return '\n'.join(lines) + '\n'
+
+
+telemetry = Telemetry()
+
+
+@contextlib.contextmanager
+def span(stage: str, **fields) -> Iterator[Dict]:
+	"""Time the enclosed block as `stage`, record it and emit a structured log record.
+
+	Yields a dict that the block can add fields to (e.g. counts), which end up in the log record.
+	"""
+	started = time.perf_counter()
+	error = None
+	try:
+		yield fields
+	except BaseException as e:
+		error = type(e).__name__
+		raise
+	finally:
+		record_span(stage, time.perf_counter() - started, error, **fields)
+
+
+def record_span(stage: str, seconds: float, error: Optional[str] = None, **fields) -> None:
+	"""Record a `stage` the caller timed itself, e.g. excluding time spent outside it, as `span` does."""
+	telemetry.observe(stage, seconds)
+	event = {'event': 'span', 'stage': stage, 'duration_ms': round(seconds * 1000, 2), **fields}
+	if error is not None:
+		event['error'] = error
+	logger.info('%s took %.1fms', stage, seconds * 1000, extra={'telemetry': event})
+
+
+def _usage_tokens(usage) -> Tuple[int, int, int]:
+	"""Input, output and cache-read tokens from a litellm usage object."""
+	cached = getattr(usage, 'cache_read_input_tokens', None)
+	if cached is None:
+		details = getattr(usage, 'prompt_tokens_details', None)
+		cached = getattr(details, 'cached_tokens', None)
+	return usage.prompt_tokens or 0, usage.completion_tokens or 0, cached or 0
+
+
+def record_llm_usage(model: str, usage, stage: str) -> Dict:
+	"""Account the tokens and estimated cost of one LLM call; `usage` is litellm's `response.usage`."""
+	if usage is None:
+		return {}
+
+	input_tokens, output_tokens, cached_tokens = _usage_tokens(usage)
+	try:
+		from litellm import cost_per_token
+
+		prompt_cost, completion_cost = cost_per_token(model=model, usage_object=usage)
+		cost = prompt_cost + completion_cost
+	except Exception:
+		# Models missing from litellm's price map are still counted, just without cost.
+		cost = 0.0
+
+	tokens = {'input': input_tokens, 'output': output_tokens, 'cached': cached_tokens}
+	telemetry.add_llm_call(model, tokens, cost)
+	event = {'event': 'llm_usage', 'stage': stage, 'model': model, **tokens, 'cost_usd': cost}
+	logger.info(
+		'%s used %d input (%d cached) and %d output tokens, ~$%.4f',
+		stage,
+		input_tokens,
+		cached_tokens,
+		output_tokens,
+		cost,
+		extra={'telemetry': event},
+	)
+	return event
+
+
+class JsonFormatter(logging.Formatter):
+	"""One JSON object per line; telemetry records carry their structured fields at the top level."""
+
+	def format(self, record: logging.LogRecord) -> str:
+		entry = {
+			'ts': round(record.created, 3),
+			'level': record.levelname,
+			'logger': record.name,
+			'message': record.getMessage(),
+			**getattr(record, 'telemetry', {}),
+		}
+		if record.exc_info:
+			entry['exc_info'] = self.formatException(record.exc_info)
+		return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_json_logging(level: int = logging.INFO) -> None:
+	"""Send the package's logs to stderr as JSON lines."""
+	handler = logging.StreamHandler()
+	handler.setFormatter(JsonFormatter())
+	package_logger = logging.getLogger('tg_vibe_check')
+	package_logger.addHandler(handler)
+	package_logger.setLevel(level)
+	package_logger.propagate = False
+
+
+def start_metrics_server(port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+	"""Serve `/metrics` in Prometheus format from a daemon thread."""
+
+	class Handler(BaseHTTPRequestHandler):
+		def do_GET(self):
+			if self.path != '/metrics':
+				self.send_error(404)
+				return
+			body = telemetry.prometheus_text().encode()
+			self.send_response(200)
+			self.send_header('Content-Type', 'text/plain; version=0.0.4')
+			self.send_header('Content-Length', str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def log_message(self, format, *args):
+			pass
+
+	server = ThreadingHTTPServer((host, port), Handler)
+	threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+	return server
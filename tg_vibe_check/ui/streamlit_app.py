@@ -1,7 +1,64 @@
+import time
+
 import streamlit as st
 
-from tg_vibe_check.core.llm import analyze_tg_vibe
-from tg_vibe_check.integrations.rapidapi import get_tg_messages_bulk
+from tg_vibe_check.config import register_secret_provider
+from tg_vibe_check.core.cache import SingleFlightCache
+from tg_vibe_check.core.cache import get_result_cache
+from tg_vibe_check.core.cache import make_cache_key
+from tg_vibe_check.core.lexicon import analyze_tg_vibe_instant
+from tg_vibe_check.core.llm import DEFAULT_MODEL
+from tg_vibe_check.core.metrics import METRIC_SPECS
+from tg_vibe_check.core.metrics import SECTIONS
+from tg_vibe_check.core.metrics import flatten_scores
+from tg_vibe_check.core.preprocess import preprocess_messages
+from tg_vibe_check.core.prompt import PROMPT_VERSION
+from tg_vibe_check.core.shill import detect_bot_shill
+from tg_vibe_check.core.store import get_message_store
+from tg_vibe_check.core.store import get_report_store
+from tg_vibe_check.core.streaming import stream_tg_vibe
+from tg_vibe_check.integrations.rapidapi import get_tg_messages_incremental
+from tg_vibe_check.pipeline import save_result
+from tg_vibe_check.pipeline import scan_channels
+from tg_vibe_check.telemetry import span
+from tg_vibe_check.telemetry import telemetry
+
+CHANNELS = {
+	'Virtuals': 'virtuals',
+	'Cookie': 'cookie_dao',
+	'Bittensor': 'taobittensor',
+	'NEAR': 'cryptonear',
+	'Render': 'rendernetwork',
+	'Hey Anon': 'realwagmi',
+}
+
+_SPECS_BY_KEY = {spec['key']: spec for spec in METRIC_SPECS}
+_SPECS_BY_SECTION = {
+	section: [spec for spec in METRIC_SPECS if spec['section'] == section] for section, _, _ in SECTIONS
+}
+
+
+def streamlit_secret(name):
+	"""Secret provider backed by `st.secrets`, which also covers secrets configured on Streamlit Cloud."""
+	try:
+		return st.secrets.get(name)
+	except FileNotFoundError:
+		return None
+
+
+register_secret_provider(streamlit_secret)
+
+# How long sessions share a fetched message window and its analysis before fetching again
+FETCH_TTL = 120.0
+ANALYSIS_TTL = 900.0
+# History depth in pages of 50 messages; a click never waits on a longer catch-up than that.
+BATCH_SIZE = 4
+
+
+@st.cache_resource
+def get_shared_cache():
+	"""Cache shared by all sessions of this server, so identical fetches and analyses run once."""
+	return SingleFlightCache()
 
 
 def get_status_colors(score, good_threshold, bad_threshold, higher_is_better=True):
@@ -60,250 +117,256 @@ def main():
 	)
 
 	# 1. Dropdown Selection
-	channels = {
-		'Virtuals': 'virtuals',
-		'Cookie': 'cookie_dao',
-		'Bittensor': 'taobittensor',
-		'NEAR': 'cryptonear',
-		'Render': 'rendernetwork',
-		'Hey Anon': 'realwagmi',
-	}
 	channel_label = st.selectbox(
 		'Choose a Telegram channel to analyze:',
-		list(channels.keys()),
+		list(CHANNELS.keys()),
 		index=0,
 	)
-	channel = channels[channel_label]
-
-	# Analysis button
-	if st.button('Start Vibe Check', use_container_width=True):
-		# 2. Long-Running Analysis with Progress Tracking
-		with st.status('Running vibe check analysis...', expanded=True) as status:
-			st.write('📡 Scanning community channel...')
-			try:
-				messages = get_tg_messages_bulk(channel)
-				st.write(f'✅ Retrieved {len(messages)} messages')
-			except Exception as e:
-				st.error(f'❌ Failed to fetch messages: {str(e)}')
-				st.stop()
-
-			st.write('🔍 Analyzing sentiment patterns...')
-			try:
-				results = analyze_tg_vibe(messages)
-				st.write('✅ Analysis complete!')
-			except Exception as e:
-				st.error(f'❌ Analysis failed: {str(e)}')
-				st.stop()
-
-			status.update(label='Analysis complete! ⚡', state='complete', expanded=False)
-
-		# 3. Dashboard with Metrics
-		display_results(results)
-
-
-def display_results(results):
-	"""Display the analysis results in a dashboard format."""
-
-	# Sentiment & Psychology Metrics
-	st.subheader('💭 Sentiment & Psychology')
-	col1, col2, col3 = st.columns(3)
-
-	sentiment = results['sentiment_psychology_metrics']
-
-	with col1:
-		fud_score = sentiment['fud_coefficient']['score']
-		render_metric(
-			label='FUD Coefficient',
-			value=fud_score,
-			help_text='Fear, Uncertainty, Doubt level (0=low, 1=high)',
-			good_threshold=0.3,
-			bad_threshold=0.7,
-			higher_is_better=False,
-		)
-
-	with col2:
-		cope_score = sentiment['cope_level']['score']
-		render_metric(
-			label='Cope Level',
-			value=cope_score,
-			help_text='Unrealistic optimism level (0=realistic, 1=high cope)',
-			good_threshold=0.3,
-			bad_threshold=0.7,
-			higher_is_better=False,
-		)
-
-	with col3:
-		cohesion_score = sentiment['community_cohesion']['score']
-		render_metric(
-			label='Community Cohesion',
-			value=cohesion_score,
-			help_text='Unity and support level (0=divided, 1=unified)',
-			good_threshold=0.7,
-			bad_threshold=0.3,
-			higher_is_better=True,
-		)
-
-	# Engagement Quality Indicators
-	st.subheader('🎯 Engagement Quality')
-	col1, col2, col3 = st.columns(3)
-
-	engagement = results['engagement_quality_indicators']
-
-	with col1:
-		moon_score = engagement['moon_boy_density']['score']
-		render_metric(
-			label='Moon Boy Density',
-			value=moon_score,
-			help_text='Low-effort hype ratio (0=quality discussion, 1=pure hype)',
-			good_threshold=0.3,
-			bad_threshold=0.7,
-			higher_is_better=False,
+	channel = CHANNELS[channel_label]
+
+	reports = get_report_store()
+	viewed = st.session_state.setdefault('viewed_channels', set())
+	if channel not in viewed:
+		viewed.add(channel)
+		reports.record_view(channel)
+
+	# Reports of this session by channel, so reruns (switching channels, any widget) redraw them without the pipeline.
+	session_reports = st.session_state.setdefault('reports', {})
+	latest = reports.latest_report(channel)
+
+	# Analysis button; a precomputed report is shown right away and can be refreshed on demand
+	refresh = latest is not None or channel in session_reports
+	if st.button('Refresh Now' if refresh else 'Start Vibe Check', use_container_width=True):
+		entry = run_analysis(channel, refresh)
+		if entry is not None:
+			session_reports[channel] = entry
+
+	entry = session_reports.get(channel)
+	if latest is not None and (entry is None or latest['created_at'] > entry['created_at']):
+		entry = {'report': latest['report'], 'created_at': latest['created_at'], 'source': 'stored'}
+	if entry is not None:
+		display_report(entry)
+
+	if st.query_params.get('admin'):
+		with st.sidebar:
+			display_admin_panel()
+
+	# 4. Scan the whole watchlist at once
+	st.markdown('---')
+	with st.expander('📊 Scan all channels'):
+		display_scan()
+
+
+def run_analysis(channel, refresh=False):
+	"""Fetch, preprocess and analyze a channel with live progress, returning the session report entry.
+
+	The instant estimate fills the dashboard first and is replaced as the model streams each metric. If the model
+	fails the instant estimate becomes the report; if the fetch fails nothing is returned. A `refresh` skips the
+	fetch other sessions shared recently, but still joins one that is in flight.
+	"""
+	# 2. Long-Running Analysis with Progress Tracking
+	status = st.status('Running vibe check analysis...', expanded=True)
+	with status:
+		st.write('📡 Scanning community channel...')
+		try:
+			with span('ui.fetch', channel=channel):
+				if refresh:
+					get_shared_cache().invalidate(('fetch', channel))
+				messages = get_shared_cache().get_or_compute(
+					('fetch', channel),
+					lambda: get_tg_messages_incremental(
+						channel, get_message_store(), BATCH_SIZE, max_catchup_pages=BATCH_SIZE
+					),
+					FETCH_TTL,
+				)
+			st.write(f'✅ Retrieved {len(messages)} messages')
+		except Exception as e:
+			st.error(f'❌ Failed to fetch messages: {str(e)}')
+			status.update(label='Fetching messages failed', state='error')
+			return None
+
+		# Near-duplicate clustering needs the raw feed, before duplicates are collapsed.
+		with span('ui.preprocess', channel=channel):
+			bot_shill = detect_bot_shill(messages)
+			messages, stats = preprocess_messages(messages)
+		saved = stats['tokens_saved'] / stats['tokens_before'] if stats['tokens_before'] else 0
+		st.write(f'🧹 Kept {stats["messages_out"]} relevant messages after filtering ({saved:.0%} fewer prompt tokens)')
+
+		with span('ui.instant', channel=channel):
+			instant = analyze_tg_vibe_instant(messages)
+			instant['red_flag_detection']['bot_shill_probability'] = bot_shill
+		st.write('⚡ Showing an instant keyword-based estimate while the model reads the messages')
+		st.write('🔍 Analyzing sentiment patterns...')
+
+	# 3. Live dashboard, cleared once the report fragment takes over
+	live = st.empty()
+	with live.container():
+		placeholders = render_metric_placeholders()
+	for (section, key), placeholder in placeholders.items():
+		display_metric(placeholder, key, instant[section][key])
+
+	def analyze():
+		results = {}
+		for section, key, metric in stream_tg_vibe(messages, cache=get_result_cache()):
+			if key == 'bot_shill_probability':
+				metric = bot_shill
+			results.setdefault(section, {})[key] = metric
+			if (section, key) in placeholders:
+				display_metric(placeholders[(section, key)], key, metric)
+		return results
+
+	# Sessions asking for the same analysis while it streams wait for it and render the finished result.
+	analysis_key = ('analysis', make_cache_key(messages, DEFAULT_MODEL, 0.1, PROMPT_VERSION))
+	try:
+		with span('ui.analyze', channel=channel):
+			results = get_shared_cache().get_or_compute(analysis_key, analyze, ANALYSIS_TTL)
+	except Exception as e:
+		# Keep the instant estimate rather than leaving an empty dashboard.
+		status.update(label='Analysis failed, showing the instant estimate', state='error')
+		live.empty()
+		return {'report': instant, 'created_at': time.time(), 'source': 'instant', 'error': str(e)}
+
+	status.update(label='Analysis complete! ⚡', state='complete', expanded=False)
+	get_report_store().save_report(channel, results, {'messages': stats['messages_in'], 'preprocess': stats})
+	live.empty()
+	return {'report': results, 'created_at': time.time(), 'source': 'live'}
+
+
+@st.fragment
+def display_scan():
+	"""Watchlist scan form; editing and starting it reruns only this fragment, not the page."""
+	watchlist = st.text_area('Channels to scan (one per line):', '\n'.join(CHANNELS.values()))
+	if st.button('Scan All Channels', use_container_width=True):
+		scan_all([line.strip() for line in watchlist.splitlines() if line.strip()])
+
+
+@st.fragment
+def display_admin_panel():
+	"""Occupancy and hit rates of the shared in-memory cache and the on-disk result cache, plus telemetry."""
+	shared = get_shared_cache().stats()
+	results = get_result_cache().stats()
+	st.header('⚙️ Cache')
+	st.metric('Shared entries', shared['entries'])
+	st.metric('Shared hit rate', f'{shared["hit_rate"]:.0%}', help='Includes requests that joined an in-flight one')
+	st.caption(f'{shared["hits"]} hits, {shared["shared"]} joined in flight, {shared["misses"]} computed')
+	st.markdown('**In flight**')
+	st.write([' / '.join(key) for key in shared['in_flight']] or 'Nothing')
+	if st.button('Clear shared cache'):
+		get_shared_cache().clear()
+	st.metric('Result cache entries', results['entries'])
+	st.metric('Result cache hit rate', f'{results["hit_rate"]:.0%}')
+
+	st.header('⏱️ Telemetry')
+	snapshot = telemetry.snapshot()
+	st.dataframe(
+		[
+			{'Stage': stage, 'Count': numbers['count'], 'Mean (s)': round(numbers['mean_seconds'], 3)}
+			for stage, numbers in sorted(snapshot['stages'].items())
+		],
+		hide_index=True,
+	)
+	for model, totals in snapshot['llm'].items():
+		st.caption(
+			f'{model}: {totals["calls"]} calls, {totals["input"]} in ({totals["cached"]} cached) / '
+			f'{totals["output"]} out tokens, ~${totals["cost_usd"]:.2f}'
 		)
-
-	with col2:
-		help_score = engagement['helpfulness_ratio']['score']
+	with st.expander('Prometheus'):
+		st.code(telemetry.prometheus_text(), language='text')
+
+
+def format_age(seconds):
+	"""Human readable age, e.g. '42s', '17m' or '3h 05m'."""
+	if seconds < 60:
+		return f'{seconds:.0f}s'
+	if seconds < 3600:
+		return f'{seconds // 60:.0f}m'
+	return f'{seconds // 3600:.0f}h {seconds % 3600 // 60:02.0f}m'
+
+
+def scan_all(channels):
+	"""Scan many channels concurrently and grow a sortable leaderboard as each one finishes."""
+	progress = st.progress(0.0, text=f'Scanning {len(channels)} channels...')
+	leaderboard = st.empty()
+
+	rows = []
+	results = scan_channels(channels, cache=get_result_cache(), store=get_message_store())
+	for done, (channel, result, error) in enumerate(results, start=1):
+		row = {'Channel': channel}
+		if error is not None:
+			row['Error'] = str(error)
+		else:
+			save_result(get_report_store(), result)
+			row.update(flatten_scores(result['report']))
+			row['Time (s)'] = round(sum(result['timings'].values()), 1)
+		rows.append(row)
+
+		leaderboard.dataframe(rows, use_container_width=True, hide_index=True)
+		progress.progress(done / len(channels), text=f'Scanned {done}/{len(channels)} channels')
+
+
+def render_metric_placeholders():
+	"""Lay out the metric dashboard with an empty card slot per metric, keyed by (section, metric key)."""
+	placeholders = {}
+	for section, title, _ in SECTIONS:
+		st.subheader(title)
+		specs = _SPECS_BY_SECTION[section]
+		for column, spec in zip(st.columns(len(specs)), specs):
+			with column:
+				placeholders[(section, spec['key'])] = st.empty()
+	return placeholders
+
+
+def display_metric(placeholder, key, metric):
+	"""Render one metric card into its placeholder."""
+	spec = _SPECS_BY_KEY[key]
+	with placeholder.container():
 		render_metric(
-			label='Helpfulness Ratio',
-			value=help_score,
-			help_text='Question answering quality (0=poor support, 1=helpful)',
-			good_threshold=0.7,
-			bad_threshold=0.3,
-			higher_is_better=True,
+			label=spec['label'],
+			value=metric['score'],
+			help_text=spec['help_text'],
+			good_threshold=spec['good_threshold'],
+			bad_threshold=spec['bad_threshold'],
+			higher_is_better=spec['higher_is_better'],
+			is_integer=spec.get('is_integer', False),
 		)
 
-	with col3:
-		signal_score = engagement['signal_to_noise_ratio']['score']
-		render_metric(
-			label='Signal-to-Noise Ratio',
-			value=signal_score,
-			help_text='Technical discussion quality (0=noise, 1=signal)',
-			good_threshold=0.7,
-			bad_threshold=0.3,
-			higher_is_better=True,
-		)
 
-	# Red Flag Detection
-	st.subheader('🚨 Red Flag Detection')
-	col1, col2, col3 = st.columns(3)
+@st.fragment
+def display_report(entry):
+	"""Render a session or stored report entry; as a fragment, interactions inside it never rerun the pipeline."""
+	age = format_age(time.time() - entry['created_at'])
+	if entry['source'] == 'instant':
+		st.warning(f'⚠️ Model analysis failed ({entry["error"]}), these scores come from keyword matching only')
+	elif entry['source'] == 'stored':
+		st.caption(f'🕒 Precomputed report from {age} ago')
+	else:
+		st.caption(f'🕒 Report from {age} ago')
+	display_results(entry['report'])
 
-	red_flags = results['red_flag_detection']
 
-	with col1:
-		rugpull_score = red_flags['rugpull_anxiety_index']['score']
-		render_metric(
-			label='Rugpull Anxiety',
-			value=rugpull_score,
-			help_text='Number of rugpull concerns (0=none, higher=more concerns)',
-			good_threshold=0,
-			bad_threshold=1,
-			higher_is_better=False,
-			is_integer=True,
-		)
+def display_results(results):
+	"""Display the analysis results in a dashboard format."""
+	placeholders = render_metric_placeholders()
+	for (section, key), placeholder in placeholders.items():
+		display_metric(placeholder, key, results[section][key])
 
-	with col2:
-		bot_score = red_flags['bot_shill_probability']['score']
-		render_metric(
-			label='Bot/Shill Probability',
-			value=bot_score,
-			help_text='Likelihood of bot activity (0=organic, 1=heavy bots)',
-			good_threshold=0.3,
-			bad_threshold=0.7,
-			higher_is_better=False,
-		)
+	display_details(results)
 
-	with col3:
-		desperation_score = red_flags['price_desperation_score']['score']
-		render_metric(
-			label='Price Desperation',
-			value=desperation_score,
-			help_text='Obsession with price action (0=patient, 1=desperate)',
-			good_threshold=0.3,
-			bad_threshold=0.7,
-			higher_is_better=False,
-		)
 
-	# Detailed Analysis Tabs
+def display_details(results):
+	"""Display the explanation and supporting messages of every metric in tabs, one tab per section."""
 	st.markdown('---')
-
-	tab1, tab2, tab3 = st.tabs(['💭 Sentiment Details', '🎯 Engagement Details', '🚨 Red Flag Details'])
-
-	with tab1:
-		# FUD Coefficient
-		st.markdown('### FUD Coefficient')
-		st.write(sentiment['fud_coefficient']['explanation'])
-		if sentiment['fud_coefficient']['supporting_messages']:
-			for msg in sentiment['fud_coefficient']['supporting_messages']:
-				st.markdown(f'> {msg}')
-
-		st.markdown('---')
-
-		# Cope Level
-		st.markdown('### Cope Level')
-		st.write(sentiment['cope_level']['explanation'])
-		if sentiment['cope_level']['supporting_messages']:
-			for msg in sentiment['cope_level']['supporting_messages']:
-				st.markdown(f'> {msg}')
-
-		st.markdown('---')
-
-		# Community Cohesion
-		st.markdown('### Community Cohesion')
-		st.write(sentiment['community_cohesion']['explanation'])
-		if sentiment['community_cohesion']['supporting_messages']:
-			for msg in sentiment['community_cohesion']['supporting_messages']:
-				st.markdown(f'> {msg}')
-
-	with tab2:
-		# Moon Boy Density
-		st.markdown('### Moon Boy Density')
-		st.write(engagement['moon_boy_density']['explanation'])
-		if engagement['moon_boy_density']['supporting_messages']:
-			for msg in engagement['moon_boy_density']['supporting_messages']:
-				st.markdown(f'> {msg}')
-
-		st.markdown('---')
-
-		# Helpfulness Ratio
-		st.markdown('### Helpfulness Ratio')
-		st.write(engagement['helpfulness_ratio']['explanation'])
-		if engagement['helpfulness_ratio']['supporting_messages']:
-			for msg in engagement['helpfulness_ratio']['supporting_messages']:
-				st.markdown(f'> {msg}')
-
-		st.markdown('---')
-
-		# Signal-to-Noise Ratio
-		st.markdown('### Signal-to-Noise Ratio')
-		st.write(engagement['signal_to_noise_ratio']['explanation'])
-		if engagement['signal_to_noise_ratio']['supporting_messages']:
-			for msg in engagement['signal_to_noise_ratio']['supporting_messages']:
-				st.markdown(f'> {msg}')
-
-	with tab3:
-		# Rugpull Anxiety
-		st.markdown('### Rugpull Anxiety')
-		st.write(red_flags['rugpull_anxiety_index']['explanation'])
-		if red_flags['rugpull_anxiety_index']['supporting_messages']:
-			for msg in red_flags['rugpull_anxiety_index']['supporting_messages']:
-				st.markdown(f'> {msg}')
-
-		st.markdown('---')
-
-		# Bot/Shill Probability
-		st.markdown('### Bot/Shill Probability')
-		st.write(red_flags['bot_shill_probability']['explanation'])
-		if red_flags['bot_shill_probability']['supporting_messages']:
-			for msg in red_flags['bot_shill_probability']['supporting_messages']:
-				st.markdown(f'> {msg}')
-
-		st.markdown('---')
-
-		# Price Desperation
-		st.markdown('### Price Desperation')
-		st.write(red_flags['price_desperation_score']['explanation'])
-		if red_flags['price_desperation_score']['supporting_messages']:
-			for msg in red_flags['price_desperation_score']['supporting_messages']:
-				st.markdown(f'> {msg}')
+	tabs = st.tabs([tab_title for _, _, tab_title in SECTIONS])
+	for (section, _, _), tab in zip(SECTIONS, tabs):
+		with tab:
+			for i, spec in enumerate(_SPECS_BY_SECTION[section]):
+				if i:
+					st.markdown('---')
+				metric = results[section][spec['key']]
+				st.markdown(f'### {spec["label"]}')
+				st.write(metric['explanation'])
+				for msg in metric['supporting_messages']:
+					st.markdown(f'> {msg}')
 
 
 if __name__ == '__main__':